@@ -1,99 +1,187 @@
 """
-API endpoints for querying reviews from MongoDB.
-Supports filtering, sorting, and pagination.
+API endpoints for querying stored reviews (see app.services.review_repository).
+Supports filtering, sorting, and offset or keyset pagination.
 """
-from fastapi import APIRouter, HTTPException, status, Query
+from fastapi import APIRouter, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from typing import Optional, List
+from dataclasses import asdict
+from datetime import datetime, timezone
 import logging
 import math
 
 from app.models import (
     ReviewResponse,
-    PaginatedReviewsResponse
+    PaginatedReviewsResponse,
+    ReviewStatsResponse,
+    StatsPeriod,
+    ExportFormat
 )
-from app.database import get_reviews_collection
+from app.services.place_stats import apply_deleted_review
+from app.services.review_rollups import get_review_stats, remove_review_from_rollups
+from app.services.review_serialization import (
+    REVIEW_FIELDS,
+    parse_fields,
+    review_to_dict,
+    reviews_payload
+)
+from app.services import recent_reviews
+from app.services.review_repository import (
+    SORT_FIELDS,
+    ReviewFilter,
+    decode_cursor,
+    encode_cursor,
+    get_review_repository,
+    mongodb_storage
+)
+from app.services.response_cache import cached_response, bump_reviews_version
+from app.services.review_export import MEDIA_TYPES, STREAMERS, parquet_available
 from app.config import settings
+from app.database import redis_enabled
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+# ============================================================================
+# QUERY HELPERS
+# ============================================================================
+
+VALID_SORT_FIELDS = list(SORT_FIELDS)
+
+
+def _sort_direction(sort_by: str, sort_order: str) -> int:
+    """Validate the sort parameters and return the pymongo sort direction."""
+    if sort_by not in VALID_SORT_FIELDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"sort_by debe ser uno de: {', '.join(VALID_SORT_FIELDS)}"
+        )
+
+    return -1 if sort_order.lower() == "desc" else 1
+
+
+FIELDS_DESCRIPTION = f"Campos a incluir, separados por comas (default: todos). Válidos: {', '.join(REVIEW_FIELDS)}"
+COMPACT_DESCRIPTION = "Reseñas como arrays de valores en el orden de `fields` (para consumidores automáticos)"
+
+
+def _decode_cursor(cursor: Optional[str], sort_by: str):
+    """Validate the `cursor` parameter."""
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor, sort_by)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"cursor inválido: {e}"
+        )
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Naive UTC datetime, as dates are stored (aware and naive values cannot be compared)."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _requested_fields(fields: Optional[str]) -> tuple:
+    """Validate the `fields` parameter."""
+    try:
+        return parse_fields(fields)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"fields solo puede contener: {', '.join(REVIEW_FIELDS)}"
+        )
+
+
 # ============================================================================
 # LIST REVIEWS (PAGINATED)
 # ============================================================================
 
 @router.get("/", response_model=PaginatedReviewsResponse)
 async def list_reviews(
+    request: Request,
     page: int = Query(1, ge=1, description="Número de página (comienza en 1)"),
     page_size: int = Query(100, ge=1, le=500, description="Tamaño de página (máx 500)"),
+    place_id: Optional[str] = Query(None, description="ID canónico del lugar"),
     min_rating: Optional[float] = Query(None, ge=1, le=5, description="Rating mínimo"),
     max_rating: Optional[float] = Query(None, ge=1, le=5, description="Rating máximo"),
     sort_by: str = Query("review_date", description="Campo para ordenar (review_date, rating, retrieval_date)"),
-    sort_order: str = Query("desc", description="Orden: asc o desc")
+    sort_order: str = Query("desc", description="Orden: asc o desc"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor); reemplaza a page"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    compact: bool = Query(False, description=COMPACT_DESCRIPTION)
 ):
     """
     Listar reseñas con paginación y filtros.
 
     **Filtros disponibles:**
+    - **place_id**: ID canónico del lugar (feature ID extraído de la URL de Google Maps)
     - **min_rating**: Rating mínimo (1-5)
     - **max_rating**: Rating máximo (1-5)
 
     **Paginación:**
     - **page**: Número de página (comienza en 1)
     - **page_size**: Registros por página (default: 100, max: 500)
+    - **cursor**: `next_cursor` de la respuesta anterior. La página empieza
+      después de la última reseña recibida en lugar de saltar las anteriores,
+      por lo que las páginas profundas cuestan lo mismo que la primera
 
     **Ordenamiento:**
     - **sort_by**: Campo para ordenar (review_date, rating, retrieval_date)
     - **sort_order**: Orden ascendente (asc) o descendente (desc)
+
+    **Campos:**
+    - **fields**: Solo estos campos se leen de MongoDB y se envían (ej. `id_review,rating,review_date`)
+    - **compact**: Cada reseña es un array de valores en el orden de la lista `fields` de la respuesta
     """
-    collection = get_reviews_collection()
-
-    # Build query filter
-    query_filter = {}
-
-    # Rating filters
-    if min_rating is not None or max_rating is not None:
-        query_filter["rating"] = {}
-        if min_rating is not None:
-            query_filter["rating"]["$gte"] = min_rating
-        if max_rating is not None:
-            query_filter["rating"]["$lte"] = max_rating
-
-    # Validate sort parameters
-    valid_sort_fields = ["review_date", "rating", "retrieval_date"]
-    if sort_by not in valid_sort_fields:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"sort_by debe ser uno de: {', '.join(valid_sort_fields)}"
-        )
+    repository = get_review_repository()
 
-    sort_direction = -1 if sort_order.lower() == "desc" else 1
+    filters = ReviewFilter(place_id=place_id, min_rating=min_rating, max_rating=max_rating)
+    sort_direction = _sort_direction(sort_by, sort_order)
+    review_fields = _requested_fields(fields)
+    after = _decode_cursor(cursor, sort_by)
 
-    try:
+    def build():
         # Get total count
-        total_count = collection.count_documents(query_filter)
+        total_count = repository.count(filters)
 
         # Calculate pagination
-        skip = (page - 1) * page_size
+        skip = (page - 1) * page_size if after is None else 0
         total_pages = math.ceil(total_count / page_size)
 
         # Query with pagination
-        cursor = collection.find(query_filter).sort(sort_by, sort_direction).skip(skip).limit(page_size)
-        reviews_data = list(cursor)
+        docs = list(repository.find(
+            filters, sort_by, sort_direction, review_fields, limit=page_size, skip=skip, after=after
+        ))
+        # Trusted DB documents: serialized directly (see review_serialization)
+        payload = reviews_payload(docs, review_fields, compact)
 
-        # Convert to ReviewResponse models
-        reviews = [ReviewResponse(**review) for review in reviews_data]
+        logger.info(f"Listed {len(docs)} reviews (page {page}/{total_pages}, filter: {filters})")
 
-        logger.info(f"Listed {len(reviews)} reviews (page {page}/{total_pages}, filter: {query_filter})")
+        return {
+            "total": total_count,
+            "page": page,
+            "page_size": page_size,
+            "total_pages": total_pages,
+            "next_cursor": encode_cursor(docs[-1], sort_by) if len(docs) == page_size else None,
+            **payload
+        }
 
-        return PaginatedReviewsResponse(
-            total=total_count,
-            page=page,
-            page_size=page_size,
-            total_pages=total_pages,
-            reviews=reviews
-        )
+    try:
+        # Served from the response cache until reviews change
+        return cached_response(request, "list_reviews", {
+            "page": page,
+            "page_size": page_size,
+            "filter": asdict(filters),
+            "sort": [sort_by, sort_direction],
+            "cursor": cursor,
+            "fields": review_fields,
+            "compact": compact
+        }, build)
 
     except Exception as e:
         logger.error(f"Error listing reviews: {e}")
@@ -103,21 +191,158 @@ async def list_reviews(
         )
 
 
+# ============================================================================
+# EXPORT REVIEWS (STREAMING)
+# ============================================================================
+
+@router.get("/export")
+def export_reviews(
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="Formato: ndjson, csv o parquet"),
+    place_id: Optional[str] = Query(None, description="ID canónico del lugar"),
+    min_rating: Optional[float] = Query(None, ge=1, le=5, description="Rating mínimo"),
+    max_rating: Optional[float] = Query(None, ge=1, le=5, description="Rating máximo"),
+    sort_by: str = Query("review_date", description="Campo para ordenar (review_date, rating, retrieval_date)"),
+    sort_order: str = Query("desc", description="Orden: asc o desc"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    """
+    Exportar todas las reseñas que cumplen los filtros en una sola respuesta.
+
+    Acepta los mismos filtros y ordenamiento que el listado de reseñas, sin
+    paginación. Las reseñas se envían a medida que se leen de MongoDB, por lo
+    que el uso de memoria es constante sin importar el tamaño de la
+    exportación.
+
+    **Formatos:**
+    - **ndjson**: Un objeto JSON por línea (default)
+    - **csv**: CSV con encabezado, fechas en ISO 8601
+    - **parquet**: Archivo Parquet escrito por row groups (requiere pyarrow)
+
+    **fields** limita las columnas exportadas (y leídas de MongoDB).
+    """
+    filters = ReviewFilter(place_id=place_id, min_rating=min_rating, max_rating=max_rating)
+    sort_direction = _sort_direction(sort_by, sort_order)
+    review_fields = _requested_fields(fields)
+
+    if format == ExportFormat.PARQUET and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="La exportación Parquet requiere el paquete pyarrow"
+        )
+
+    try:
+        cursor = get_review_repository().find(filters, sort_by, sort_direction, review_fields)
+    except Exception as e:
+        logger.error(f"Error exporting reviews: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al exportar reseñas: {str(e)}"
+        )
+
+    logger.info(f"Exporting reviews as {format.value} (filter: {filters})")
+
+    return StreamingResponse(
+        STREAMERS[format.value](cursor, review_fields),
+        media_type=MEDIA_TYPES[format.value],
+        headers={"Content-Disposition": f'attachment; filename="reviews.{format.value}"'}
+    )
+
+
+# ============================================================================
+# REVIEW STATS
+# ============================================================================
+
+@router.get("/stats", response_model=ReviewStatsResponse)
+async def review_stats(
+    request: Request,
+    place_id: Optional[str] = Query(None, description="ID canónico del lugar"),
+    client_id: Optional[str] = Query(None, description="ID del cliente (todos sus lugares)"),
+    period: StatsPeriod = Query(StatsPeriod.MONTH, description="Granularidad de la serie: day, week o month"),
+    date_from: Optional[datetime] = Query(None, description="Primer periodo a incluir (ISO 8601)"),
+    date_to: Optional[datetime] = Query(None, description="Último periodo a incluir (ISO 8601)")
+):
+    """
+    Estadísticas de reseñas: histograma de ratings y cantidad y rating
+    promedio por día, semana o mes.
+
+    **Filtros disponibles:**
+    - **place_id**: Un lugar
+    - **client_id**: Todos los lugares de un cliente
+    - Sin filtros: todos los lugares
+
+    **Rango:**
+    - **date_from** / **date_to**: Periodos (por fecha de la reseña) a incluir
+
+    Se calculan a partir de agregados precalculados que se actualizan al
+    guardar reseñas, por lo que el tiempo de respuesta no depende del número
+    de reseñas. Los periodos comienzan a las 00:00 UTC; las semanas, el lunes.
+
+    No disponible con `REVIEW_STORAGE=sqlite` (501): los agregados solo se
+    mantienen con MongoDB.
+    """
+    if not mongodb_storage():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Las estadísticas de reseñas requieren REVIEW_STORAGE=mongodb"
+        )
+
+    date_from, date_to = _naive_utc(date_from), _naive_utc(date_to)
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from debe ser anterior a date_to"
+        )
+
+    def build():
+        stats = get_review_stats(
+            period=period.value,
+            place_id=place_id,
+            client_id=client_id,
+            date_from=date_from,
+            date_to=date_to
+        )
+
+        logger.info(f"Review stats ({period.value}, place {place_id}, client {client_id}): "
+                    f"{stats['totals']['count']} reviews in {len(stats['series'])} periods")
+
+        return stats
+
+    try:
+        return cached_response(request, "review_stats", {
+            "place_id": place_id,
+            "client_id": client_id,
+            "period": period.value,
+            "date_from": date_from,
+            "date_to": date_to
+        }, build)
+
+    except Exception as e:
+        logger.error(f"Error getting review stats: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error al obtener estadísticas de reseñas: {str(e)}"
+        )
+
+
 # ============================================================================
 # GET SINGLE REVIEW
 # ============================================================================
 
 @router.get("/{review_id}", response_model=ReviewResponse)
-async def get_review(review_id: str):
+async def get_review(
+    review_id: str,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
     """
     Obtener una reseña específica por su ID.
 
     - **review_id**: ID único de la reseña (id_review)
+    - **fields**: Campos a incluir (default: todos)
     """
-    collection = get_reviews_collection()
+    review_fields = _requested_fields(fields)
 
     try:
-        review = collection.find_one({"id_review": review_id})
+        review = get_review_repository().get(review_id, review_fields)
 
         if not review:
             raise HTTPException(
@@ -125,7 +350,7 @@ async def get_review(review_id: str):
                 detail=f"Reseña con id_review={review_id} no encontrada"
             )
 
-        return ReviewResponse(**review)
+        return ORJSONResponse(review_to_dict(review, review_fields))
 
     except HTTPException:
         raise
@@ -143,33 +368,61 @@ async def get_review(review_id: str):
 
 @router.get("/recent/all")
 async def get_recent_reviews(
-    limit: int = Query(100, ge=1, le=500, description="Número de reseñas recientes")
+    request: Request,
+    limit: int = Query(100, ge=1, le=500, description="Número de reseñas recientes"),
+    client_id: Optional[str] = Query(None, description="Solo reseñas de este cliente"),
+    place_id: Optional[str] = Query(None, description="Solo reseñas de este lugar"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    compact: bool = Query(False, description=COMPACT_DESCRIPTION)
 ):
     """
     Obtener las reseñas más recientes del sistema.
 
     - **limit**: Número de reseñas a retornar (max 500)
+    - **client_id** / **place_id**: Solo reseñas de un cliente o de un lugar
+    - **fields**: Campos a incluir (default: todos)
+    - **compact**: Reseñas como arrays de valores en el orden de `fields`
 
     Ordenadas por fecha de extracción (retrieval_date) descendente.
-    Útil para monitorear nuevas reseñas en tiempo real.
+    Útil para monitorear nuevas reseñas en tiempo real. Se leen de una caché
+    en Redis que se actualiza al guardar reseñas.
     """
-    collection = get_reviews_collection()
+    if client_id and place_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Indique client_id o place_id, no ambos"
+        )
 
-    try:
-        # Query recent reviews
-        cursor = collection.find({}).sort("retrieval_date", -1).limit(limit)
-        reviews_data = list(cursor)
+    review_fields = _requested_fields(fields)
 
-        # Convert to ReviewResponse models
-        reviews = [ReviewResponse(**review) for review in reviews_data]
+    def build():
+        if settings.recent_reviews_cache_enabled and redis_enabled():
+            # Hot cache in Redis (see recent_reviews)
+            reviews = recent_reviews.get_recent_reviews(limit, client_id=client_id, place_id=place_id)
+        else:
+            reviews = get_review_repository().find(
+                ReviewFilter(place_id=place_id, client_id=client_id),
+                "retrieval_date", -1, review_fields, limit=limit
+            )
+        payload = reviews_payload(reviews, review_fields, compact)
 
-        logger.info(f"Retrieved {len(reviews)} recent reviews")
+        logger.info(f"Retrieved {len(payload['reviews'])} recent reviews")
 
         return {
-            "count": len(reviews),
-            "reviews": reviews
+            "count": len(payload["reviews"]),
+            **payload
         }
 
+    try:
+        # Served from the response cache until reviews change
+        return cached_response(request, "recent_reviews", {
+            "limit": limit,
+            "client_id": client_id,
+            "place_id": place_id,
+            "fields": review_fields,
+            "compact": compact
+        }, build)
+
     except Exception as e:
         logger.error(f"Error getting recent reviews: {e}")
         raise HTTPException(
@@ -191,17 +444,25 @@ async def delete_review(review_id: str):
 
     ADVERTENCIA: Esta operación es irreversible.
     """
-    collection = get_reviews_collection()
-
     try:
-        result = collection.delete_one({"id_review": review_id})
+        deleted = get_review_repository().delete(review_id)
 
-        if result.deleted_count == 0:
+        if deleted is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Reseña con id_review={review_id} no encontrada"
             )
 
+        if mongodb_storage():
+            apply_deleted_review(deleted)
+            remove_review_from_rollups(deleted)
+        if redis_enabled():
+            try:
+                recent_reviews.remove_recent_review(deleted)
+            except Exception as e:
+                logger.warning(f"Could not remove review {review_id} from the recent reviews cache: {e}")
+        bump_reviews_version()
+
         logger.info(f"Deleted review {review_id}")
 
         return None
@@ -1,10 +1,15 @@
 """
 API endpoints for scraping operations.
 Handles asynchronous scraping jobs using RQ (Redis Queue).
+Jobs started through the API go to the interactive (highest priority) queue;
+batches of URLs go to the backfill queue. In local execution mode jobs run
+inside the API process instead (see app.services.local_jobs).
 """
-from fastapi import APIRouter, HTTPException, status
-from rq import Queue
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse
+from rq.exceptions import NoSuchJobError
 from rq.job import Job
+from typing import Optional
 import logging
 
 from app.models import (
@@ -12,30 +17,33 @@ from app.models import (
     ScrapingJobResponse,
     ScrapingStatusResponse,
     ScrapingResultResponse,
-    ReviewResponse,
+    BatchScrapingRequest,
+    BatchScrapingResponse,
+    BatchStatusResponse,
+    ClientQuotaResponse,
     JobStatus
 )
 from app.database import get_redis_client
 from app.config import settings
+from app.queues import QueueTier, get_queue, get_all_queues, get_tier_stats
 from app.tasks.scraper_task import scrape_reviews_task
+from app.services import job_coalescing, scrape_cache, response_cache, batch_jobs, admission, local_jobs
+from app.services.job_serializer import get_job_serializer
+from app.services.metrics import get_counters, hit_ratio
+from app.services.review_serialization import reviews_to_dicts
+from app.tasks import watchdog, retry_policy
 
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def get_queue() -> Queue:
-    """Get RQ queue instance."""
-    redis_conn = get_redis_client()
-    return Queue(settings.redis_queue_name, connection=redis_conn)
-
-
 # ============================================================================
 # START SCRAPING
 # ============================================================================
 
 @router.post("/start", response_model=ScrapingJobResponse, status_code=status.HTTP_202_ACCEPTED)
-async def start_scraping(request: ScrapingRequest):
+async def start_scraping(request: ScrapingRequest, http_request: Request):
     """
     Iniciar un trabajo de scraping asíncrono.
 
@@ -45,31 +53,108 @@ async def start_scraping(request: ScrapingRequest):
     - **url**: URL de Google Maps
     - **max_reviews**: Número máximo de reseñas (1-1000)
     - **sort_by**: Criterio de ordenamiento (newest, most_relevant, highest_rating, lowest_rating)
+    - **max_age**: Opcional. Si existe un scraping del mismo lugar y orden con menos
+      de `max_age` segundos, se devuelve un trabajo ya finalizado con esas reseñas
+      sin lanzar el navegador
+
+    Si ya existe un trabajo idéntico (misma URL y orden) en cola o en ejecución,
+    la solicitud se adjunta a ese trabajo en lugar de crear uno nuevo. Si se piden
+    más reseñas que las del trabajo en curso, su objetivo se amplía.
+
+    Un trabajo nuevo se rechaza con **429** y cabecera `Retry-After` si la cola
+    interactiva está llena, si su espera estimada supera `ADMISSION_MAX_WAIT` o si
+    el cliente (la IP de origen) ya tiene `ADMISSION_CLIENT_MAX_INFLIGHT` trabajos
+    en curso.
 
     Retorna:
     - **job_id**: ID del trabajo para consultar status/result
     - **status**: Estado inicial (queued)
+    - **coalesced**: true si se reutilizó un trabajo en curso
+    - **cached**: true si el resultado proviene de un scraping reciente
+    - **queue_position**, **estimated_wait_seconds**, **estimated_start_at**:
+      Posición en la cola y comienzo estimado (solo trabajos nuevos)
     """
     try:
-        # Get RQ queue
-        queue = get_queue()
-
-        # Enqueue scraping task
-        job = queue.enqueue(
-            scrape_reviews_task,
-            url=request.url,
-            max_reviews=request.max_reviews,
-            sort_by=request.sort_by.value,
-            job_timeout=settings.scraping_timeout,
-            result_ttl=3600  # Keep result for 1 hour
-        )
+        if local_jobs.local_mode():
+            return _start_local(request)
+
+        # Get RQ queue (user requests are interactive)
+        queue = get_queue(QueueTier.INTERACTIVE)
+
+        # Serve from a recent scrape of the same place if the caller allows it
+        if request.max_age is not None:
+            cached_job = scrape_cache.serve_from_cache(
+                queue,
+                url=request.url,
+                max_reviews=request.max_reviews,
+                sort_by=request.sort_by.value,
+                max_age=request.max_age
+            )
+            if cached_job is not None:
+                return ScrapingJobResponse(
+                    job_id=cached_job.id,
+                    status=JobStatus.FINISHED,
+                    message="Served from a recent scrape. Use /api/scraping/result/{job_id} to get the reviews.",
+                    cached=True
+                )
+
+        client_id = _client_id(http_request)
+        estimate = {}
+
+        def enqueue(job_id: Optional[str] = None, coalesce_key: Optional[str] = None) -> Job:
+            # Only new jobs add work: reject them if the backlog is too long
+            with admission.admit(queue, get_all_queues(queue.connection), client_id) as admitted:
+                estimate.update(admitted)
+
+                # Enqueue scraping task
+                job = queue.enqueue(
+                    scrape_reviews_task,
+                    url=request.url,
+                    max_reviews=request.max_reviews,
+                    sort_by=request.sort_by.value,
+                    job_id=job_id,
+                    meta={'coalesce_key': coalesce_key} if coalesce_key else None,
+                    job_timeout=settings.scraping_max_runtime,  # the watchdog aborts stalled jobs earlier
+                    result_ttl=settings.job_result_ttl
+                )
+                admission.track_client_job(queue.connection, client_id, job.id)
+            return job
+
+        if settings.job_coalescing_enabled:
+            job, coalesced = job_coalescing.enqueue_or_attach(
+                queue.connection,
+                url=request.url,
+                max_reviews=request.max_reviews,
+                sort_by=request.sort_by.value,
+                enqueue=enqueue
+            )
+        else:
+            job, coalesced = enqueue(), False
+
+        if coalesced:
+            logger.info(f"Attached request for URL {request.url} to in-flight job {job.id}")
+            return ScrapingJobResponse(
+                job_id=job.id,
+                status=JobStatus.STARTED if job.is_started else JobStatus.QUEUED,
+                message="An identical scraping job is already in progress. Use /api/scraping/status/{job_id} to check progress.",
+                coalesced=True
+            )
 
         logger.info(f"Enqueued scraping job {job.id} for URL: {request.url}")
 
         return ScrapingJobResponse(
             job_id=job.id,
             status=JobStatus.QUEUED,
-            message="Scraping job queued successfully. Use /api/scraping/status/{job_id} to check progress."
+            message="Scraping job queued successfully. Use /api/scraping/status/{job_id} to check progress.",
+            **estimate
+        )
+
+    except admission.AdmissionRejected as e:
+        logger.warning(f"Rejected scraping job for URL {request.url}: {e.reason}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"{e.reason}. Retry after {e.retry_after}s.",
+            headers={"Retry-After": str(e.retry_after)}
         )
 
     except Exception as e:
@@ -80,6 +165,213 @@ async def start_scraping(request: ScrapingRequest):
         )
 
 
+def _start_local(request: ScrapingRequest) -> ScrapingJobResponse:
+    """start_scraping in local execution mode (no per-client quotas)."""
+    registry = local_jobs.get_registry()
+
+    if request.max_age is not None:
+        try:
+            reviews = scrape_cache.find_fresh_reviews(
+                request.url, request.sort_by.value, request.max_reviews, request.max_age
+            )
+        except Exception as e:
+            logger.warning(f"Scrape cache lookup failed for {request.url}: {e}")
+            reviews = None
+
+        if reviews is not None:
+            job = registry.add_finished(request.url, request.max_reviews, request.sort_by.value, reviews)
+            return ScrapingJobResponse(
+                job_id=job.id,
+                status=JobStatus.FINISHED,
+                message="Served from a recent scrape. Use /api/scraping/result/{job_id} to get the reviews.",
+                cached=True
+            )
+
+    job, coalesced, estimate = registry.submit(request.url, request.max_reviews, request.sort_by.value)
+
+    if coalesced:
+        logger.info(f"Attached request for URL {request.url} to in-flight local job {job.id}")
+        return ScrapingJobResponse(
+            job_id=job.id,
+            status=JobStatus.STARTED if job.is_started else JobStatus.QUEUED,
+            message="An identical scraping job is already in progress. Use /api/scraping/status/{job_id} to check progress.",
+            coalesced=True
+        )
+
+    logger.info(f"Scheduled local scraping job {job.id} for URL: {request.url}")
+    return ScrapingJobResponse(
+        job_id=job.id,
+        status=JobStatus.QUEUED,
+        message="Scraping job queued successfully. Use /api/scraping/status/{job_id} to check progress.",
+        **estimate
+    )
+
+
+def _fetch_job(job_id: str):
+    """RQ job, or the in-process job in local execution mode."""
+    if local_jobs.local_mode():
+        job = local_jobs.get_registry().get(job_id)
+        if job is None:
+            raise NoSuchJobError(f"No such job: {job_id}")
+        return job
+    return Job.fetch(job_id, connection=get_redis_client(), serializer=get_job_serializer())
+
+
+def _client_id(http_request: Request) -> str:
+    """
+    Client a job counts against: the caller's address.
+
+    Not taken from the request body, which any caller could change to get a
+    fresh quota. Behind a reverse proxy, run uvicorn with --proxy-headers so
+    this is the original address.
+    """
+    return f"ip:{http_request.client.host if http_request.client else 'unknown'}"
+
+
+# ============================================================================
+# ADMISSION
+# ============================================================================
+
+@router.get("/quota", response_model=ClientQuotaResponse)
+async def get_client_quota(http_request: Request):
+    """
+    Consultar la cuota del cliente (la IP de origen) y el comienzo estimado de un
+    trabajo nuevo.
+
+    Retorna:
+    - **inflight_jobs**: Trabajos del cliente en cola o en ejecución
+    - **max_inflight_jobs**: Límite por cliente (null = sin límite)
+    - **remaining**: Trabajos que aún puede encolar
+    - **batch_inflight_jobs**, **max_batch_inflight_jobs**, **batch_remaining**:
+      Lo mismo para los trabajos de lotes (/batch), que tienen su propia cuota
+    - **queue_position**, **estimated_wait_seconds**, **estimated_start_at**:
+      Posición y comienzo estimado de un trabajo encolado ahora
+    """
+    try:
+        client_id = _client_id(http_request)
+
+        if local_jobs.local_mode():
+            # No per-client quotas in local mode
+            return ClientQuotaResponse(
+                client_id=client_id,
+                inflight_jobs=0,
+                **admission.estimate(local_jobs.get_registry().capacity_snapshot())
+            )
+
+        queue = get_queue(QueueTier.INTERACTIVE)
+        snapshot = admission.capacity_snapshot(queue, get_all_queues(queue.connection))
+
+        return ClientQuotaResponse(
+            **admission.get_client_quota(queue.connection, client_id),
+            **admission.estimate(snapshot)
+        )
+
+    except Exception as e:
+        logger.error(f"Error getting client quota: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get client quota: {str(e)}"
+        )
+
+
+# ============================================================================
+# BATCH
+# ============================================================================
+
+@router.post("/batch", response_model=BatchScrapingResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_scraping_batch(request: BatchScrapingRequest, http_request: Request):
+    """
+    Iniciar un lote de trabajos de scraping (uno por URL) con una sola solicitud.
+
+    Todos los trabajos se encolan en la cola de backfill en un único pipeline de
+    Redis. Las URLs del mismo lugar comparten un trabajo, y las URLs con un trabajo
+    idéntico en cola o en ejecución se adjuntan a él.
+
+    - **urls**: URLs de Google Maps (máximo `BATCH_MAX_URLS`)
+    - **max_reviews**: Número máximo de reseñas por URL (1-1000)
+    - **sort_by**: Criterio de ordenamiento
+
+    Los trabajos nuevos del lote pasan el mismo control de admisión que
+    /start: el lote se rechaza entero con **429** si no caben en la cola o en
+    la cuota del cliente.
+
+    Retorna:
+    - **batch_id**: ID del lote para consultar /api/scraping/batch/{batch_id}
+    - **jobs**: job_id de cada URL (consultables también con status/result)
+    """
+    try:
+        if local_jobs.local_mode():
+            batch = local_jobs.get_registry().submit_batch(
+                request.urls, request.max_reviews, request.sort_by.value
+            )
+        else:
+            queue = get_queue(QueueTier.BACKFILL)
+            batch = batch_jobs.submit_batch(
+                queue,
+                urls=request.urls,
+                max_reviews=request.max_reviews,
+                sort_by=request.sort_by.value,
+                started_queues=get_all_queues(queue.connection),
+                client_id=_client_id(http_request)
+            )
+    except admission.AdmissionRejected as e:
+        logger.warning(f"Rejected scraping batch of {len(request.urls)} URLs: {e.reason}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"{e.reason}. Retry after {e.retry_after}s.",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        logger.error(f"Error enqueueing scraping batch: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to start scraping batch: {str(e)}"
+        )
+
+    total_jobs = len({entry["job_id"] for entry in batch["jobs"]})
+    return BatchScrapingResponse(
+        batch_id=batch["batch_id"],
+        total_urls=len(batch["jobs"]),
+        total_jobs=total_jobs,
+        message="Batch queued successfully. Use /api/scraping/batch/{batch_id} to check progress.",
+        jobs=batch["jobs"]
+    )
+
+
+@router.get("/batch/{batch_id}", response_model=BatchStatusResponse)
+async def get_scraping_batch_status(batch_id: str):
+    """
+    Obtener el estado agregado y el de cada trabajo de un lote.
+
+    Los trabajos se leen de Redis en un único round trip, sea cual sea el tamaño
+    del lote.
+
+    Retorna:
+    - **counts**: Número de trabajos por estado (queued, started, finished, failed, expired)
+    - **done**: true cuando todos los trabajos han terminado
+    - **jobs**: Estado, progreso y error de cada URL
+    """
+    try:
+        if local_jobs.local_mode():
+            batch = local_jobs.get_registry().get_batch_status(batch_id)
+        else:
+            batch = batch_jobs.get_batch_status(get_redis_client(), batch_id)
+    except Exception as e:
+        logger.error(f"Error getting batch status: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get batch status: {str(e)}"
+        )
+
+    if batch is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Batch {batch_id} not found or expired"
+        )
+
+    return BatchStatusResponse(**batch)
+
+
 # ============================================================================
 # CHECK STATUS
 # ============================================================================
@@ -98,9 +390,7 @@ async def get_scraping_status(job_id: str):
     - **failed**: Falló con error
     """
     try:
-        # Get job from Redis
-        redis_conn = get_redis_client()
-        job = Job.fetch(job_id, connection=redis_conn)
+        job = _fetch_job(job_id)
 
         # Determine status
         if job.is_queued:
@@ -154,9 +444,7 @@ async def get_scraping_result(job_id: str):
     Los resultados se mantienen por 1 hora después de completarse.
     """
     try:
-        # Get job from Redis
-        redis_conn = get_redis_client()
-        job = Job.fetch(job_id, connection=redis_conn)
+        job = _fetch_job(job_id)
 
         # Check if job is finished
         if not job.is_finished and not job.is_failed:
@@ -181,16 +469,14 @@ async def get_scraping_result(job_id: str):
         reviews_count = result.get('reviews_count', 0)
         reviews_data = result.get('reviews', [])
 
-        # Convert to ReviewResponse models
-        reviews = [ReviewResponse(**review) for review in reviews_data]
-
-        return ScrapingResultResponse(
-            job_id=job_id,
-            status=JobStatus.FINISHED,
-            reviews_count=reviews_count,
-            reviews=reviews,
-            error=None
-        )
+        # Job results are trusted documents: serialized directly (see review_serialization)
+        return ORJSONResponse({
+            "job_id": job_id,
+            "status": JobStatus.FINISHED.value,
+            "reviews_count": reviews_count,
+            "reviews": reviews_to_dicts(reviews_data),
+            "error": None
+        })
 
     except HTTPException:
         raise
@@ -217,9 +503,7 @@ async def cancel_scraping_job(job_id: str):
     Los trabajos en ejecución no se pueden cancelar.
     """
     try:
-        # Get job from Redis
-        redis_conn = get_redis_client()
-        job = Job.fetch(job_id, connection=redis_conn)
+        job = _fetch_job(job_id)
 
         # Check if job can be cancelled
         if job.is_started or job.is_finished:
@@ -254,10 +538,17 @@ async def get_workers_status():
     Obtener información sobre los workers activos.
 
     Útil para debugging y monitoreo del sistema.
+
+    - **tiers**: Por cada nivel de prioridad (interactive, monitoring, backfill),
+      profundidad de la cola, espera del trabajo más antiguo y espera media
     """
     try:
+        if local_jobs.local_mode():
+            return local_jobs.get_registry().workers_status()
+
         redis_conn = get_redis_client()
-        queue = Queue(settings.redis_queue_name, connection=redis_conn)
+        queue = get_queue(QueueTier.INTERACTIVE, redis_conn)
+        all_queues = get_all_queues(redis_conn)
 
         # Get workers
         from rq import Worker
@@ -278,10 +569,11 @@ async def get_workers_status():
             "total_workers": len(workers),
             "workers": workers_info,
             "queue_name": queue.name,
-            "queued_jobs": queue.count,
-            "started_jobs": len(queue.started_job_registry),
-            "finished_jobs": len(queue.finished_job_registry),
-            "failed_jobs": len(queue.failed_job_registry)
+            "queued_jobs": sum(q.count for q in all_queues),
+            "started_jobs": sum(len(q.started_job_registry) for q in all_queues),
+            "finished_jobs": sum(len(q.finished_job_registry) for q in all_queues),
+            "failed_jobs": sum(len(q.failed_job_registry) for q in all_queues),
+            "tiers": get_tier_stats(redis_conn)
         }
 
     except Exception as e:
@@ -290,3 +582,103 @@ async def get_workers_status():
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get workers status: {str(e)}"
         )
+
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+@router.get("/metrics")
+async def get_scraping_metrics():
+    """
+    Obtener métricas del sistema de scraping.
+
+    - **coalescing**: Solicitudes adjuntadas a un trabajo idéntico en curso (hits)
+      frente a trabajos nuevos encolados (misses)
+    - **scrape_cache**: Solicitudes con `max_age` servidas desde un scraping
+      reciente (hits) frente a las que requirieron un scraping nuevo (misses)
+    - **watchdog**: Trabajos abortados por no avanzar (stall_aborts) y trabajos
+      que superaron el timeout base porque seguían extrayendo reseñas
+    - **retries**: Por clase de fallo, fallos, reintentos programados, trabajos
+      recuperados tras reintentar y trabajos enviados a la cola de fallidos
+    - **response_cache**: Lecturas de reseñas servidas desde la caché de
+      respuestas (hits) frente a consultas a MongoDB (misses), y respuestas
+      304 por ETag vigente (not_modified)
+    - **admission**: Trabajos nuevos admitidos y rechazados con 429 por cola
+      demasiado larga (rejected_backlog) o por cuota de cliente (rejected_quota),
+      y capacidad actual (cola, workers, duración media de los trabajos)
+    """
+    try:
+        if local_jobs.local_mode():
+            # Counters live in Redis; only the local pool's capacity is known
+            return {"execution_mode": "local", "capacity": local_jobs.get_registry().capacity_snapshot()}
+
+        coalescing = get_counters(job_coalescing.METRICS_GROUP)
+        cached = get_counters(response_cache.METRICS_GROUP)
+        queue = get_queue(QueueTier.INTERACTIVE)
+
+        return {
+            "coalescing": {
+                **hit_ratio(coalescing),
+                "extended": coalescing.get("extended", 0)
+            },
+            "scrape_cache": hit_ratio(get_counters(scrape_cache.METRICS_GROUP)),
+            "watchdog": {
+                "jobs": 0,
+                "stall_aborts": 0,
+                "extended_past_base": 0,
+                **get_counters(watchdog.METRICS_GROUP)
+            },
+            "retries": retry_policy.summarize_retry_metrics(get_counters(retry_policy.METRICS_GROUP)),
+            "response_cache": {
+                **hit_ratio(cached),
+                "not_modified": cached.get("not_modified", 0)
+            },
+            "admission": {
+                "admitted": 0,
+                "rejected_backlog": 0,
+                "rejected_quota": 0,
+                **get_counters(admission.METRICS_GROUP),
+                **admission.capacity_snapshot(queue, get_all_queues(queue.connection))
+            }
+        }
+
+    except Exception as e:
+        logger.error(f"Error getting scraping metrics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get scraping metrics: {str(e)}"
+        )
+
+
+# ============================================================================
+# DEAD LETTER
+# ============================================================================
+
+@router.get("/dead-letter")
+async def get_dead_letter_jobs(
+    limit: int = Query(100, ge=1, le=1000, description="Número máximo de trabajos")
+):
+    """
+    Listar los trabajos que fallaron definitivamente.
+
+    Incluye los fallos no recuperables (p. ej. URL que no es un lugar) y los
+    trabajos que agotaron sus reintentos, del más reciente al más antiguo.
+
+    - **limit**: Número máximo de trabajos a retornar
+    """
+    try:
+        redis_conn = get_redis_client()
+        jobs = retry_policy.list_dead_letters(redis_conn, limit=limit)
+
+        return {
+            "total": len(jobs),
+            "jobs": jobs
+        }
+
+    except Exception as e:
+        logger.error(f"Error getting dead-letter jobs: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get dead-letter jobs: {str(e)}"
+        )
@@ -2,8 +2,9 @@
 Configuration settings for the Google Maps Reviews Scraper API.
 Uses Pydantic Settings for environment variable management.
 """
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 from functools import lru_cache
 
 
@@ -23,25 +24,137 @@ class Settings(BaseSettings):
     mongodb_url: str = "mongodb://localhost:27017/"
     mongodb_db: str = "googlemaps"
     mongodb_reviews_collection: str = "reviews"
+    mongodb_places_collection: str = "places"
+    mongodb_scrapes_collection: str = "scrapes"
+    mongodb_place_stats_collection: str = "place_stats"
+    mongodb_review_rollups_collection: str = "review_rollups"
+    index_drop_undeclared: bool = False  # on startup, drop auto-named indexes no query shape derives (see index_registry)
+
+    # Review storage
+    review_storage: Literal["mongodb", "sqlite"] = "mongodb"  # sqlite: embedded, see review_repository
+    review_storage_sqlite_path: str = "data/reviews.sqlite3"
 
     # Redis
     redis_url: str = "redis://localhost:6379/0"
     redis_queue_name: str = "scraping_tasks"
+    job_result_ttl: int = 3600  # seconds to keep finished job results
+    job_coalescing_enabled: bool = True  # attach identical requests to in-flight jobs
+    queue_starvation_seconds: int = 300  # lower-priority jobs waiting longer are served first
+    batch_max_urls: int = 500  # URLs accepted by one POST /api/scraping/batch
+    batch_ttl: int = 86400  # seconds to keep batch records (job results follow job_result_ttl)
+
+    # Admission control (interactive queue)
+    admission_enabled: bool = True  # reject new jobs with 429 when the backlog is too long
+    admission_max_queue_depth: int = 200  # jobs waiting in the queue a single job goes to
+    admission_max_wait: int = 1800  # seconds a new job may wait before starting (estimated)
+    admission_client_max_inflight: int = 20  # queued or running jobs per client IP (0 = unlimited)
+    admission_batch_max_queue_depth: int = 2000  # jobs waiting in the backfill queue before batches get 429
+    admission_client_max_batch_inflight: int = 1000  # queued or running batch jobs per client IP (0 = unlimited)
+    admission_default_job_seconds: int = 120  # assumed job duration until durations are measured
+    admission_duration_samples: int = 100  # recent job durations averaged for estimates
+
+    # Execution mode
+    execution_mode: str = "queue"  # queue (RQ workers + Redis) | local (jobs run inside the API process)
+    local_workers: int = 1  # local mode: scraping threads, each with its own browser
+    local_max_queued: int = 50  # local mode: waiting jobs before new ones get 429
 
     # Scraping Configuration
     default_reviews_count: int = 100
     scraping_timeout: int = 900  # seconds (increased from 300 to handle large scraping jobs)
+    scraping_stall_timeout: int = 300  # abort a job after this many seconds without new reviews
+    scraping_max_runtime: int = 3600  # hard ceiling for jobs still producing reviews past scraping_timeout
     headless_mode: bool = True
     chrome_driver_path: Optional[str] = None  # None = auto-detect
+    retry_enabled: bool = True  # retry transient failures with backoff (see app/tasks/retry_policy.py)
+    worker_warm_browser: bool = True  # keep the browser open between jobs (non-forking worker)
+    browser_max_jobs: int = 50  # relaunch a warm browser after this many jobs
+    job_serializer: str = "compact"  # "compact" (JSON + zlib) or "pickle" (RQ default)
+    job_serializer_compress_min_bytes: int = 1024  # smaller payloads are stored as plain JSON
+    job_serializer_compress_level: int = 6  # zlib level (1 fastest, 9 smallest)
+    job_meta_flush_interval: float = 2.0  # seconds between progress writes to job meta
+
+    # Monitoring
+    default_check_interval: int = 60  # minutes; fixed interval when adaptive polling is off
+    adaptive_polling_enabled: bool = True  # derive each place's interval from its review rate
+    polling_target_probability: float = 0.5  # chance of finding new reviews at the next check
+    polling_min_interval: int = 15  # minutes
+    polling_max_interval: int = 1440  # minutes
+    polling_half_life_days: float = 30  # decay of the review history used to estimate the rate
+    polling_lookback_days: int = 180  # review history considered
+    enable_monitoring_on_startup: bool = True  # run the monitoring scheduler in the API process
+    monitor_jitter_ratio: float = 0.1  # +/- fraction of the interval added to each next check
+    monitor_tick_seconds: int = 30  # how often the scheduler looks for due places
+    monitor_batch_size: int = 10  # maximum places enqueued per tick
+    monitor_max_queued: int = 50  # skip a tick while this many monitoring jobs are waiting
+
+    # New-review event stream
+    review_events_source: str = "outbox"  # outbox (published on save) | change_stream (event_relay.py)
+    events_stream_maxlen: int = 100000  # approximate number of events kept in the stream
+    events_claim_idle_ms: int = 60000  # re-deliver events left unacknowledged this long
+    events_relay_batch_size: int = 100  # inserts published per change stream batch
+
+    # Webhooks
+    webhook_timeout: float = 10  # seconds per request
+    webhook_max_retries: int = 3
+    webhook_retry_delay: float = 5  # seconds before the first retry, doubled on each retry
+    webhook_concurrency: int = 20  # requests in flight
+    webhook_batching_enabled: bool = False  # opt-in: one "new_reviews_batch" request per webhook URL per batch
+    webhook_batch_max_events: int = 100  # events taken from the queue per batch
+    webhook_batch_window: float = 1.0  # seconds to wait for more events when the queue is short
+
+    # Worker supervisor (SERVICE_TYPE=supervisor)
+    worker_browser_memory_mb: int = 700  # memory budget per worker + Chromium
+    worker_max_rss_mb: int = 1500  # recycle a worker whose process tree exceeds this
+    supervisor_max_workers: int = 0  # 0 = derive from memory and CPU
+    supervisor_reserved_memory_mb: int = 512  # memory kept free for the OS/other processes
+    supervisor_check_interval: int = 10  # seconds between health checks
+    supervisor_drain_timeout: int = 900  # seconds to wait for running jobs on shutdown
 
     # Pagination
     default_page_size: int = 100
     max_page_size: int = 500
 
+    # Response cache (reviews read endpoints)
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 1000  # responses kept in each API process
+    response_cache_redis: bool = False  # also share cached responses between API processes through Redis
+    response_cache_ttl: int = 300  # seconds a response is kept in Redis
+
+    # Recent reviews hot cache (GET /api/reviews/recent/all)
+    recent_reviews_cache_enabled: bool = True
+    recent_reviews_cache_size: int = 500  # newest reviews kept per scope (all, client, place)
+    recent_reviews_scope_ttl: int = 86400  # seconds a client/place sorted set lives after its last read
+
+    # Export (GET /api/reviews/export)
+    export_batch_size: int = 1000  # reviews per cursor batch / streamed chunk
+    export_parquet_row_group_size: int = 10000  # rows per Parquet row group
+
+    # Health checks
+    health_probe_interval: float = 5.0  # seconds between background MongoDB/Redis pings (/health serves the last result)
+    health_probe_samples: int = 120  # ping latencies kept per service for percentiles
+    health_probe_timeout: float = 2.0  # seconds a ping may take (capped at half of health_probe_interval)
+
     # Logging
     log_level: str = "INFO"
     log_file: str = "api.log"
 
+    @model_validator(mode="after")
+    def check_review_storage(self):
+        """Reject features that only work with reviews stored in MongoDB."""
+        # The relay tails a change stream of the MongoDB reviews collection
+        if self.review_storage == "sqlite" and self.review_events_source == "change_stream":
+            raise ValueError("REVIEW_EVENTS_SOURCE=change_stream requires REVIEW_STORAGE=mongodb")
+        return self
+
+    @model_validator(mode="after")
+    def check_batch_allowance(self):
+        """A batch of BATCH_MAX_URLS new jobs must be admissible by an idle client on an empty queue."""
+        for name, unlimited in (("admission_batch_max_queue_depth", False), ("admission_client_max_batch_inflight", True)):
+            limit = getattr(self, name)
+            if limit < self.batch_max_urls and not (unlimited and limit == 0):
+                raise ValueError(f"{name.upper()} ({limit}) must be at least BATCH_MAX_URLS ({self.batch_max_urls})")
+        return self
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
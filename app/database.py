@@ -1,7 +1,7 @@
 """
 Database connections and initialization for MongoDB and Redis.
 """
-from pymongo import MongoClient, ASCENDING, DESCENDING
+from pymongo import MongoClient
 from pymongo.database import Database
 from pymongo.collection import Collection
 from redis import Redis
@@ -18,6 +18,17 @@ _mongodb_client: Optional[MongoClient] = None
 _redis_client: Optional[Redis] = None
 
 
+def redis_enabled() -> bool:
+    """
+    Whether this process uses Redis.
+
+    Local execution mode (EXECUTION_MODE=local) runs without it: metrics are
+    not recorded, the recent-review cache and review events are off and the
+    response cache keeps its version in process.
+    """
+    return settings.execution_mode != "local"
+
+
 def get_mongodb_client() -> MongoClient:
     """Get or create MongoDB client instance."""
     global _mongodb_client
@@ -45,6 +56,12 @@ def get_reviews_collection() -> Collection:
     return db[settings.mongodb_reviews_collection]
 
 
+def get_scrapes_collection() -> Collection:
+    """Get scrapes collection (last completed scrape per place and sort order)."""
+    db = get_database()
+    return db[settings.mongodb_scrapes_collection]
+
+
 def get_redis_client() -> Redis:
     """
     Get or create Redis client instance.
@@ -69,38 +86,18 @@ def initialize_database():
     logger.info("Initializing database...")
 
     try:
-        # Get collections
-        places_collection = get_places_collection()
-        reviews_collection = get_reviews_collection()
-
-        # Create indexes for places collection
-        logger.info("Creating indexes for places collection...")
-        places_collection.create_index("place_id", unique=True)
-        places_collection.create_index("client_id")
-        places_collection.create_index("branch_id")
-        places_collection.create_index([("client_id", ASCENDING), ("branch_id", ASCENDING)])
-        places_collection.create_index("monitoring_enabled")
-        places_collection.create_index("last_check")
-        places_collection.create_index([("created_at", DESCENDING)])
-
-        # Create indexes for reviews collection
-        logger.info("Creating indexes for reviews collection...")
-        reviews_collection.create_index("id_review", unique=True)
-        reviews_collection.create_index("place_id")
-        reviews_collection.create_index("client_id")
-        reviews_collection.create_index("branch_id")
-        reviews_collection.create_index([("client_id", ASCENDING), ("branch_id", ASCENDING)])
-        reviews_collection.create_index([("place_id", ASCENDING), ("review_date", DESCENDING)])
-        reviews_collection.create_index([("review_date", DESCENDING)])
-        reviews_collection.create_index([("retrieval_date", DESCENDING)])
-        reviews_collection.create_index("rating")
-        reviews_collection.create_index("notified_via_webhook")
-
-        # Compound index for pagination queries
-        reviews_collection.create_index([
-            ("place_id", ASCENDING),
-            ("retrieval_date", DESCENDING)
-        ])
+        # Reviews go to the configured review storage (see review_repository)
+        from app.services.review_repository import get_review_repository
+        logger.info(f"Creating indexes for reviews ({settings.review_storage})...")
+        get_review_repository().ensure_indexes()
+
+        # Other collections: indexes derived from their query shapes (see index_registry).
+        # With SQLite storage MongoDB is only used by monitoring, so without it the
+        # API starts without touching a mongod
+        if settings.review_storage == "mongodb" or settings.enable_monitoring_on_startup:
+            from app.services.index_registry import sync_all
+            logger.info("Creating indexes for places, scrapes, place_stats and review_rollups...")
+            sync_all(get_database(), skip=("reviews",))
 
         logger.info("Database initialization completed successfully")
 
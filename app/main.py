@@ -1,14 +1,15 @@
 """
 Main FastAPI application for Google Maps Reviews Scraper API.
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
 
 from app.config import settings
-from app.database import initialize_database, close_connections, test_connections
+from app.database import initialize_database, close_connections
 from app.models import HealthCheckResponse
+from app.services import monitor_scheduler, health_prober, local_jobs
 
 
 # Configure logging
@@ -36,14 +37,26 @@ async def lifespan(app: FastAPI):
         # Initialize database connections and indexes
         initialize_database()
 
-        # Test connections
-        status = test_connections()
-        if not status["mongodb"] or not status["redis"]:
+        # Test connections (also seeds the cached /health result)
+        status = health_prober.probe()
+        if status["status"] != "healthy":
             logger.warning(f"Connection test failed: {status['error']}")
             logger.warning("API will start anyway. Connections will be retried automatically.")
         else:
             logger.info("All database connections successful")
 
+        health_prober.start_prober()
+
+        if local_jobs.local_mode():
+            logger.info(f"Local execution mode: scraping jobs run in this process ({settings.local_workers} workers)")
+
+        # Start the monitoring scheduler (its schedule is persisted in MongoDB)
+        if settings.enable_monitoring_on_startup:
+            if local_jobs.local_mode():
+                logger.warning("Monitoring is not available in local execution mode")
+            else:
+                monitor_scheduler.start_scheduler()
+
     except Exception as e:
         logger.error(f"Error during startup: {e}")
         logger.warning("API will start anyway. Some features may not work until connections are established.")
@@ -55,6 +68,10 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down application...")
 
     try:
+        monitor_scheduler.stop_scheduler()
+        health_prober.stop_prober()
+        local_jobs.shutdown_registry()
+
         # Close database connections
         close_connections()
 
@@ -102,16 +119,19 @@ async def root():
 async def health_check():
     """
     Health check endpoint.
-    Verifies connectivity to MongoDB and Redis.
+    Returns the MongoDB and Redis status of the last background probe
+    (every `health_probe_interval` seconds) without touching either.
     """
-    status = test_connections()
+    return Response(content=health_prober.cached_body(), media_type="application/json")
 
-    return HealthCheckResponse(
-        status="healthy" if (status["mongodb"] and status["redis"]) else "unhealthy",
-        mongodb=status["mongodb"],
-        redis=status["redis"],
-        error=status.get("error")
-    )
+
+@app.get("/health/deep", response_model=HealthCheckResponse, tags=["Health"])
+def deep_health_check():
+    """
+    Live health check endpoint.
+    Pings MongoDB and Redis now (in a worker thread) and refreshes the cached status.
+    """
+    return HealthCheckResponse(**health_prober.probe())
 
 
 # ============================================================================
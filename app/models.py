@@ -2,10 +2,12 @@
 Pydantic models for request/response validation and MongoDB documents.
 """
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from enum import Enum
 
+from app.config import settings
+
 
 # ============================================================================
 # ENUMS
@@ -27,6 +29,20 @@ class JobStatus(str, Enum):
     FAILED = "failed"
 
 
+class StatsPeriod(str, Enum):
+    """Granularity of review stats series."""
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+
+class ExportFormat(str, Enum):
+    """Output format of the review export."""
+    NDJSON = "ndjson"
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
 # ============================================================================
 # REVIEW MODELS (Reseñas)
 # ============================================================================
@@ -34,6 +50,9 @@ class JobStatus(str, Enum):
 class ReviewInDB(BaseModel):
     """Model representing a review in MongoDB."""
     id_review: str  # Unique review ID from Google Maps
+    place_id: Optional[str] = None  # Canonical place ID (see place_identity)
+    client_id: Optional[str] = None  # Set for reviews of monitored places
+    branch_id: Optional[str] = None
     caption: Optional[str] = None  # Optional - some reviews may not have text
     relative_date: Optional[str] = None  # Optional - may fail to extract
     review_date: datetime
@@ -53,6 +72,7 @@ class ReviewInDB(BaseModel):
 class ReviewResponse(BaseModel):
     """Response model for review."""
     id_review: str
+    place_id: Optional[str] = None
     caption: Optional[str] = None  # Optional - some reviews may not have text
     relative_date: Optional[str] = None  # Optional - may fail to extract
     review_date: datetime
@@ -75,9 +95,31 @@ class PaginatedReviewsResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    next_cursor: Optional[str] = None  # keyset cursor of the next page (None on the last page)
     reviews: List[ReviewResponse]
 
 
+class RatingSummary(BaseModel):
+    """Review count, average rating and rating histogram of a set of reviews."""
+    count: int
+    average_rating: Optional[float] = None
+    rating_histogram: Dict[str, int]  # Stars ("1".."5") -> number of reviews
+
+
+class StatsPeriodSummary(RatingSummary):
+    """RatingSummary of one period of a stats series."""
+    period_start: datetime
+
+
+class ReviewStatsResponse(BaseModel):
+    """Response model for review stats."""
+    place_id: Optional[str] = None
+    client_id: Optional[str] = None
+    period: StatsPeriod
+    totals: RatingSummary
+    series: List[StatsPeriodSummary]
+
+
 # ============================================================================
 # SCRAPING MODELS
 # ============================================================================
@@ -87,6 +129,10 @@ class ScrapingRequest(BaseModel):
     url: str = Field(..., description="URL de Google Maps")
     max_reviews: int = Field(100, ge=1, le=1000, description="Número máximo de reseñas a extraer")
     sort_by: SortBy = Field(SortBy.NEWEST, description="Criterio de ordenamiento")
+    max_age: Optional[int] = Field(
+        None, ge=0,
+        description="Edad máxima (segundos) de un scraping previo reutilizable en lugar de lanzar uno nuevo"
+    )
 
     @validator('url')
     def validate_google_maps_url(cls, v):
@@ -101,6 +147,11 @@ class ScrapingJobResponse(BaseModel):
     job_id: str
     status: JobStatus
     message: str
+    coalesced: bool = False  # True if attached to an identical in-flight job
+    cached: bool = False  # True if served from a recent scrape (see max_age)
+    queue_position: Optional[int] = None  # new jobs only
+    estimated_wait_seconds: Optional[float] = None  # None if no worker is running
+    estimated_start_at: Optional[datetime] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     class Config:
@@ -135,13 +186,107 @@ class ScrapingResultResponse(BaseModel):
     error: Optional[str] = None
 
 
+class ClientQuotaResponse(BaseModel):
+    """Response model for a client's admission quota."""
+    client_id: str
+    inflight_jobs: int
+    max_inflight_jobs: Optional[int] = None  # None = unlimited
+    remaining: Optional[int] = None
+    batch_inflight_jobs: int = 0  # jobs of POST /api/scraping/batch, counted apart
+    max_batch_inflight_jobs: Optional[int] = None  # None = unlimited
+    batch_remaining: Optional[int] = None
+    queue_position: int  # position a new job would take
+    estimated_wait_seconds: Optional[float] = None
+    estimated_start_at: Optional[datetime] = None
+
+    class Config:
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+
+
+class BatchScrapingRequest(BaseModel):
+    """Request model for starting a batch of scraping jobs."""
+    urls: List[str] = Field(..., min_items=1, description="URLs de Google Maps")
+    max_reviews: int = Field(100, ge=1, le=1000, description="Número máximo de reseñas por URL")
+    sort_by: SortBy = Field(SortBy.NEWEST, description="Criterio de ordenamiento")
+
+    @validator('urls')
+    def validate_google_maps_urls(cls, v):
+        """Validate the number of URLs and that every URL is a Google Maps URL."""
+        if len(v) > settings.batch_max_urls:
+            raise ValueError(f'Un lote admite como máximo {settings.batch_max_urls} URLs')
+        for url in v:
+            if not url or 'google.com/maps' not in url.lower():
+                raise ValueError(f'La URL debe ser de Google Maps: {url}')
+        return v
+
+
+class BatchJobEntry(BaseModel):
+    """Job of one URL of a batch."""
+    url: str
+    job_id: str
+    coalesced: bool = False  # True if the URL shares a job with another URL or an in-flight job
+
+
+class BatchScrapingResponse(BaseModel):
+    """Response model for batch creation."""
+    batch_id: str
+    total_urls: int
+    total_jobs: int  # distinct jobs (URLs of the same place share one)
+    message: str
+    jobs: List[BatchJobEntry]
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+
+
+class BatchJobStatus(BatchJobEntry):
+    """Status of the job of one URL of a batch."""
+    status: Optional[JobStatus] = None  # None if the job expired
+    progress: Optional[str] = None
+    error: Optional[str] = None
+    result_available: bool = False
+
+
+class BatchStatusResponse(BaseModel):
+    """Response model for batch status."""
+    batch_id: str
+    created_at: datetime
+    total_urls: int
+    total_jobs: int
+    counts: Dict[str, int]  # distinct jobs per status (plus "expired")
+    done: bool  # True once every job finished, failed or expired
+    jobs: List[BatchJobStatus]
+
+    class Config:
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+
+
 # ============================================================================
 # HEALTH CHECK MODELS
 # ============================================================================
 
+class PingLatency(BaseModel):
+    """Ping latency percentiles of a service (milliseconds)."""
+    last_ms: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    samples: int
+
+
 class HealthCheckResponse(BaseModel):
     """Response model for health check."""
     status: str
     mongodb: bool
     redis: bool
     error: Optional[str] = None
+    checked_at: Optional[datetime] = None
+    stale: bool = False  # True if the background prober stopped refreshing the result
+    latency: Optional[Dict[str, Optional[PingLatency]]] = None
@@ -0,0 +1,168 @@
+"""
+RQ queues organized in priority tiers.
+
+Interactive jobs (user requests through the API) are served before scheduled
+monitoring checks, which are served before backfills. Workers listen on all
+tiers in priority order; to avoid starving lower tiers, a tier whose oldest
+job has waited longer than `queue_starvation_seconds` is served first.
+"""
+import logging
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional, Any
+
+from redis import Redis
+from rq import Queue, Worker, SimpleWorker
+from rq.job import Job
+
+from app.config import settings
+from app.database import get_redis_client
+from app.services.metrics import increment_counter, get_counters
+from app.services.job_serializer import get_job_serializer
+
+
+logger = logging.getLogger(__name__)
+
+
+WAIT_METRICS_GROUP = "queue_wait"
+
+
+class QueueTier(str, Enum):
+    """Priority tiers, highest priority first."""
+    INTERACTIVE = "interactive"
+    MONITORING = "monitoring"
+    BACKFILL = "backfill"
+
+
+# Highest priority first
+TIER_ORDER: List[QueueTier] = [QueueTier.INTERACTIVE, QueueTier.MONITORING, QueueTier.BACKFILL]
+
+
+def queue_name(tier: QueueTier) -> str:
+    """
+    Get the Redis queue name of a tier.
+
+    The interactive tier keeps the historical queue name so jobs enqueued by
+    older deployments are still processed.
+    """
+    if tier == QueueTier.INTERACTIVE:
+        return settings.redis_queue_name
+    return f"{settings.redis_queue_name}_{tier.value}"
+
+
+def tier_for_queue(name: str) -> Optional[QueueTier]:
+    """Get the tier of a queue name (None for unknown queues)."""
+    for tier in TIER_ORDER:
+        if queue_name(tier) == name:
+            return tier
+    return None
+
+
+def get_queue(tier: QueueTier = QueueTier.INTERACTIVE, connection: Optional[Redis] = None) -> Queue:
+    """Get RQ queue instance for a priority tier."""
+    return Queue(queue_name(tier), connection=connection or get_redis_client(), serializer=get_job_serializer())
+
+
+def get_all_queues(connection: Optional[Redis] = None) -> List[Queue]:
+    """Get the queues of all tiers, highest priority first."""
+    return [get_queue(tier, connection) for tier in TIER_ORDER]
+
+
+def oldest_job_wait(queue: Queue) -> float:
+    """
+    Seconds the oldest queued job of a queue has been waiting.
+
+    Returns:
+        Wait time in seconds (0 if the queue is empty)
+    """
+    job_ids = queue.get_job_ids(0, 0)
+    if not job_ids:
+        return 0.0
+
+    try:
+        job = Job.fetch(job_ids[0], connection=queue.connection, serializer=queue.serializer)
+    except Exception:
+        return 0.0
+
+    if job.enqueued_at is None:
+        return 0.0
+    return max((datetime.utcnow() - job.enqueued_at).total_seconds(), 0.0)
+
+
+def get_tier_stats(connection: Optional[Redis] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Get depth and wait time statistics of every tier.
+
+    Returns:
+        Dictionary tier -> {queue_name, queued_jobs, oldest_wait_seconds,
+        dequeued_jobs, avg_wait_seconds}
+    """
+    waits = get_counters(WAIT_METRICS_GROUP)
+    stats = {}
+
+    for tier, queue in zip(TIER_ORDER, get_all_queues(connection)):
+        dequeued = waits.get(f"{tier.value}_jobs", 0)
+        total_wait = waits.get(f"{tier.value}_wait_seconds", 0.0)
+        stats[tier.value] = {
+            "queue_name": queue.name,
+            "queued_jobs": queue.count,
+            "oldest_wait_seconds": round(oldest_job_wait(queue), 3),
+            "dequeued_jobs": dequeued,
+            "avg_wait_seconds": round(total_wait / dequeued, 3) if dequeued else 0.0
+        }
+
+    return stats
+
+
+class PriorityWorker(Worker):
+    """
+    Worker that drains higher tiers first, with starvation protection.
+
+    RQ already checks queues in the order given; after each job this worker
+    moves a lower tier to the front if its oldest job has waited longer than
+    `queue_starvation_seconds`.
+    """
+
+    def reorder_queues(self, reference_queue: Queue):
+        base_order = sorted(self.queues, key=self._priority)
+        starved = None
+        starved_wait = settings.queue_starvation_seconds
+
+        for queue in base_order[1:]:
+            wait = oldest_job_wait(queue)
+            if wait > starved_wait:
+                starved, starved_wait = queue, wait
+
+        if starved is not None:
+            logger.info(f"Queue {starved.name} starved for {starved_wait:.0f}s, serving it first")
+            base_order.remove(starved)
+            base_order.insert(0, starved)
+
+        self._ordered_queues = base_order
+
+    def execute_job(self, job: Job, queue: Queue):
+        tier = tier_for_queue(queue.name)
+        if tier is not None and job.enqueued_at is not None:
+            wait = max((datetime.utcnow() - job.enqueued_at).total_seconds(), 0.0)
+            increment_counter(WAIT_METRICS_GROUP, f"{tier.value}_jobs")
+            increment_counter(WAIT_METRICS_GROUP, f"{tier.value}_wait_seconds", float(wait))
+
+        return super().execute_job(job, queue)
+
+    @staticmethod
+    def _priority(queue: Queue) -> int:
+        tier = tier_for_queue(queue.name)
+        return TIER_ORDER.index(tier) if tier is not None else len(TIER_ORDER)
+
+
+class WarmPriorityWorker(PriorityWorker, SimpleWorker):
+    """
+    PriorityWorker that runs jobs in its own process instead of forking a
+    work horse per job, so the browser kept by app.services.browser_pool
+    stays warm between jobs (including retries).
+    """
+
+
+def get_worker_class() -> type:
+    """Worker class to use according to `worker_warm_browser`."""
+    return WarmPriorityWorker if settings.worker_warm_browser else PriorityWorker
@@ -0,0 +1,206 @@
+"""
+Adaptive per-place polling intervals for monitoring.
+
+Review arrivals of a place are modelled as a Poisson process. Its rate is
+estimated from the stored `review_date` history with exponential decay, so
+recent activity weighs more than old activity:
+
+    rate = (sum(exp(-age_i / tau)) + prior_rate * H) / (tau * (1 - exp(-T / tau)) + H)
+
+where tau = half_life / ln(2) and T is the time the place has been observed:
+since its oldest review in the lookback window or since it was registered,
+whichever is earlier, at most the lookback. The prior adds H = PRIOR_HOURS
+hours observed at `prior_rate` (the rate of the default interval), so a
+place without history is checked at DEFAULT_CHECK_INTERVAL, and once the
+place has been observed for much longer than H the estimate follows its
+reviews (one review per hour over the whole window gives about 1/h).
+
+The next check is placed where the probability of at least one new review
+reaches the target:
+
+    P(new review within t) = 1 - exp(-rate * t) = p  =>  t = -ln(1 - p) / rate
+
+clamped to [polling_min_interval, polling_max_interval]. The next check time
+is jittered by +/- monitor_jitter_ratio so places registered together drift
+apart instead of being checked at the same moment forever.
+"""
+import logging
+import math
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Iterable, Any, Optional
+
+from app.config import settings
+from app.services.review_repository import ReviewFilter, get_review_repository
+
+
+logger = logging.getLogger(__name__)
+
+
+PRIOR_HOURS = 24.0  # weight of the prior rate, in hours of observation
+
+
+def prior_rate_per_hour() -> float:
+    """Rate for which the target probability is reached at the default interval."""
+    return -math.log(1 - settings.polling_target_probability) / (settings.default_check_interval / 60)
+
+
+def _age_hours(date: datetime, now: datetime) -> float:
+    return max((now - date).total_seconds() / 3600, 0.0)
+
+
+def estimate_review_rate(
+    review_dates: Iterable[datetime],
+    now: Optional[datetime] = None,
+    observed_since: Optional[datetime] = None
+) -> float:
+    """
+    Estimate a place's review arrival rate with a decayed Poisson model.
+
+    Args:
+        review_dates: Review dates of the place (older than the lookback are ignored)
+        now: Reference time (default: utcnow)
+        observed_since: When the place started being observed (e.g. registered), if known
+
+    Returns:
+        Estimated reviews per hour
+    """
+    now = now or datetime.utcnow()
+    tau = settings.polling_half_life_days * 24 / math.log(2)
+    lookback = settings.polling_lookback_days * 24
+
+    weighted_count = 0.0
+    observed = _age_hours(observed_since, now) if observed_since else 0.0
+    for review_date in review_dates:
+        age = _age_hours(review_date, now)
+        if age <= lookback:
+            weighted_count += math.exp(-age / tau)
+            observed = max(observed, age)
+
+    exposure = tau * (1 - math.exp(-min(observed, lookback) / tau))
+    return (weighted_count + prior_rate_per_hour() * PRIOR_HOURS) / (exposure + PRIOR_HOURS)
+
+
+def interval_for_rate(rate_per_hour: float) -> int:
+    """
+    Check interval that reaches the target probability of finding new reviews.
+
+    Args:
+        rate_per_hour: Review arrival rate
+
+    Returns:
+        Interval in minutes, within the configured bounds
+    """
+    if rate_per_hour <= 0:
+        return settings.polling_max_interval
+
+    minutes = -math.log(1 - settings.polling_target_probability) / rate_per_hour * 60
+    return int(min(max(minutes, settings.polling_min_interval), settings.polling_max_interval))
+
+
+def jittered_minutes(interval: float) -> float:
+    """Apply the configured +/- jitter ratio to an interval in minutes."""
+    ratio = settings.monitor_jitter_ratio
+    return interval * (1 + random.uniform(-ratio, ratio))
+
+
+def get_place_review_dates(place_id: str, now: Optional[datetime] = None) -> List[datetime]:
+    """
+    Get the review dates of a place within the lookback window.
+
+    Reads the place's reviews newest first (its review_date keyset index)
+    and stops at the first one older than the window.
+    """
+    now = now or datetime.utcnow()
+    since = now - timedelta(days=settings.polling_lookback_days)
+
+    dates = []
+    for doc in get_review_repository().find(ReviewFilter(place_id=place_id), "review_date", fields=("review_date",)):
+        if doc["review_date"] < since:
+            break
+        dates.append(doc["review_date"])
+    return dates
+
+
+def compute_place_schedule(
+    place_id: str,
+    now: Optional[datetime] = None,
+    observed_since: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Compute the polling schedule of a place from its review history.
+
+    Args:
+        place_id: Place ID
+        now: Reference time (default: utcnow)
+        observed_since: When the place was registered for monitoring, if known
+
+    Returns:
+        Dictionary with review_rate_per_day, poll_interval_minutes and next_check_at
+    """
+    now = now or datetime.utcnow()
+
+    if not settings.adaptive_polling_enabled:
+        interval = settings.default_check_interval
+        rate = prior_rate_per_hour()
+    else:
+        rate = estimate_review_rate(get_place_review_dates(place_id, now), now, observed_since)
+        interval = interval_for_rate(rate)
+
+    return {
+        "review_rate_per_day": round(rate * 24, 4),
+        "poll_interval_minutes": interval,
+        "next_check_at": now + timedelta(minutes=jittered_minutes(interval))
+    }
+
+
+def polling_savings_report(places: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Compare the adaptive schedule with a fixed interval at equal detection latency.
+
+    With checks every t minutes a review waits t/2 on average to be detected,
+    so the review-weighted mean latency of the adaptive schedule is
+    sum(rate_i * t_i / 2) / sum(rate_i). The equivalent fixed interval is the
+    one giving that same latency on every place.
+
+    Args:
+        places: Place documents with review_rate_per_day and poll_interval_minutes
+
+    Returns:
+        Dictionary with scrapes per day (adaptive, equivalent fixed, configured
+        fixed) and the scrapes saved per day
+    """
+    rates = []
+    intervals = []
+    for place in places:
+        if place.get("poll_interval_minutes"):
+            rates.append(place.get("review_rate_per_day") or 0.0)
+            intervals.append(place["poll_interval_minutes"])
+
+    if not intervals:
+        return {
+            "places": 0,
+            "adaptive_scrapes_per_day": 0.0,
+            "fixed_scrapes_per_day": 0.0,
+            "scrapes_saved_per_day": 0.0,
+            "mean_detection_latency_minutes": 0.0,
+            "default_interval_scrapes_per_day": 0.0
+        }
+
+    adaptive_scrapes = sum(1440 / interval for interval in intervals)
+
+    total_rate = sum(rates)
+    if total_rate > 0:
+        equivalent_interval = sum(r * t for r, t in zip(rates, intervals)) / total_rate
+    else:
+        equivalent_interval = sum(intervals) / len(intervals)
+    fixed_scrapes = len(intervals) * 1440 / equivalent_interval
+
+    return {
+        "places": len(intervals),
+        "adaptive_scrapes_per_day": round(adaptive_scrapes, 1),
+        "fixed_scrapes_per_day": round(fixed_scrapes, 1),
+        "scrapes_saved_per_day": round(fixed_scrapes - adaptive_scrapes, 1),
+        "mean_detection_latency_minutes": round(equivalent_interval / 2, 1),
+        "default_interval_scrapes_per_day": round(len(intervals) * 1440 / settings.default_check_interval, 1)
+    }
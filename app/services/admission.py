@@ -0,0 +1,358 @@
+"""
+Admission control for interactive scraping jobs.
+
+Before a new job is enqueued, the backlog of the interactive queue is turned
+into an estimated start time from live numbers: queued jobs, registered
+workers, jobs running on any tier and the mean duration of the last
+`admission_duration_samples` jobs (recorded by scrape_reviews_task). A job is
+rejected (HTTP 429 with Retry-After) when the queue already holds
+`admission_max_queue_depth` jobs or its estimated wait exceeds
+`admission_max_wait`, so admitted jobs start within a bounded time and their
+results are not left to expire in a queue that workers cannot drain.
+
+Each client may also have at most `admission_client_max_inflight` queued or
+running jobs. The client is the caller's address (behind a reverse proxy, run
+uvicorn with --proxy-headers so it is the original one). A client's jobs are
+tracked in a Redis set that is pruned of finished jobs on every check.
+
+Batches (admit(batch=True)) have their own allowance: up to
+`admission_batch_max_queue_depth` jobs waiting and
+`admission_client_max_batch_inflight` batch jobs per client, tracked apart
+from single requests. Both are at least `batch_max_urls` (checked when the
+settings load), so a full batch from an idle client fits an empty queue.
+
+The queue depth and client quota checks are atomic: a Lua script checks them
+against the jobs already queued or tracked plus the slots other requests have
+reserved but not enqueued yet, and reserves the new jobs' slots in the same
+step. admit() holds the slots until its block has enqueued the jobs, so
+concurrent requests cannot all pass on the same count.
+
+Requests that attach to an in-flight job or are served from a recent scrape
+add no work and are never rejected.
+"""
+import logging
+import math
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Any, Optional
+
+from redis import Redis
+from rq import Queue
+from rq.job import Job
+from rq.registry import StartedJobRegistry
+from rq.worker_registration import WORKERS_BY_QUEUE_KEY
+
+from app.config import settings
+from app.services.job_serializer import get_job_serializer
+from app.services.metrics import increment_counter
+
+
+logger = logging.getLogger(__name__)
+
+
+METRICS_GROUP = "admission"
+DURATIONS_KEY = "admission:durations"
+CLIENT_KEY_PREFIX = "admission:client:"
+RESERVED_KEY_PREFIX = "admission:reserved:"
+
+# Reserved slots not released by then (a crashed API process) stop counting
+RESERVATION_TTL = 60
+
+# KEYS: queue list, queue reservations, client job set, client reservations
+# ARGV: now, ttl, reservation id, new jobs, max queue depth, client limit (0 = none)
+# Returns {0} when reserved, {1, queued} when the queue is full, {2, inflight} past the quota
+RESERVE_SCRIPT = """
+local now, ttl, new_jobs = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[4])
+local max_depth, client_limit = tonumber(ARGV[5]), tonumber(ARGV[6])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - ttl)
+
+local queued = redis.call('LLEN', KEYS[1]) + redis.call('ZCARD', KEYS[2])
+if queued + new_jobs > max_depth then
+    return {1, queued}
+end
+
+if client_limit > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[4], '-inf', now - ttl)
+    local inflight = redis.call('SCARD', KEYS[3]) + redis.call('ZCARD', KEYS[4])
+    if inflight + new_jobs > client_limit then
+        return {2, inflight}
+    end
+end
+
+for i = 1, new_jobs do
+    redis.call('ZADD', KEYS[2], now, ARGV[3] .. ':' .. i)
+    if client_limit > 0 then
+        redis.call('ZADD', KEYS[4], now, ARGV[3] .. ':' .. i)
+    end
+end
+redis.call('EXPIRE', KEYS[2], ttl)
+if client_limit > 0 then
+    redis.call('EXPIRE', KEYS[4], ttl)
+end
+return {0}
+"""
+
+# Job states that count against a client's quota
+INFLIGHT_STATES = {"queued", "started", "deferred", "scheduled"}
+
+
+class AdmissionRejected(Exception):
+    """A new job was not admitted; the client should retry after `retry_after` seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# ============================================================================
+# MEASUREMENTS
+# ============================================================================
+
+def record_job_duration(redis_conn: Redis, seconds: float) -> None:
+    """Record how long a job occupied its worker (keeps the last samples only)."""
+    try:
+        with redis_conn.pipeline(transaction=False) as pipe:
+            pipe.lpush(DURATIONS_KEY, round(seconds, 3))
+            pipe.ltrim(DURATIONS_KEY, 0, settings.admission_duration_samples - 1)
+            pipe.execute()
+    except Exception as e:
+        logger.debug(f"Could not record job duration: {e}")
+
+
+def capacity_snapshot(queue: Queue, started_queues: List[Queue]) -> Dict[str, Any]:
+    """
+    Read the live numbers admission decisions are based on, in one round trip.
+
+    Args:
+        queue: Queue new jobs are enqueued in
+        started_queues: Queues whose running jobs occupy the same workers
+
+    Returns:
+        Dictionary with queued_jobs, workers, busy_workers and avg_job_seconds
+    """
+    with queue.connection.pipeline(transaction=False) as pipe:
+        pipe.llen(queue.key)
+        pipe.scard(WORKERS_BY_QUEUE_KEY % queue.name)
+        for started_queue in started_queues:
+            pipe.zcard(StartedJobRegistry(queue=started_queue).key)
+        pipe.lrange(DURATIONS_KEY, 0, -1)
+        results = pipe.execute()
+
+    queued, workers, *busy, durations = results
+    samples = [float(value) for value in durations]
+
+    return {
+        "queued_jobs": queued,
+        "workers": workers,
+        "busy_workers": min(sum(busy), workers),
+        "avg_job_seconds": round(sum(samples) / len(samples), 3) if samples else float(settings.admission_default_job_seconds)
+    }
+
+
+def estimate_wait(snapshot: Dict[str, Any]) -> Optional[float]:
+    """
+    Estimated seconds until a job enqueued now starts.
+
+    Jobs ahead take the mean duration each and running jobs are, on average,
+    half done; the work is shared by all workers. Returns None when no worker
+    is registered (the job would not start until one is).
+    """
+    workers = snapshot["workers"]
+    if not workers:
+        return None
+
+    queued, busy = snapshot["queued_jobs"], snapshot["busy_workers"]
+    if queued + busy < workers:
+        return 0.0
+
+    avg = snapshot["avg_job_seconds"]
+    return round((queued * avg + busy * avg / 2) / workers, 1)
+
+
+def estimate(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Queue position and estimated start of a job enqueued now."""
+    wait = estimate_wait(snapshot)
+    return {
+        "queue_position": snapshot["queued_jobs"] + 1,
+        "estimated_wait_seconds": wait,
+        "estimated_start_at": datetime.utcnow() + timedelta(seconds=wait) if wait is not None else None
+    }
+
+
+# ============================================================================
+# CLIENT QUOTAS
+# ============================================================================
+
+def _client_key(client_id: str, batch: bool = False) -> str:
+    return f"{CLIENT_KEY_PREFIX}batch:{client_id}" if batch else f"{CLIENT_KEY_PREFIX}{client_id}"
+
+
+def _limits(batch: bool):
+    """Queue depth and per-client limit of single requests or batches."""
+    if batch:
+        return settings.admission_batch_max_queue_depth, settings.admission_client_max_batch_inflight
+    return settings.admission_max_queue_depth, settings.admission_client_max_inflight
+
+
+def client_inflight(redis_conn: Redis, client_id: str, batch: bool = False) -> int:
+    """Number of queued or running jobs of a client (drops finished ones from its set)."""
+    key = _client_key(client_id, batch)
+    job_ids = [job_id.decode() for job_id in redis_conn.smembers(key)]
+    if not job_ids:
+        return 0
+
+    jobs = Job.fetch_many(job_ids, connection=redis_conn, serializer=get_job_serializer())
+    done = [
+        job_id for job_id, job in zip(job_ids, jobs)
+        if job is None or job.get_status(refresh=False) not in INFLIGHT_STATES
+    ]
+    if done:
+        redis_conn.srem(key, *done)
+    return len(job_ids) - len(done)
+
+
+def track_client_job(redis_conn: Redis, client_id: str, *job_ids: str, batch: bool = False) -> None:
+    """Count newly enqueued jobs against their client's quota (the batch one for batch jobs)."""
+    if not job_ids:
+        return
+    key = _client_key(client_id, batch)
+    with redis_conn.pipeline(transaction=False) as pipe:
+        pipe.sadd(key, *job_ids)
+        pipe.expire(key, settings.scraping_max_runtime + settings.job_result_ttl)
+        pipe.execute()
+
+
+def get_client_quota(redis_conn: Redis, client_id: str) -> Dict[str, Any]:
+    """
+    Quota usage of a client.
+
+    Returns:
+        Dictionary with client_id, inflight_jobs, max_inflight_jobs (None if
+        unlimited) and remaining (None if unlimited), and the same for batch
+        jobs (batch_inflight_jobs, max_batch_inflight_jobs, batch_remaining)
+    """
+    limit = settings.admission_client_max_inflight or None
+    inflight = client_inflight(redis_conn, client_id)
+    batch_limit = settings.admission_client_max_batch_inflight or None
+    batch_inflight = client_inflight(redis_conn, client_id, batch=True)
+    return {
+        "client_id": client_id,
+        "inflight_jobs": inflight,
+        "max_inflight_jobs": limit,
+        "remaining": max(limit - inflight, 0) if limit else None,
+        "batch_inflight_jobs": batch_inflight,
+        "max_batch_inflight_jobs": batch_limit,
+        "batch_remaining": max(batch_limit - batch_inflight, 0) if batch_limit else None
+    }
+
+
+# ============================================================================
+# ADMISSION
+# ============================================================================
+
+def _client_reserved_key(client_id: str, batch: bool) -> str:
+    return f"{RESERVED_KEY_PREFIX}client:batch:{client_id}" if batch else f"{RESERVED_KEY_PREFIX}client:{client_id}"
+
+
+def _reserve(queue: Queue, client_id: Optional[str], new_jobs: int, reservation: str, batch: bool):
+    """Reserve `new_jobs` slots in the queue and the client's quota, atomically."""
+    max_depth, limit = _limits(batch)
+    limit = limit if client_id else 0
+    if limit:
+        # Finished jobs leave the set here; the script counts what is left
+        client_inflight(queue.connection, client_id, batch)
+
+    client = client_id or ""
+    return queue.connection.register_script(RESERVE_SCRIPT)(
+        keys=[queue.key, f"{RESERVED_KEY_PREFIX}{queue.name}", _client_key(client, batch), _client_reserved_key(client, batch)],
+        args=[time.time(), RESERVATION_TTL, reservation, new_jobs, max_depth, limit]
+    )
+
+
+def _release(queue: Queue, client_id: Optional[str], new_jobs: int, reservation: str, batch: bool) -> None:
+    members = [f"{reservation}:{i}" for i in range(1, new_jobs + 1)]
+    with queue.connection.pipeline(transaction=False) as pipe:
+        pipe.zrem(f"{RESERVED_KEY_PREFIX}{queue.name}", *members)
+        if client_id:
+            pipe.zrem(_client_reserved_key(client_id, batch), *members)
+        pipe.execute()
+
+
+@contextmanager
+def admit(
+    queue: Queue,
+    started_queues: List[Queue],
+    client_id: Optional[str] = None,
+    new_jobs: int = 1,
+    batch: bool = False
+) -> Iterator[Dict[str, Any]]:
+    """
+    Admit new jobs, holding their slots while the block enqueues them.
+
+    The block must enqueue the jobs (and track them with track_client_job,
+    passing the same `batch`) before it ends; the reserved slots are released
+    when it does.
+
+    Args:
+        queue: Queue the jobs are enqueued in
+        started_queues: Queues whose running jobs occupy the same workers
+        client_id: Client submitting the jobs (None skips the quota check)
+        new_jobs: Number of jobs the block enqueues
+        batch: Check the batch allowance instead of the single-request limits
+
+    Yields:
+        Estimate of the first admitted job (queue_position,
+        estimated_wait_seconds, estimated_start_at)
+
+    Raises:
+        AdmissionRejected: Backlog or client quota exceeded
+    """
+    snapshot = capacity_snapshot(queue, started_queues)
+    result = estimate(snapshot)
+
+    if not settings.admission_enabled or not new_jobs:
+        yield result
+        return
+
+    avg = snapshot["avg_job_seconds"]
+    wait = result["estimated_wait_seconds"]
+    workers = max(snapshot["workers"], 1)
+
+    if wait is not None and wait > settings.admission_max_wait:
+        increment_counter(METRICS_GROUP, "rejected_backlog")
+        raise AdmissionRejected(
+            f"Scraping backlog too long (estimated wait {wait:.0f}s)",
+            retry_after=max(math.ceil(wait - settings.admission_max_wait), 1)
+        )
+
+    max_depth, limit = _limits(batch)
+    reservation = str(uuid.uuid4())
+    outcome, *counts = _reserve(queue, client_id, new_jobs, reservation, batch)
+
+    if outcome == 1:
+        # Time for the workers to drain the queue back below its limit
+        queued = counts[0]
+        excess = queued + new_jobs - max_depth
+        increment_counter(METRICS_GROUP, "rejected_backlog")
+        raise AdmissionRejected(
+            f"Scraping queue is full: {new_jobs} new jobs requested, {queued} of {max_depth} already waiting",
+            retry_after=max(math.ceil(excess * avg / workers), 1)
+        )
+
+    if outcome == 2:
+        inflight = counts[0]
+        increment_counter(METRICS_GROUP, "rejected_quota")
+        raise AdmissionRejected(
+            f"Client {client_id} requested {new_jobs} new {'batch ' if batch else ''}jobs "
+            f"with {inflight} of {limit} already queued or running",
+            retry_after=max(math.ceil(avg), 1)
+        )
+
+    increment_counter(METRICS_GROUP, "admitted", new_jobs)
+    try:
+        yield result
+    finally:
+        _release(queue, client_id, new_jobs, reservation, batch)
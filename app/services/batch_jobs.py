@@ -0,0 +1,249 @@
+"""
+Batch submission and status of scraping jobs.
+
+A batch enqueues one scraping job per URL and stores the list of job IDs
+under a batch ID, so a whole list of URLs is submitted with one request and
+watched with another:
+
+- submit_batch claims the in-flight records of all URLs (see
+  job_coalescing.claim_many), admits the new jobs as a whole against the
+  queue depth and the client's quota (see admission.admit), then creates
+  every job and the batch record in a single Redis pipeline. URLs of the
+  same place share one job, and URLs whose scrape is already in flight
+  attach to that job.
+- get_batch_status loads the batch record and all of its jobs with one
+  pipelined HGETALL per job (Job.fetch_many), without refreshing each job.
+
+Submitting or watching a batch takes a handful of round trips regardless of
+its size.
+"""
+import json
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, List, Dict, Any, Optional
+
+from rq import Queue
+from rq.job import Job
+
+from app.config import settings
+from app.models import JobStatus
+from app.services import admission, job_coalescing
+from app.services.job_serializer import get_job_serializer
+from app.tasks.scraper_task import scrape_reviews_task
+
+
+logger = logging.getLogger(__name__)
+
+
+BATCH_KEY_PREFIX = "scraping:batch:"
+
+# RQ job states -> API job status
+STATUS_MAP = {
+    "queued": JobStatus.QUEUED,
+    "deferred": JobStatus.QUEUED,
+    "scheduled": JobStatus.QUEUED,
+    "started": JobStatus.STARTED,
+    "finished": JobStatus.FINISHED,
+    "failed": JobStatus.FAILED,
+    "stopped": JobStatus.FAILED,
+    "canceled": JobStatus.FAILED
+}
+
+
+def _batch_key(batch_id: str) -> str:
+    return f"{BATCH_KEY_PREFIX}{batch_id}"
+
+
+def _job_data(url: str, max_reviews: int, sort_by: str, job_id: str, coalesce_key: Optional[str]):
+    return Queue.prepare_data(
+        scrape_reviews_task,
+        kwargs={"url": url, "max_reviews": max_reviews, "sort_by": sort_by},
+        job_id=job_id,
+        meta={'coalesce_key': coalesce_key} if coalesce_key else None,
+        timeout=settings.scraping_max_runtime,  # the watchdog aborts stalled jobs earlier
+        result_ttl=settings.job_result_ttl
+    )
+
+
+def submit_batch(
+    queue: Queue,
+    urls: List[str],
+    max_reviews: int,
+    sort_by: str,
+    started_queues: Iterable[Queue] = (),
+    client_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Enqueue one scraping job per URL under a new batch ID.
+
+    Args:
+        queue: Queue to enqueue the jobs in
+        urls: Google Maps URLs
+        max_reviews: Number of reviews per URL
+        sort_by: Sort option
+        started_queues: Queues whose running jobs occupy the same workers
+        client_id: Client submitting the batch (None skips the quota check)
+
+    Returns:
+        Batch record: batch_id, created_at and one entry (url, job_id, coalesced) per URL
+
+    Raises:
+        AdmissionRejected: The new jobs do not fit in the batch allowance (queue depth or client quota)
+    """
+    redis_conn = queue.connection
+    batch_id = str(uuid.uuid4())
+
+    # One job per in-flight key; later URLs with the same key share it
+    if settings.job_coalescing_enabled:
+        keys = [job_coalescing.build_coalesce_key(url, sort_by) for url in urls]
+        claimed, attached, stale = job_coalescing.claim_many(redis_conn, dict.fromkeys(keys, max_reviews))
+    else:
+        keys = [str(uuid.uuid4()) for _ in urls]
+        claimed, attached, stale = {key: key for key in keys}, {}, []
+
+    try:
+        # Claimed keys are new jobs, and so are stale ones unless another request replaced them first
+        with admission.admit(queue, list(started_queues), client_id, len(claimed) + len(stale), batch=True):
+            record, new_job_ids = _enqueue_batch(
+                queue, batch_id, urls, keys, max_reviews, sort_by, claimed, attached
+            )
+            if client_id:
+                admission.track_client_job(redis_conn, client_id, *new_job_ids, batch=True)
+    except Exception:
+        if settings.job_coalescing_enabled:
+            job_coalescing.release_claims(redis_conn, list(claimed))
+        raise
+
+    new_jobs = len(new_job_ids)
+    logger.info(f"Batch {batch_id}: {len(urls)} URLs, {new_jobs} jobs enqueued, "
+                f"{len(urls) - new_jobs} attached to existing jobs")
+    return record
+
+
+def _enqueue_batch(
+    queue: Queue,
+    batch_id: str,
+    urls: List[str],
+    keys: List[str],
+    max_reviews: int,
+    sort_by: str,
+    claimed: Dict[str, str],
+    attached: Dict[str, Job]
+):
+    """
+    Create the jobs of a batch and store its record (claims already taken).
+
+    Returns:
+        Tuple (batch record, IDs of the jobs created)
+    """
+    redis_conn = queue.connection
+    job_ids: Dict[str, str] = {key: job.id for key, job in attached.items()}
+    job_datas = []
+    entries = []
+    new_job_ids = []
+
+    for url, key in zip(urls, keys):
+        if key in job_ids:
+            entries.append({"url": url, "job_id": job_ids[key], "coalesced": True})
+        elif key in claimed:
+            job_ids[key] = claimed[key]
+            coalesce_key = key if settings.job_coalescing_enabled else None
+            job_datas.append(_job_data(url, max_reviews, sort_by, claimed[key], coalesce_key))
+            entries.append({"url": url, "job_id": claimed[key], "coalesced": False})
+            new_job_ids.append(claimed[key])
+        else:
+            # Stale in-flight record: single-request path (replaces it)
+            def enqueue(job_id: Optional[str] = None, coalesce_key: Optional[str] = None, url: str = url) -> Job:
+                return queue.enqueue(
+                    scrape_reviews_task,
+                    url=url,
+                    max_reviews=max_reviews,
+                    sort_by=sort_by,
+                    job_id=job_id,
+                    meta={'coalesce_key': coalesce_key} if coalesce_key else None,
+                    job_timeout=settings.scraping_max_runtime,
+                    result_ttl=settings.job_result_ttl
+                )
+            job, coalesced = job_coalescing.enqueue_or_attach(redis_conn, url, max_reviews, sort_by, enqueue)
+            job_ids[key] = job.id
+            entries.append({"url": url, "job_id": job.id, "coalesced": coalesced})
+            if not coalesced:
+                new_job_ids.append(job.id)
+
+    record = {
+        "batch_id": batch_id,
+        "created_at": datetime.utcnow().isoformat(),
+        "max_reviews": max_reviews,
+        "sort_by": sort_by,
+        "jobs": entries
+    }
+
+    with redis_conn.pipeline() as pipe:
+        queue.enqueue_many(job_datas, pipeline=pipe)
+        pipe.set(_batch_key(batch_id), json.dumps(record), ex=settings.batch_ttl)
+        pipe.execute()
+    return record, new_job_ids
+
+
+def _job_info(job: Optional[Job]) -> Dict[str, Any]:
+    """Status of one job from its already loaded hash (no further round trips)."""
+    if job is None:
+        return {"status": None, "progress": None, "error": "Job expired", "result_available": False}
+
+    job_status = STATUS_MAP.get(job.get_status(refresh=False), JobStatus.QUEUED)
+    return {
+        "status": job_status,
+        "progress": job.meta.get('progress'),
+        "error": job.meta.get('error') if job_status == JobStatus.FAILED else None,
+        "result_available": job_status == JobStatus.FINISHED
+    }
+
+
+def summarize_batch(record: Dict[str, Any], jobs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Aggregated and per-job status of a batch record.
+
+    Args:
+        record: Batch record built by submit_batch
+        jobs: Job ID -> loaded job (None if it expired) for every job of the batch
+
+    Returns:
+        Dictionary with counts per status and one entry per URL
+    """
+    infos = {job_id: _job_info(job) for job_id, job in jobs.items()}
+    entries = [{**entry, **infos[entry["job_id"]]} for entry in record["jobs"]]
+    counts = Counter(info["status"].value if info["status"] else "expired" for info in infos.values())
+
+    return {
+        "batch_id": record["batch_id"],
+        "created_at": record["created_at"],
+        "total_urls": len(entries),
+        "total_jobs": len(infos),
+        "counts": {**{s.value: 0 for s in JobStatus}, "expired": 0, **counts},
+        "done": all(info["status"] in (JobStatus.FINISHED, JobStatus.FAILED, None) for info in infos.values()),
+        "jobs": entries
+    }
+
+
+def get_batch_status(redis_conn, batch_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Aggregated and per-job status of a batch.
+
+    Args:
+        redis_conn: Redis connection
+        batch_id: Batch ID returned by submit_batch
+
+    Returns:
+        Dictionary with counts per status and one entry per URL, or None if the
+        batch does not exist or expired
+    """
+    raw = redis_conn.get(_batch_key(batch_id))
+    if raw is None:
+        return None
+    record = json.loads(raw)
+
+    job_ids = list(dict.fromkeys(entry["job_id"] for entry in record["jobs"]))
+    jobs = Job.fetch_many(job_ids, connection=redis_conn, serializer=get_job_serializer())
+    return summarize_batch(record, dict(zip(job_ids, jobs)))
@@ -0,0 +1,81 @@
+"""
+Warm browser reuse across scraping jobs.
+
+Launching Chromium is a large part of a short scrape. When
+`worker_warm_browser` is enabled the worker does not fork per job and each
+thread keeps its GoogleMapsScraper open between jobs, so retries and
+follow-up jobs start from a warm browser. The browser is replaced after a
+crash and recycled every `browser_max_jobs` jobs to bound memory growth.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+from googlemaps import GoogleMapsScraper
+from app.config import settings
+from app.services.scraping_errors import browser_is_reusable
+
+
+logger = logging.getLogger(__name__)
+
+
+_local = threading.local()
+
+
+def _new_scraper() -> GoogleMapsScraper:
+    return GoogleMapsScraper(debug=not settings.headless_mode)
+
+
+def _close(scraper: GoogleMapsScraper) -> None:
+    try:
+        scraper.__exit__(None, None, None)
+    except Exception as e:
+        logger.warning(f"Error closing browser: {e}")
+
+
+def discard_warm_scraper() -> None:
+    """Close this thread's warm browser, if any."""
+    scraper = getattr(_local, "scraper", None)
+    _local.scraper = None
+    _local.jobs = 0
+    if scraper is not None:
+        _close(scraper)
+
+
+@contextmanager
+def acquire_scraper() -> Iterator[GoogleMapsScraper]:
+    """
+    Get a scraper for one job.
+
+    With warm browsers disabled this opens and closes a browser per job, as
+    before. Otherwise the thread's browser is reused and only discarded when
+    the job fails in a way that leaves it unusable.
+    """
+    if not settings.worker_warm_browser:
+        with _new_scraper() as scraper:
+            yield scraper
+        return
+
+    scraper = getattr(_local, "scraper", None)
+    if scraper is None:
+        logger.info("Launching warm browser")
+        scraper = _new_scraper()
+        _local.scraper = scraper
+        _local.jobs = 0
+    else:
+        logger.info(f"Reusing warm browser ({_local.jobs} previous jobs)")
+
+    try:
+        yield scraper
+    except BaseException as e:
+        if not browser_is_reusable(e):
+            logger.warning(f"Discarding warm browser after failure: {e}")
+            discard_warm_scraper()
+        raise
+    finally:
+        if getattr(_local, "scraper", None) is scraper:
+            _local.jobs += 1
+            if _local.jobs >= settings.browser_max_jobs:
+                logger.info(f"Recycling warm browser after {_local.jobs} jobs")
+                discard_warm_scraper()
@@ -0,0 +1,246 @@
+"""
+Background health prober for MongoDB and Redis.
+
+Orchestrators poll /health every few seconds on every replica; pinging both
+databases on each call blocked the event loop and multiplied load on them. A
+background APScheduler job pings MongoDB and Redis every
+`health_probe_interval` seconds instead, keeps the latency of the last
+`health_probe_samples` successful pings per service and stores the resulting
+health response already encoded, so /health only returns bytes.
+
+Pings use their own clients with a `health_probe_timeout` (at most half the
+interval) on server selection, connects and reads, instead of the shared
+clients and their 30s defaults: a database that is down or hung fails its
+ping within the interval and /health reports the timeout error, and a hung
+Redis cannot block the prober.
+
+If the prober stops probing, the cached result goes stale after three
+intervals and /health reports unhealthy. /health/deep runs the pings live
+(and refreshes the cache). Only the services this process needs decide the
+status: MongoDB with `review_storage=mongodb` and Redis outside local
+execution mode; the other one is still pinged and reported.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Any, Optional
+
+import orjson
+from apscheduler.schedulers.background import BackgroundScheduler
+from pymongo import MongoClient
+from redis import Redis
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+PROBE_JOB_ID = "health_probe"
+SERVICES = ("mongodb", "redis")
+
+_scheduler: Optional[BackgroundScheduler] = None
+_lock = threading.Lock()
+_latencies: Dict[str, Deque[float]] = {service: deque(maxlen=settings.health_probe_samples) for service in SERVICES}
+_status: Optional[Dict[str, Any]] = None
+_body: Optional[bytes] = None
+_probed_at = 0.0  # monotonic
+_probe_started_at: Optional[float] = None  # monotonic, while a probe runs
+_clients: Dict[str, Any] = {}
+
+
+def probe_timeout() -> float:
+    """Seconds a ping may take: both pings of a probe fit in one interval."""
+    return min(settings.health_probe_timeout, settings.health_probe_interval / 2)
+
+
+def _client(service: str):
+    """Client used only for pings, with probe_timeout() on every network wait."""
+    with _lock:
+        if service not in _clients:
+            timeout = probe_timeout()
+            if service == "mongodb":
+                timeout_ms = int(timeout * 1000)
+                _clients[service] = MongoClient(
+                    settings.mongodb_url,
+                    serverSelectionTimeoutMS=timeout_ms,
+                    connectTimeoutMS=timeout_ms,
+                    socketTimeoutMS=timeout_ms,
+                    maxPoolSize=1
+                )
+            else:
+                _clients[service] = Redis.from_url(
+                    settings.redis_url, socket_timeout=timeout, socket_connect_timeout=timeout
+                )
+        return _clients[service]
+
+
+def _ping(service: str):
+    if service == "mongodb":
+        _client(service).admin.command('ping')
+    else:
+        _client(service).ping()
+
+
+def close_clients():
+    """Close the ping clients (recreated on the next probe)."""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception as e:
+            logger.debug(f"Could not close health probe client: {e}")
+
+
+def _required_services():
+    """Services the status depends on: MongoDB with MongoDB review storage, Redis outside local mode."""
+    required = []
+    if settings.review_storage == "mongodb":
+        required.append("mongodb")
+    if settings.execution_mode != "local":
+        required.append("redis")
+    return tuple(required)
+
+
+def percentile(samples, fraction: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    index = min(int(round(fraction * (len(samples) - 1))), len(samples) - 1)
+    return samples[index]
+
+
+def _latency_summary(samples: Deque[float]) -> Optional[Dict[str, float]]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return {
+        "last_ms": round(samples[-1], 3),
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "samples": len(ordered)
+    }
+
+
+def probe() -> Dict[str, Any]:
+    """
+    Ping MongoDB and Redis now and refresh the cached health status.
+
+    Returns:
+        Health status: status, mongodb, redis, error, checked_at and latency
+        percentiles per service
+    """
+    global _status, _body, _probed_at, _probe_started_at
+
+    ok: Dict[str, bool] = {}
+    errors = []
+    _probe_started_at = time.monotonic()
+
+    for service in SERVICES:
+        start = time.perf_counter()
+        try:
+            _ping(service)
+        except Exception as e:
+            ok[service] = False
+            errors.append(f"{'MongoDB' if service == 'mongodb' else 'Redis'} error: {str(e)}")
+            continue
+        ok[service] = True
+        with _lock:
+            _latencies[service].append((time.perf_counter() - start) * 1000)
+
+    with _lock:
+        latency = {service: _latency_summary(_latencies[service]) for service in SERVICES}
+
+    status = {
+        "status": "healthy" if all(ok[service] for service in _required_services()) else "unhealthy",
+        **ok,
+        "error": " | ".join(errors) or None,
+        "checked_at": datetime.utcnow(),
+        "stale": False,
+        "latency": latency
+    }
+
+    with _lock:
+        if _status is not None and _status["status"] != status["status"]:
+            log = logger.info if status["status"] == "healthy" else logger.warning
+            log(f"Health changed to {status['status']}" + (f": {status['error']}" if status["error"] else ""))
+        _status = status
+        _body = orjson.dumps(status)
+        _probed_at = time.monotonic()
+        _probe_started_at = None
+
+    return status
+
+
+def _is_stale() -> bool:
+    return time.monotonic() - _probed_at > 3 * settings.health_probe_interval
+
+
+def cached_body() -> bytes:
+    """
+    Encoded health status of the last probe (probes first if there is none).
+
+    A status older than three probe intervals is reported unhealthy.
+    """
+    if _body is None:
+        probe()
+
+    with _lock:
+        body, status, started_at = _body, _status, _probe_started_at
+
+    if not _is_stale():
+        return body
+
+    last_check = status["checked_at"].isoformat()
+    if started_at is not None:
+        error = f"Health probe running for {time.monotonic() - started_at:.0f}s: last check at {last_check}"
+    else:
+        error = f"Health prober stopped: last check at {last_check}"
+
+    return orjson.dumps({
+        **status,
+        "status": "unhealthy",
+        "stale": True,
+        "error": error
+    })
+
+
+def _tick():
+    try:
+        probe()
+    except Exception as e:
+        logger.error(f"Health probe failed: {e}", exc_info=True)
+
+
+def start_prober() -> BackgroundScheduler:
+    """Start probing in this process (idempotent)."""
+    global _scheduler
+    if _scheduler is not None and _scheduler.running:
+        return _scheduler
+
+    _scheduler = BackgroundScheduler(timezone="UTC")
+    _scheduler.add_job(
+        _tick,
+        "interval",
+        seconds=settings.health_probe_interval,
+        id=PROBE_JOB_ID,
+        max_instances=1,
+        coalesce=True
+    )
+    _scheduler.start()
+
+    logger.info(f"Health prober started (every {settings.health_probe_interval}s)")
+    return _scheduler
+
+
+def stop_prober():
+    """Stop the health prober if it is running."""
+    global _scheduler
+    if _scheduler is not None and _scheduler.running:
+        _scheduler.shutdown(wait=False)
+        logger.info("Health prober stopped")
+    _scheduler = None
+    close_clients()
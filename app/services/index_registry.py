@@ -0,0 +1,364 @@
+"""
+Indexes derived from the query shapes the application issues.
+
+Every query the code runs against MongoDB is declared here as a QueryShape
+(equality fields, sort, range fields). The index of each collection is
+derived from its shapes with the equality-sort-range rule; a shape already
+served by a longer derived index gets none of its own, so every index serves
+at least one query and none only duplicates another.
+
+initialize_database and the review repository create the derived indexes.
+Auto-named indexes that are no longer derived (created by earlier versions,
+e.g. `branch_id_1` or `notified_via_webhook_1`, which no query uses, or by
+hand) are only reported by default: an operator drops them with
+`python index_report.py --drop-undeclared` once no older replica of a rolling
+deploy needs them, so inserts stop maintaining them. `index_drop_undeclared`
+drops them on every startup instead. Indexes with custom names are never
+dropped, only reported.
+
+index_report explains a representative query of every shape and reads
+$indexStats, flagging collection scans, in-memory sorts and indexes that are
+not declared or were never used (see index_report.py).
+
+A new query should be added to QUERY_SHAPES in the same change.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.collection import Collection
+from pymongo.database import Database
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+Keys = Tuple[Tuple[str, int], ...]
+
+# Logical collection -> setting holding its name
+COLLECTIONS = {
+    "reviews": "mongodb_reviews_collection",
+    "places": "mongodb_places_collection",
+    "scrapes": "mongodb_scrapes_collection",
+    "place_stats": "mongodb_place_stats_collection",
+    "review_rollups": "mongodb_review_rollups_collection",
+}
+
+REVIEW_SORT_FIELDS = ("review_date", "rating", "retrieval_date")
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    """A query the application issues: which fields it matches, sorts and ranges on."""
+    name: str
+    collection: str  # key of COLLECTIONS
+    equality: Tuple[str, ...] = ()
+    sort: Keys = ()
+    range: Tuple[str, ...] = ()
+    unique: bool = False  # the derived index also enforces uniqueness
+    source: str = ""  # where the query is issued
+
+
+QUERY_SHAPES: Tuple[QueryShape, ...] = (
+    # ===== reviews =====
+    QueryShape("reviews.by_id", "reviews", equality=("id_review",), unique=True,
+               source="review_repository (get, delete, dedup), scrape_cache, webhook_service._mark_notified, "
+                      "review_rollups.add_reviews_to_rollups"),
+    *(
+        QueryShape(f"reviews.list.{field}", "reviews",
+                   sort=((field, DESCENDING), ("id_review", DESCENDING)), range=("rating",),
+                   source="GET /api/reviews/ and /export without place_id (count, offset and keyset pages)")
+        for field in REVIEW_SORT_FIELDS
+    ),
+    *(
+        QueryShape(f"reviews.list_by_place.{field}", "reviews", equality=("place_id",),
+                   sort=((field, DESCENDING), ("id_review", DESCENDING)), range=("rating",),
+                   source="GET /api/reviews/ and /export with place_id, recent reviews of a place, "
+                          "adaptive_polling.get_place_review_dates")
+        for field in REVIEW_SORT_FIELDS
+    ),
+    QueryShape("reviews.by_place", "reviews", equality=("place_id",),
+               source="place_stats.rebuild_place_stats, review_rollups.rebuild_review_rollups"),
+    QueryShape("reviews.recent_by_client", "reviews", equality=("client_id",),
+               sort=(("retrieval_date", DESCENDING), ("id_review", DESCENDING)),
+               source="recent reviews of a client (endpoint fallback, recent_reviews.warm_scope)"),
+
+    # ===== places =====
+    QueryShape("places.by_place_id", "places", equality=("place_id",), unique=True,
+               source="monitor_task.monitor_place_async"),
+    QueryShape("places.by_canonical_place_id", "places", equality=("canonical_place_id",),
+               source="webhook_service.events_for_reviews"),
+    QueryShape("places.due", "places", equality=("monitoring_enabled",),
+               sort=(("next_check_at", ASCENDING),), range=("next_check_at",),
+               source="monitor_scheduler.claim_due_place, spread_new_places, monitor_task.monitor_due_places"),
+
+    # ===== scrapes =====
+    QueryShape("scrapes.by_place_sort", "scrapes", equality=("place_id", "sort_by"), unique=True,
+               source="MongoReviewRepository.record_scrape, find_scrape (scrape_cache)"),
+
+    # ===== place_stats =====
+    QueryShape("place_stats.by_place", "place_stats", equality=("place_id",), unique=True,
+               source="place_stats"),
+
+    # ===== review_rollups =====
+    QueryShape("review_rollups.by_place", "review_rollups", equality=("place_id", "period"), range=("period_start",),
+               source="review_rollups.get_review_stats(place_id), rebuild_review_rollups"),
+    QueryShape("review_rollups.by_client", "review_rollups", equality=("client_id", "period"), range=("period_start",),
+               source="review_rollups.get_review_stats(client_id)"),
+    QueryShape("review_rollups.all", "review_rollups", equality=("period",), range=("period_start",),
+               source="review_rollups.get_review_stats()"),
+)
+
+
+# ============================================================================
+# DERIVATION
+# ============================================================================
+
+def index_name(keys: Iterable[Tuple[str, int]]) -> str:
+    """Default MongoDB name of an index (e.g. place_id_1_review_date_-1)."""
+    return "_".join(
+        f"{field}_{direction if isinstance(direction, str) else int(direction)}" for field, direction in keys
+    )
+
+
+def shape_keys(shape: QueryShape) -> Keys:
+    """Index keys serving a shape: equality fields, then the sort, then range fields."""
+    keys = [(field, ASCENDING) for field in shape.equality]
+    keys += [key for key in shape.sort if key[0] not in shape.equality]
+    used = {field for field, _ in keys}
+    keys += [(field, ASCENDING) for field in shape.range if field not in used]
+    return tuple(keys)
+
+
+def _flipped(keys: Keys) -> Keys:
+    return tuple((field, -direction) for field, direction in keys)
+
+
+def serves(keys: Keys, shape: QueryShape) -> bool:
+    """
+    Whether an index on `keys` serves a shape without scanning or sorting in memory.
+
+    Its leading fields must be the shape's equality fields (any order or
+    direction), then its sort (as declared or fully reversed), then its range
+    fields (any direction).
+    """
+    wanted = shape_keys(shape)
+    if len(keys) < len(wanted):
+        return False
+
+    prefix = keys[:len(wanted)]
+    equality = len(shape.equality)
+    sort = tuple(key for key in shape.sort if key[0] not in shape.equality)
+    index_sort = prefix[equality:equality + len(sort)]
+
+    return (
+        {field for field, _ in prefix[:equality]} == set(shape.equality)
+        and (index_sort == sort or _flipped(index_sort) == sort)
+        and {field for field, _ in prefix[equality + len(sort):]} == {field for field, _ in wanted[equality + len(sort):]}
+    )
+
+
+def derived_indexes(collection: str) -> List[Tuple[Keys, bool]]:
+    """
+    Indexes of a collection, derived from its query shapes.
+
+    Unique shapes get their own index. The other shapes, longest first, get
+    one only if no index derived so far serves them.
+
+    Returns:
+        List of (keys, unique)
+    """
+    shapes = [shape for shape in QUERY_SHAPES if shape.collection == collection]
+
+    indexes: List[Tuple[Keys, bool]] = []
+    for shape in shapes:
+        if shape.unique and (shape_keys(shape), True) not in indexes:
+            indexes.append((shape_keys(shape), True))
+
+    for shape in sorted((shape for shape in shapes if not shape.unique), key=lambda shape: -len(shape_keys(shape))):
+        if not any(serves(keys, shape) for keys, _ in indexes):
+            indexes.append((shape_keys(shape), False))
+    return indexes
+
+
+def shapes_served(collection: str, keys: Keys) -> List[str]:
+    """Names of the shapes of a collection served by an index on `keys`."""
+    return [shape.name for shape in QUERY_SHAPES if shape.collection == collection and serves(keys, shape)]
+
+
+# ============================================================================
+# MONGODB
+# ============================================================================
+
+def collection_name(collection: str) -> str:
+    return getattr(settings, COLLECTIONS[collection])
+
+
+def sync_indexes(collection: Collection, logical_name: str, drop_undeclared: Optional[bool] = None) -> Dict[str, List[str]]:
+    """
+    Create the derived indexes of a collection and drop stale auto-named ones.
+
+    Args:
+        collection: MongoDB collection
+        logical_name: Its key in COLLECTIONS
+        drop_undeclared: Drop auto-named indexes that are no longer derived
+            (default: `index_drop_undeclared`)
+
+    Returns:
+        Dictionary with the names of the created and dropped indexes
+    """
+    if drop_undeclared is None:
+        drop_undeclared = settings.index_drop_undeclared
+
+    existing = collection.index_information()
+    declared = derived_indexes(logical_name)
+    created = []
+
+    for keys, unique in declared:
+        name = index_name(keys)
+        if name not in existing:
+            created.append(name)
+        collection.create_index(list(keys), unique=unique)
+
+    dropped = []
+    if drop_undeclared:
+        names = {index_name(keys) for keys, _ in declared}
+        for name, info in existing.items():
+            # Custom-named indexes were made on purpose: report them, never drop them
+            if name == "_id_" or name in names or name != index_name(info["key"]):
+                continue
+            collection.drop_index(name)
+            dropped.append(name)
+
+    if created or dropped:
+        logger.info(f"Indexes of {collection.name}: created {created or 'none'}, dropped {dropped or 'none'}")
+    return {"created": created, "dropped": dropped}
+
+
+def sync_all(
+    db: Database,
+    skip: Iterable[str] = (),
+    drop_undeclared: Optional[bool] = None
+) -> Dict[str, Dict[str, List[str]]]:
+    """sync_indexes for every registered collection except `skip`."""
+    return {
+        logical_name: sync_indexes(db[collection_name(logical_name)], logical_name, drop_undeclared)
+        for logical_name in COLLECTIONS if logical_name not in skip
+    }
+
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def _plan_stages(plan: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    yield plan
+    for child in [plan.get("inputStage"), *plan.get("inputStages", [])]:
+        if child:
+            yield from _plan_stages(child)
+
+
+def _example_query(collection: Collection, shape: QueryShape) -> Tuple[Dict[str, Any], List[Tuple[str, int]]]:
+    """Filter and sort of a shape, with values taken from a stored document."""
+    fields = (*shape.equality, *shape.range)
+    sample = collection.find_one({field: {"$ne": None} for field in fields}, {field: 1 for field in fields}) or {}
+
+    query: Dict[str, Any] = {field: sample.get(field, "") for field in shape.equality}
+    for field in shape.range:
+        query.setdefault(field, {"$gte": sample.get(field, 0)})
+    return query, list(shape.sort)
+
+
+def explain_shape(collection: Collection, shape: QueryShape) -> Dict[str, Any]:
+    """
+    Explain a representative query of a shape.
+
+    Returns:
+        Dictionary with the shape, the index used (None if none), whether the
+        plan scans the collection or sorts in memory, and the examined counts
+    """
+    query, sort = _example_query(collection, shape)
+    cursor = collection.find(query, {"_id": 1})
+    if sort:
+        cursor = cursor.sort(sort)
+    explain = cursor.limit(100).explain()
+
+    winning = explain["queryPlanner"]["winningPlan"]
+    stages = list(_plan_stages(winning.get("queryPlan", winning)))  # slot-based engine nests the plan
+    stats = explain.get("executionStats", {})
+
+    return {
+        "shape": shape.name,
+        "collection": shape.collection,
+        "index": next((stage["indexName"] for stage in stages if stage.get("stage") == "IXSCAN"), None),
+        "collection_scan": any(stage.get("stage") == "COLLSCAN" for stage in stages),
+        "in_memory_sort": any(stage.get("stage") == "SORT" for stage in stages),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned")
+    }
+
+
+def index_usage(collection: Collection, logical_name: str) -> List[Dict[str, Any]]:
+    """
+    Indexes of a collection with their use since the server started ($indexStats).
+
+    Returns:
+        One dictionary per index: name, keys, ops, since, declared and the
+        shapes it serves
+    """
+    declared = {index_name(keys) for keys, _ in derived_indexes(logical_name)}
+    usage = []
+    for row in collection.aggregate([{"$indexStats": {}}]):
+        keys = tuple(row["key"].items())
+        usage.append({
+            "name": row["name"],
+            "keys": index_name(keys),
+            "ops": int(row["accesses"]["ops"]),
+            "since": row["accesses"]["since"],
+            "declared": row["name"] == "_id_" or row["name"] in declared,
+            "serves": shapes_served(logical_name, keys)
+        })
+    return sorted(usage, key=lambda index: index["name"])
+
+
+def index_report(db: Database, skip: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Explain every query shape and read index usage of every registered collection.
+
+    Args:
+        db: MongoDB database
+        skip: Logical collections not stored in MongoDB
+
+    Returns:
+        Dictionary with `shapes` (explain_shape per shape), `indexes`
+        (index_usage per collection) and `warnings` (human-readable flags)
+    """
+    shapes, indexes, warnings = [], {}, []
+
+    for logical_name in COLLECTIONS:
+        if logical_name in skip:
+            continue
+        collection = db[collection_name(logical_name)]
+
+        for shape in QUERY_SHAPES:
+            if shape.collection != logical_name:
+                continue
+            result = explain_shape(collection, shape)
+            shapes.append(result)
+            if result["collection_scan"]:
+                warnings.append(f"{shape.name}: collection scan")
+            elif result["in_memory_sort"]:
+                warnings.append(f"{shape.name}: in-memory sort (index {result['index']})")
+
+        indexes[logical_name] = index_usage(collection, logical_name)
+        for index in indexes[logical_name]:
+            if not index["declared"]:
+                warnings.append(f"{logical_name}.{index['name']}: not derived from any query shape")
+            elif index["ops"] == 0 and index["name"] != "_id_":
+                warnings.append(f"{logical_name}.{index['name']}: unused since {index['since']:%Y-%m-%d %H:%M}")
+
+    return {"shapes": shapes, "indexes": indexes, "warnings": warnings}
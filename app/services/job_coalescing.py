@@ -0,0 +1,290 @@
+"""
+In-flight request coalescing for scraping jobs.
+
+Identical scraping requests (same place and sort order) that arrive while a
+job is still queued or running attach to that job instead of enqueueing a new
+browser session. The in-flight record is a Redis hash that lives as long as
+the job; it holds the job ID and the current review target, so a request for
+more reviews can raise the target of the running job.
+
+The record is claimed before its job exists (admission runs in between), so
+it also holds the claim time: a record whose job cannot be found is pending,
+not stale, for `CLAIM_GRACE_SECONDS` after the claim, and identical requests
+wait for the job to appear instead of clearing the record and enqueueing a
+duplicate.
+"""
+import hashlib
+import logging
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Tuple
+
+from redis import Redis
+from redis.exceptions import WatchError
+from rq.job import Job
+
+from app.config import settings
+from app.services.job_serializer import get_job_serializer
+from app.services.metrics import increment_counter
+from app.services.place_identity import canonical_place_id
+
+
+logger = logging.getLogger(__name__)
+
+
+INFLIGHT_KEY_PREFIX = "scraping:inflight:"
+METRICS_GROUP = "coalescing"
+
+# Job states in which a new request may attach to an existing job
+ATTACHABLE_STATES = {"queued", "started", "deferred", "scheduled"}
+
+# A claimed record without its job is being enqueued for this long (then stale)
+CLAIM_GRACE_SECONDS = 10
+CLAIM_POLL_SECONDS = 0.05
+
+# KEYS: in-flight record; ARGV: job ID, max reviews, claim time, TTL
+# Claims the record with its target and claim time in one step (1), or 0 if taken
+CLAIM_SCRIPT = """
+if redis.call('HSETNX', KEYS[1], 'job_id', ARGV[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'max_reviews', ARGV[2], 'claimed_at', ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+
+def build_coalesce_key(url: str, sort_by: str) -> str:
+    """
+    Build the Redis key that identifies an in-flight scrape.
+
+    Different URLs of the same place share the key.
+
+    Args:
+        url: Google Maps URL
+        sort_by: Sort option
+
+    Returns:
+        Redis key for the in-flight record
+    """
+    identity = f"{canonical_place_id(url)}|{sort_by}"
+    digest = hashlib.sha1(identity.encode("utf-8")).hexdigest()
+    return f"{INFLIGHT_KEY_PREFIX}{digest}"
+
+
+def _inflight_ttl() -> int:
+    """Safety TTL for in-flight records (they are released when the job ends)."""
+    return settings.scraping_max_runtime + settings.job_result_ttl
+
+
+def _claim(redis_conn: Redis, key: str, job_id: str, max_reviews: int, client=None) -> bool:
+    """Claim an in-flight record for a job about to be enqueued (`client` may be a pipeline)."""
+    return bool(redis_conn.register_script(CLAIM_SCRIPT)(
+        keys=[key], args=[job_id, max_reviews, time.time(), _inflight_ttl()], client=client
+    ))
+
+
+def _claim_pending(claimed_at: Optional[bytes]) -> bool:
+    """Whether a record's job may still be being enqueued (records of older versions have no claim time)."""
+    return claimed_at is not None and time.time() - float(claimed_at) < CLAIM_GRACE_SECONDS
+
+
+def _fetch_job(redis_conn: Redis, job_id: str) -> Optional[Job]:
+    """Fetch a job, or None if it does not exist (yet, or any more)."""
+    try:
+        return Job.fetch(job_id, connection=redis_conn, serializer=get_job_serializer())
+    except Exception:
+        return None
+
+
+def _raise_target(redis_conn: Redis, key: str, max_reviews: int) -> bool:
+    """
+    Raise the review target of an in-flight job if the new one is larger.
+
+    Returns:
+        True if the target was raised
+    """
+    with redis_conn.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(key)
+                current = pipe.hget(key, "max_reviews")
+                if current is not None and int(current) >= max_reviews:
+                    pipe.unwatch()
+                    return False
+                pipe.multi()
+                pipe.hset(key, "max_reviews", max_reviews)
+                pipe.execute()
+                return True
+            except WatchError:
+                continue
+
+
+def _release_if_owner(redis_conn: Redis, key: str, job_id: str) -> None:
+    """Delete an in-flight record only if it still points to job_id."""
+    current = redis_conn.hget(key, "job_id")
+    if current is not None and current.decode() == job_id:
+        redis_conn.delete(key)
+
+
+def enqueue_or_attach(
+    redis_conn: Redis,
+    url: str,
+    max_reviews: int,
+    sort_by: str,
+    enqueue: Callable[[str, str], Job]
+) -> Tuple[Job, bool]:
+    """
+    Attach to an identical in-flight job or enqueue a new one.
+
+    Args:
+        redis_conn: Redis connection
+        url: Google Maps URL
+        max_reviews: Requested number of reviews
+        sort_by: Sort option
+        enqueue: Callable (job_id, coalesce_key) -> Job that enqueues the job
+
+    Returns:
+        Tuple (job, coalesced) where coalesced is True if an existing job was reused
+    """
+    key = build_coalesce_key(url, sort_by)
+    deadline = time.monotonic() + CLAIM_GRACE_SECONDS + 1
+
+    while time.monotonic() < deadline:
+        job_id = str(uuid.uuid4())
+
+        if _claim(redis_conn, key, job_id, max_reviews):
+            try:
+                job = enqueue(job_id, key)
+            except Exception:
+                _release_if_owner(redis_conn, key, job_id)
+                raise
+
+            increment_counter(METRICS_GROUP, "misses")
+            return job, False
+
+        existing_id, claimed_at = redis_conn.hmget(key, "job_id", "claimed_at")
+        if existing_id is None:
+            continue
+
+        existing_id = existing_id.decode()
+        job = _fetch_job(redis_conn, existing_id)
+
+        if job is None and _claim_pending(claimed_at):
+            # Another request claimed the record and is still enqueueing its job
+            time.sleep(CLAIM_POLL_SECONDS)
+            continue
+
+        if job is None or job.get_status() not in ATTACHABLE_STATES:
+            # Job finished, failed or expired without releasing its record
+            logger.info(f"Clearing stale in-flight record for job {existing_id}")
+            _release_if_owner(redis_conn, key, existing_id)
+            continue
+
+        if _raise_target(redis_conn, key, max_reviews):
+            logger.info(f"Extended in-flight job {existing_id} to {max_reviews} reviews")
+            increment_counter(METRICS_GROUP, "extended")
+
+        increment_counter(METRICS_GROUP, "hits")
+        return job, True
+
+    raise RuntimeError("Could not claim in-flight record for scraping job")
+
+
+def claim_many(redis_conn: Redis, targets: Dict[str, int]) -> Tuple[Dict[str, str], Dict[str, Job], List[str]]:
+    """
+    Batch version of the claim step of enqueue_or_attach, in pipelined round trips.
+
+    Args:
+        redis_conn: Redis connection
+        targets: In-flight record key -> requested number of reviews
+
+    Returns:
+        Tuple (claimed, attached, stale):
+        - claimed: key -> new job ID; the caller must enqueue these jobs
+        - attached: key -> in-flight job the request was attached to
+        - stale: keys whose record points to a finished job or to a job
+          another request is still enqueueing; the caller should use
+          enqueue_or_attach for them (it waits for a pending job)
+    """
+    keys = list(targets)
+    new_ids = {key: str(uuid.uuid4()) for key in keys}
+
+    with redis_conn.pipeline(transaction=False) as pipe:
+        for key in keys:
+            _claim(redis_conn, key, new_ids[key], targets[key], client=pipe)
+        won = pipe.execute()
+
+    claimed = {key: new_ids[key] for key, ok in zip(keys, won) if ok}
+    others = [key for key, ok in zip(keys, won) if not ok]
+
+    with redis_conn.pipeline(transaction=False) as pipe:
+        for key in others:
+            pipe.hmget(key, "job_id", "max_reviews")
+        records = pipe.execute()
+
+    attached: Dict[str, Job] = {}
+    stale: List[str] = []
+
+    existing = [
+        (key, job_id.decode(), int(current) if current is not None else None)
+        for key, (job_id, current) in zip(others, records)
+        if job_id is not None
+    ]
+    stale.extend(key for key, (job_id, _) in zip(others, records) if job_id is None)
+
+    jobs = Job.fetch_many([job_id for _, job_id, _ in existing], connection=redis_conn,
+                          serializer=get_job_serializer()) if existing else []
+    for (key, job_id, current), job in zip(existing, jobs):
+        if job is None or job.get_status(refresh=False) not in ATTACHABLE_STATES:
+            stale.append(key)
+            continue
+
+        if current is None or current < targets[key]:
+            if _raise_target(redis_conn, key, targets[key]):
+                logger.info(f"Extended in-flight job {job_id} to {targets[key]} reviews")
+                increment_counter(METRICS_GROUP, "extended")
+        attached[key] = job
+
+    if claimed:
+        increment_counter(METRICS_GROUP, "misses", len(claimed))
+    if attached:
+        increment_counter(METRICS_GROUP, "hits", len(attached))
+
+    return claimed, attached, stale
+
+
+def release_claims(redis_conn: Redis, keys: List[str]) -> None:
+    """Delete in-flight records claimed by claim_many whose jobs could not be enqueued."""
+    if keys:
+        redis_conn.delete(*keys)
+
+
+def get_inflight_target(redis_conn: Redis, key: str) -> Optional[int]:
+    """
+    Get the current review target of an in-flight job.
+
+    Args:
+        redis_conn: Redis connection
+        key: In-flight record key
+
+    Returns:
+        Review target, or None if the record does not exist
+    """
+    value = redis_conn.hget(key, "max_reviews")
+    return int(value) if value is not None else None
+
+
+def release_inflight(redis_conn: Redis, key: str, job_id: str) -> None:
+    """
+    Release the in-flight record of a job once it has finished.
+
+    Args:
+        redis_conn: Redis connection
+        key: In-flight record key
+        job_id: ID of the job that owns the record
+    """
+    try:
+        _release_if_owner(redis_conn, key, job_id)
+    except Exception as e:
+        logger.warning(f"Could not release in-flight record {key}: {e}")
@@ -0,0 +1,58 @@
+"""
+Compact serializer for RQ job payloads.
+
+RQ pickles job arguments, meta and results by default. Scraping results are
+lists of review dicts, which pickle stores with every key repeated per review
+and no compression. CompactSerializer encodes payloads as JSON with orjson
+(datetimes become ISO 8601 strings) and zlib-compresses those of at least
+`job_serializer_compress_min_bytes`; small payloads such as job meta stay
+plain JSON, where compression would cost more than it saves.
+
+Payloads are self-describing (zlib streams start with 0x78, pickles with
+0x80, JSON with neither), so jobs pickled before switching to the compact
+serializer can still be read. Every queue, worker and Job.fetch must use the
+serializer returned by get_job_serializer().
+"""
+import pickle
+import zlib
+from typing import Any
+
+import orjson
+from rq.serializers import DefaultSerializer
+
+from app.config import settings
+
+
+PICKLE_PREFIX = b"\x80"
+ZLIB_PREFIX = b"\x78"
+
+
+def _default(value: Any) -> str:
+    # ObjectId and other BSON values
+    return str(value)
+
+
+class CompactSerializer:
+    """RQ serializer: JSON (orjson), zlib-compressed above a size threshold."""
+
+    @staticmethod
+    def dumps(obj: Any) -> bytes:
+        data = orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        if len(data) >= settings.job_serializer_compress_min_bytes:
+            return zlib.compress(data, settings.job_serializer_compress_level)
+        return data
+
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        prefix = data[:1]
+        if prefix == PICKLE_PREFIX:
+            # Enqueued before the compact serializer was enabled
+            return pickle.loads(data)
+        if prefix == ZLIB_PREFIX:
+            data = zlib.decompress(data)
+        return orjson.loads(data)
+
+
+def get_job_serializer():
+    """Serializer of every RQ queue, worker and job according to `job_serializer`."""
+    return CompactSerializer if settings.job_serializer == "compact" else DefaultSerializer
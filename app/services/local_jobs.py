@@ -0,0 +1,457 @@
+"""
+In-process execution of scraping jobs (EXECUTION_MODE=local).
+
+Small single-node installs can run the API and the scraper in one process
+without Redis or a separate worker: jobs run on a bounded thread pool of
+`local_workers` threads, each keeping its own warm browser (see
+app.services.browser_pool), and live in an in-memory registry for
+`job_result_ttl` seconds after they end.
+
+LocalJob exposes the part of the rq.job.Job interface the scraping API
+reads, so /api/scraping/* answers the same way in both modes: identical
+requests attach to the in-flight job, `max_age` reuses recent scrapes,
+batches are supported and new jobs are rejected (429) once
+`local_max_queued` jobs are waiting.
+
+Without RQ's death-penalty alarm, stalls and overruns are caught between
+scrolls and, for a call that hangs (e.g. a navigation that never returns), by
+a reaper thread that fails the job from outside once it went
+`scraping_stall_timeout` seconds without progress or past
+`scraping_max_runtime`: its status and error are reported and identical
+requests start a new job. Python cannot interrupt the blocked thread (nor
+close a Playwright browser from another one), so that pool thread stays busy
+until the call returns; its result is then discarded. Until then it counts as
+a busy worker in estimates and /workers/status.
+
+Jobs are lost when the process restarts and failed jobs are not retried;
+monitoring checks and the dead-letter registry need the queue mode. Nothing
+on the scraping and save path uses Redis in this mode (see
+app.database.redis_enabled); with REVIEW_STORAGE=sqlite neither does it use
+MongoDB.
+"""
+import logging
+import threading
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Any, Optional, Set, Tuple
+
+from rq.timeouts import JobTimeoutException
+
+from app.config import settings
+from app.services import batch_jobs
+from app.services.admission import AdmissionRejected, estimate
+from app.services.browser_pool import discard_warm_scraper
+from app.services.job_coalescing import build_coalesce_key
+from app.services.scraper_service import scrape_reviews
+from app.services.scraping_errors import classify_failure
+from app.tasks.watchdog import ProgressWatchdog
+
+
+logger = logging.getLogger(__name__)
+
+
+REAP_INTERVAL = 5.0  # seconds between checks for stalled or overrunning jobs
+
+
+class LocalJob:
+    """Scraping job run in this process."""
+
+    def __init__(self, url: str, max_reviews: int, sort_by: str, coalesce_key: Optional[str] = None):
+        self.id = str(uuid.uuid4())
+        self.kwargs = {"url": url, "max_reviews": max_reviews, "sort_by": sort_by}
+        self.coalesce_key = coalesce_key
+        self.target = max_reviews  # raised by identical requests while in flight
+        self.meta: Dict[str, Any] = {}
+        self.status = "queued"
+        self.result: Optional[Dict[str, Any]] = None
+        self.exc_info: Optional[str] = None
+        self.created_at = self.enqueued_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.ended_at: Optional[datetime] = None
+        self.future: Optional[Future] = None
+        self.watchdog: Optional[ProgressWatchdog] = None  # set when the job starts
+
+    def get_status(self, refresh: bool = True) -> str:
+        return self.status
+
+    @property
+    def is_queued(self) -> bool:
+        return self.status == "queued"
+
+    @property
+    def is_started(self) -> bool:
+        return self.status == "started"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status == "finished"
+
+    @property
+    def is_failed(self) -> bool:
+        return self.status == "failed"
+
+    def cancel(self):
+        """Cancel the job if it has not started."""
+        if self.future is not None and self.future.cancel():
+            self.status = "canceled"
+            self.ended_at = datetime.utcnow()
+
+
+class LocalJobRegistry:
+    """Thread pool plus the in-memory registry of its jobs and batches."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scrape")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, LocalJob]" = OrderedDict()
+        self._inflight: Dict[str, str] = {}  # coalesce key -> job ID
+        self._batches: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._durations: Deque[float] = deque(maxlen=settings.admission_duration_samples)
+        self._overrun: Set[str] = set()  # jobs failed by the reaper whose thread has not returned
+        self._stop = threading.Event()
+        self._reaper = threading.Thread(target=self._reap_loop, name="scrape-reaper", daemon=True)
+        self._reaper.start()
+
+    # ===== REGISTRY =====
+
+    def _prune(self):
+        """Drop jobs ended more than `job_result_ttl` ago and expired batches (lock held)."""
+        now = datetime.utcnow()
+        job_expiry = now - timedelta(seconds=settings.job_result_ttl)
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.ended_at and job.ended_at < job_expiry]:
+            del self._jobs[job_id]
+
+        batch_expiry = (now - timedelta(seconds=settings.batch_ttl)).isoformat()
+        while self._batches and next(iter(self._batches.values()))["created_at"] < batch_expiry:
+            self._batches.popitem(last=False)
+
+    def get(self, job_id: str) -> Optional[LocalJob]:
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def add_finished(self, url: str, max_reviews: int, sort_by: str, reviews: List[Dict]) -> LocalJob:
+        """Register an already finished job holding reviews of a recent scrape (see max_age)."""
+        job = LocalJob(url, max_reviews, sort_by)
+        job.status = "finished"
+        job.started_at = job.ended_at = job.created_at
+        job.meta = {"served_from_cache": True, "progress": f"Completed: {len(reviews)} reviews (cached)"}
+        job.result = {
+            "status": "success",
+            "reviews_count": len(reviews),
+            "reviews": reviews,
+            "started_at": job.created_at.isoformat(),
+            "finished_at": job.created_at.isoformat(),
+            "duration_seconds": 0.0,
+            "served_from_cache": True
+        }
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    # ===== CAPACITY =====
+
+    def _snapshot(self) -> Dict[str, Any]:
+        """Same numbers as admission.capacity_snapshot, for the local pool (lock held)."""
+        statuses = [job.status for job in self._jobs.values()]
+        durations = list(self._durations)
+        return {
+            "queued_jobs": statuses.count("queued"),
+            "workers": self.workers,
+            "busy_workers": min(statuses.count("started") + len(self._overrun), self.workers),
+            "avg_job_seconds": round(sum(durations) / len(durations), 3) if durations else float(settings.admission_default_job_seconds)
+        }
+
+    def capacity_snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return self._snapshot()
+
+    def _admit(self, new_jobs: int, batch: bool = False) -> Dict[str, Any]:
+        """
+        Estimate of new jobs, or AdmissionRejected past `local_max_queued`
+        (`admission_batch_max_queue_depth` for batches) waiting jobs (lock held).
+        """
+        snapshot = self._snapshot()
+        max_queued = settings.admission_batch_max_queue_depth if batch else settings.local_max_queued
+        if new_jobs and snapshot["queued_jobs"] + new_jobs > max_queued:
+            raise AdmissionRejected(
+                f"Scraping queue is full: {new_jobs} new jobs requested, "
+                f"{snapshot['queued_jobs']} of {max_queued} already waiting",
+                retry_after=max(int(snapshot["avg_job_seconds"] * new_jobs / self.workers), 1)
+            )
+        return estimate(snapshot)
+
+    # ===== SUBMISSION =====
+
+    def _coalesce_key(self, url: str, sort_by: str) -> Optional[str]:
+        return build_coalesce_key(url, sort_by) if settings.job_coalescing_enabled else None
+
+    def _inflight_job(self, key: Optional[str]) -> Optional[LocalJob]:
+        """Queued or running job of a coalesce key (lock held)."""
+        job = self._jobs.get(self._inflight.get(key)) if key else None
+        return job if job is not None and job.status in ("queued", "started") else None
+
+    def _attach_or_create(self, url: str, max_reviews: int, sort_by: str) -> Tuple[LocalJob, bool]:
+        """In-flight job of the same place and order, or a new unscheduled job (lock held)."""
+        key = self._coalesce_key(url, sort_by)
+        existing = self._inflight_job(key)
+
+        if existing is not None:
+            if max_reviews > existing.target:
+                logger.info(f"Extended in-flight job {existing.id} to {max_reviews} reviews")
+                existing.target = max_reviews
+            return existing, True
+
+        job = LocalJob(url, max_reviews, sort_by, coalesce_key=key)
+        self._jobs[job.id] = job
+        if key:
+            self._inflight[key] = job.id
+        return job, False
+
+    def _schedule(self, job: LocalJob):
+        job.future = self._executor.submit(self._run, job)
+
+    def submit(self, url: str, max_reviews: int, sort_by: str) -> Tuple[LocalJob, bool, Dict[str, Any]]:
+        """
+        Attach to an identical in-flight job or schedule a new one.
+
+        Returns:
+            Tuple (job, coalesced, estimate); estimate is empty for attached requests
+
+        Raises:
+            AdmissionRejected: `local_max_queued` jobs are already waiting
+        """
+        with self._lock:
+            self._prune()
+            new = self._inflight_job(self._coalesce_key(url, sort_by)) is None
+            result = self._admit(1) if new else {}
+            job, coalesced = self._attach_or_create(url, max_reviews, sort_by)
+
+        if not coalesced:
+            self._schedule(job)
+        return job, coalesced, result
+
+    def submit_batch(self, urls: List[str], max_reviews: int, sort_by: str) -> Dict[str, Any]:
+        """Local version of batch_jobs.submit_batch (same record)."""
+        with self._lock:
+            self._prune()
+            if settings.job_coalescing_enabled:
+                keys = {self._coalesce_key(url, sort_by) for url in urls}
+                self._admit(sum(1 for key in keys if self._inflight_job(key) is None), batch=True)
+            else:
+                self._admit(len(urls), batch=True)
+
+            entries = []
+            new_jobs = []
+            for url in urls:
+                job, coalesced = self._attach_or_create(url, max_reviews, sort_by)
+                if not coalesced:
+                    new_jobs.append(job)
+                entries.append({"url": url, "job_id": job.id, "coalesced": coalesced})
+
+            record = {
+                "batch_id": str(uuid.uuid4()),
+                "created_at": datetime.utcnow().isoformat(),
+                "max_reviews": max_reviews,
+                "sort_by": sort_by,
+                "jobs": entries
+            }
+            self._batches[record["batch_id"]] = record
+
+        for job in new_jobs:
+            self._schedule(job)
+        return record
+
+    def get_batch_status(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        """Local version of batch_jobs.get_batch_status (same summary)."""
+        with self._lock:
+            self._prune()
+            record = self._batches.get(batch_id)
+            if record is None:
+                return None
+            jobs = {entry["job_id"]: self._jobs.get(entry["job_id"]) for entry in record["jobs"]}
+        return batch_jobs.summarize_batch(record, jobs)
+
+    # ===== EXECUTION =====
+
+    def _run(self, job: LocalJob):
+        """Scrape a job on a pool thread; mirrors scrape_reviews_task without RQ."""
+        watchdog = ProgressWatchdog(job.id)
+        with self._lock:
+            job.watchdog = watchdog
+            job.status = "started"
+            job.started_at = datetime.utcnow()
+        job.meta.update(status='processing', progress='Initializing scraper...', started_at=job.started_at.isoformat())
+        url, sort_by = job.kwargs["url"], job.kwargs["sort_by"]
+
+        # Without RQ's death-penalty alarm, stalls and overruns are caught between
+        # scrolls here and by the reaper while a call hangs
+        def on_scroll(reviews_so_far: int, scrolls: int) -> Optional[int]:
+            watchdog.beat(reviews_so_far)
+            if job.status != "started":
+                raise JobTimeoutException("Job was already failed by the reaper")
+            if watchdog.stalled or watchdog.elapsed > settings.scraping_max_runtime:
+                raise JobTimeoutException(f"Job exceeded maximum runtime or stalled at {reviews_so_far} reviews")
+            job.meta['progress'] = f'Extracting reviews... {reviews_so_far}/{job.target}'
+            return job.target
+
+        try:
+            reviews = scrape_reviews(url=url, max_reviews=job.target, sort_by=sort_by, on_scroll=on_scroll)
+        except Exception as e:
+            stalled = isinstance(e, JobTimeoutException) and watchdog.stalled
+            error_msg = self._stall_message(watchdog) if stalled else str(e)
+            if self._fail(job, error_msg, classify_failure(e).value):
+                watchdog.record_outcome(aborted=stalled)
+                logger.error(f"[Job {job.id}] Scraping failed: {error_msg}", exc_info=True)
+        else:
+            if self._finish(job, reviews):
+                watchdog.record_outcome(aborted=False)
+                logger.info(f"[Job {job.id}] Scraping completed: {len(reviews)} reviews")
+        finally:
+            with self._lock:
+                if job.id in self._overrun:
+                    self._overrun.discard(job.id)
+                    logger.warning(f"[Job {job.id}] Blocked call returned after the job was failed; result discarded")
+                self._durations.append((datetime.utcnow() - job.started_at).total_seconds())
+                self._release(job)
+
+    @staticmethod
+    def _stall_message(watchdog: ProgressWatchdog) -> str:
+        return (f"Scraping stalled: no new reviews for {settings.scraping_stall_timeout}s "
+                f"({watchdog.progress} reviews collected)")
+
+    def _release(self, job: LocalJob):
+        """Let identical requests start a new job (lock held)."""
+        if job.coalesce_key and self._inflight.get(job.coalesce_key) == job.id:
+            del self._inflight[job.coalesce_key]
+
+    def _finish(self, job: LocalJob, reviews: List[Dict]) -> bool:
+        """Record the result of a job, unless the reaper already failed it."""
+        with self._lock:
+            if job.status != "started":
+                return False
+            job.ended_at = datetime.utcnow()
+            job.result = {
+                "status": "success",
+                "reviews_count": len(reviews),
+                "reviews": reviews,
+                "started_at": job.started_at.isoformat(),
+                "finished_at": job.ended_at.isoformat(),
+                "duration_seconds": (job.ended_at - job.started_at).total_seconds()
+            }
+            job.meta.update(status='completed', progress=f'Completed: {len(reviews)} reviews',
+                            finished_at=job.ended_at.isoformat())
+            job.status = "finished"
+        return True
+
+    def _fail(self, job: LocalJob, error_msg: str, failure_class: str) -> bool:
+        """Mark a job failed, unless it already ended (e.g. failed by the reaper)."""
+        with self._lock:
+            if job.status != "started":
+                return False
+            job.ended_at = datetime.utcnow()
+            job.exc_info = error_msg
+            job.meta.update(status='failed', error=error_msg, failure_class=failure_class,
+                            finished_at=job.ended_at.isoformat())
+            job.status = "failed"
+        return True
+
+    def _reap(self):
+        """Fail started jobs past their stall window or the runtime ceiling, from outside their thread."""
+        with self._lock:
+            overdue = [
+                job for job in self._jobs.values()
+                if job.status == "started" and job.watchdog is not None
+                and (job.watchdog.stalled or job.watchdog.elapsed > settings.scraping_max_runtime)
+            ]
+
+        for job in overdue:
+            stalled = job.watchdog.stalled
+            error_msg = (self._stall_message(job.watchdog) if stalled
+                         else f"Job exceeded maximum runtime of {settings.scraping_max_runtime}s")
+            timeout = JobTimeoutException(error_msg)
+            if not self._fail(job, error_msg, classify_failure(timeout).value):
+                continue
+
+            with self._lock:
+                self._overrun.add(job.id)
+                self._release(job)
+            job.watchdog.record_outcome(aborted=stalled)
+            logger.error(f"[Job {job.id}] {error_msg}; its thread is blocked and stays busy until the call returns")
+
+    def _reap_loop(self):
+        while not self._stop.wait(REAP_INTERVAL):
+            try:
+                self._reap()
+            except Exception as e:
+                logger.error(f"Local job reaper failed: {e}", exc_info=True)
+
+    # ===== LIFECYCLE =====
+
+    def workers_status(self) -> Dict[str, Any]:
+        """Counterpart of GET /api/scraping/workers/status for the local pool."""
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "execution_mode": "local",
+            "total_workers": self.workers,
+            "queued_jobs": statuses.count("queued"),
+            "started_jobs": statuses.count("started"),
+            "finished_jobs": statuses.count("finished"),
+            "failed_jobs": statuses.count("failed"),
+            "overrun_jobs": len(self._overrun),  # failed by timeout, thread still blocked
+            "max_queued_jobs": settings.local_max_queued
+        }
+
+    def shutdown(self):
+        """Cancel waiting jobs, then close the warm browser of every pool thread."""
+        self._stop.set()
+        with self._lock:
+            waiting = [job for job in self._jobs.values() if job.status == "queued"]
+        for job in waiting:
+            job.cancel()
+
+        # One task per thread: each blocks on the barrier until all threads hold one
+        barrier = threading.Barrier(self.workers)
+
+        def close_browser():
+            try:
+                barrier.wait(timeout=settings.supervisor_drain_timeout)
+            except threading.BrokenBarrierError:
+                pass
+            discard_warm_scraper()
+
+        for _ in range(self.workers):
+            self._executor.submit(close_browser)
+        self._executor.shutdown(wait=False)
+
+
+_registry: Optional[LocalJobRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def local_mode() -> bool:
+    """Whether jobs run in this process instead of RQ workers."""
+    return settings.execution_mode == "local"
+
+
+def get_registry() -> LocalJobRegistry:
+    """Registry of this process (created on first use)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LocalJobRegistry(settings.local_workers)
+            logger.info(f"Local execution mode: {settings.local_workers} scraping threads")
+        return _registry
+
+
+def shutdown_registry():
+    """Stop the local registry if it was started."""
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.shutdown()
+            _registry = None
@@ -0,0 +1,97 @@
+"""
+Lightweight operational counters stored in Redis hashes.
+
+Each metrics group (e.g. "coalescing") is a single Redis hash so that API
+processes and workers share the same numbers. Recording a metric must never
+break the code path that records it, so write helpers swallow errors. In
+local execution mode (no Redis) nothing is recorded and groups read empty.
+"""
+import logging
+from typing import Dict, Union
+
+from app.database import get_redis_client, redis_enabled
+
+
+logger = logging.getLogger(__name__)
+
+
+METRICS_KEY_PREFIX = "metrics:"
+
+Number = Union[int, float]
+
+
+def _metrics_key(group: str) -> str:
+    """Build the Redis key that holds a metrics group."""
+    return f"{METRICS_KEY_PREFIX}{group}"
+
+
+def increment_counter(group: str, name: str, amount: Number = 1) -> None:
+    """
+    Increment a counter inside a metrics group.
+
+    Args:
+        group: Metrics group (one Redis hash per group)
+        name: Counter name inside the group
+        amount: Increment (int or float)
+    """
+    if not redis_enabled():
+        return
+
+    try:
+        redis_conn = get_redis_client()
+        if isinstance(amount, float):
+            redis_conn.hincrbyfloat(_metrics_key(group), name, amount)
+        else:
+            redis_conn.hincrby(_metrics_key(group), name, amount)
+    except Exception as e:
+        logger.debug(f"Could not record metric {group}.{name}: {e}")
+
+
+def _parse_number(value: bytes) -> Number:
+    """Parse a counter value returned by Redis."""
+    text = value.decode() if isinstance(value, bytes) else str(value)
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def get_counters(group: str) -> Dict[str, Number]:
+    """
+    Get all counters of a metrics group.
+
+    Args:
+        group: Metrics group
+
+    Returns:
+        Dictionary of counter name -> value (empty if the group has no data)
+    """
+    if not redis_enabled():
+        return {}
+
+    redis_conn = get_redis_client()
+    raw = redis_conn.hgetall(_metrics_key(group))
+    return {
+        (name.decode() if isinstance(name, bytes) else name): _parse_number(value)
+        for name, value in raw.items()
+    }
+
+
+def hit_ratio(counters: Dict[str, Number]) -> Dict[str, Number]:
+    """
+    Summarize hit/miss counters with a hit ratio.
+
+    Args:
+        counters: Counters containing "hits" and "misses"
+
+    Returns:
+        Dictionary with hits, misses and hit_ratio
+    """
+    hits = counters.get("hits", 0)
+    misses = counters.get("misses", 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else 0.0
+    }
@@ -0,0 +1,167 @@
+"""
+Persistent monitoring scheduler.
+
+Instead of one big sweep over every place, each place carries its own
+`next_check_at` in MongoDB (indexed together with `monitoring_enabled`). An
+APScheduler job ticks every `monitor_tick_seconds` and enqueues a small batch
+of due places on the monitoring queue, so checks are spread over time and
+worker load stays level. The schedule lives in MongoDB, so restarting the API
+loses nothing: the next tick picks up whatever became due meanwhile.
+
+A place is claimed with find_one_and_update, pushing its `next_check_at`
+forward by a lease, so several API replicas never enqueue the same place
+twice; monitor_place sets the real next check when it finishes. A check that
+fails before that is retried when the lease expires.
+"""
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from pymongo import ASCENDING, ReturnDocument
+
+from app.config import settings
+from app.database import get_places_collection, get_redis_client
+from app.queues import QueueTier, get_queue
+
+
+logger = logging.getLogger(__name__)
+
+
+# Referenced by path: importing the monitor task pulls in the scraper
+MONITOR_TASK = "app.tasks.monitor_task.monitor_place"
+TICK_JOB_ID = "monitor_tick"
+
+_scheduler: Optional[BackgroundScheduler] = None
+
+
+def _due_filter(now: datetime) -> Dict[str, Any]:
+    return {"monitoring_enabled": True, "next_check_at": {"$lte": now}}
+
+
+def spread_new_places(now: Optional[datetime] = None) -> int:
+    """
+    Give places that were never scheduled a random first check.
+
+    New places are spread uniformly over one default interval rather than all
+    being checked on the next tick.
+
+    Returns:
+        Number of places scheduled
+    """
+    now = now or datetime.utcnow()
+    places_collection = get_places_collection()
+    scheduled = 0
+
+    for place in places_collection.find(
+        {"monitoring_enabled": True, "next_check_at": None},
+        {"_id": 1}
+    ):
+        offset = random.uniform(0, settings.default_check_interval)
+        places_collection.update_one(
+            {"_id": place["_id"], "next_check_at": None},
+            {"$set": {"next_check_at": now + timedelta(minutes=offset)}}
+        )
+        scheduled += 1
+
+    if scheduled:
+        logger.info(f"Scheduled first check of {scheduled} new places")
+    return scheduled
+
+
+def claim_due_place(now: datetime) -> Optional[Dict[str, Any]]:
+    """
+    Atomically take the most overdue place and push its next check past the lease.
+
+    Returns:
+        Place document, or None if no place is due
+    """
+    lease = timedelta(seconds=settings.scraping_max_runtime)
+    return get_places_collection().find_one_and_update(
+        _due_filter(now),
+        {"$set": {"next_check_at": now + lease, "last_enqueued_at": now}},
+        sort=[("next_check_at", ASCENDING)],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def enqueue_due_places() -> int:
+    """
+    Enqueue up to `monitor_batch_size` due places on the monitoring queue.
+
+    Skips the tick while the monitoring queue already holds
+    `monitor_max_queued` jobs, so a backlog is not made worse.
+
+    Returns:
+        Number of places enqueued
+    """
+    queue = get_queue(QueueTier.MONITORING, connection=get_redis_client())
+
+    waiting = queue.count
+    if waiting >= settings.monitor_max_queued:
+        logger.info(f"Monitoring queue has {waiting} waiting jobs, skipping tick")
+        return 0
+
+    now = datetime.utcnow()
+    spread_new_places(now)
+
+    batch = min(settings.monitor_batch_size, settings.monitor_max_queued - waiting)
+    enqueued = 0
+
+    for _ in range(batch):
+        place = claim_due_place(now)
+        if place is None:
+            break
+
+        queue.enqueue(
+            MONITOR_TASK,
+            place,
+            job_timeout=settings.scraping_max_runtime,
+            result_ttl=settings.job_result_ttl
+        )
+        enqueued += 1
+
+    if enqueued:
+        logger.info(f"Enqueued {enqueued} monitoring checks")
+    return enqueued
+
+
+def _tick():
+    try:
+        enqueue_due_places()
+    except Exception as e:
+        logger.error(f"Monitoring scheduler tick failed: {e}", exc_info=True)
+
+
+def start_scheduler() -> BackgroundScheduler:
+    """Start the monitoring scheduler in this process (idempotent)."""
+    global _scheduler
+    if _scheduler is not None and _scheduler.running:
+        return _scheduler
+
+    _scheduler = BackgroundScheduler(timezone="UTC")
+    _scheduler.add_job(
+        _tick,
+        "interval",
+        seconds=settings.monitor_tick_seconds,
+        id=TICK_JOB_ID,
+        max_instances=1,
+        coalesce=True,
+        next_run_time=datetime.utcnow()
+    )
+    _scheduler.start()
+
+    logger.info(f"Monitoring scheduler started (tick every {settings.monitor_tick_seconds}s, "
+                f"batches of {settings.monitor_batch_size})")
+    return _scheduler
+
+
+def stop_scheduler():
+    """Stop the monitoring scheduler if it is running."""
+    global _scheduler
+    if _scheduler is not None and _scheduler.running:
+        _scheduler.shutdown(wait=False)
+        logger.info("Monitoring scheduler stopped")
+    _scheduler = None
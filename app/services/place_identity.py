@@ -0,0 +1,131 @@
+"""
+Canonical place identity extracted from Google Maps URLs.
+
+Different URLs for the same place vary in viewport (@lat,lng,zoom), search
+context and tracking parameters (g_ep, entry). The feature ID embedded in the
+data segment (!1s0x...:0x...) is stable, so it is used as the canonical
+`place_id`. URLs without it fall back to a Google place ID query parameter,
+then to name + pin coordinates (!3d/!4d), then to a hash of the normalized
+URL without its viewport. Viewport coordinates (@lat,lng) depend on where the
+map was panned, so they never take part in the place_id.
+"""
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import unquote_plus, urlsplit, parse_qs
+
+
+_FEATURE_ID_RE = re.compile(r"!1s(0x[0-9a-fA-F]+:0x[0-9a-fA-F]+)")
+_PIN_COORDS_RE = re.compile(r"!3d(-?\d+(?:\.\d+)?)!4d(-?\d+(?:\.\d+)?)")
+_VIEWPORT_COORDS_RE = re.compile(r"/@(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)")
+_VIEWPORT_SEGMENT_RE = re.compile(r"/@[^/]*")
+_PLACE_NAME_RE = re.compile(r"/maps/place/([^/@?]+)")
+_QUERY_PLACE_ID_PARAMS = ("query_place_id", "place_id")
+
+
+@dataclass(frozen=True)
+class PlaceIdentity:
+    """Identity of a place extracted from a Google Maps URL."""
+    place_id: str
+    feature_id: Optional[str] = None
+    name: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+def _extract_coordinates(url: str):
+    """
+    Get place coordinates, preferring the pin (!3d/!4d) over the viewport (@).
+
+    Returns:
+        Tuple (latitude, longitude, pinned); pinned is False for viewport coordinates
+    """
+    # The last pin in the data segment belongs to the place itself
+    pins = _PIN_COORDS_RE.findall(url)
+    if pins:
+        lat, lng = pins[-1]
+        return float(lat), float(lng), True
+
+    match = _VIEWPORT_COORDS_RE.search(url)
+    if match:
+        return float(match.group(1)), float(match.group(2)), False
+
+    return None, None, False
+
+
+def _extract_query_place_id(url: str) -> Optional[str]:
+    """Get a Google place ID (ChIJ...) passed as a query parameter."""
+    query = urlsplit(url).query
+    if not query:
+        return None
+
+    params = parse_qs(query)
+    for name in _QUERY_PLACE_ID_PARAMS:
+        if params.get(name):
+            return params[name][0]
+
+    # Search URLs use q=place_id:ChIJ...
+    for value in params.get("q", []):
+        if value.startswith("place_id:"):
+            return value[len("place_id:"):]
+
+    return None
+
+
+@lru_cache(maxsize=4096)
+def canonicalize_maps_url(url: str) -> PlaceIdentity:
+    """
+    Extract the canonical identity of the place behind a Google Maps URL.
+
+    Args:
+        url: Google Maps URL
+
+    Returns:
+        PlaceIdentity with a stable place_id
+    """
+    url = url.strip()
+
+    # Like the pin, the last feature ID in the data segment belongs to the place itself
+    feature_ids = _FEATURE_ID_RE.findall(url)
+    feature_id = feature_ids[-1].lower() if feature_ids else None
+
+    name_match = _PLACE_NAME_RE.search(url)
+    name = unquote_plus(name_match.group(1)) if name_match else None
+
+    latitude, longitude, pinned = _extract_coordinates(url)
+
+    if feature_id:
+        place_id = feature_id
+    else:
+        place_id = _extract_query_place_id(url)
+
+    if not place_id and name and pinned:
+        place_id = f"{name.lower()}@{latitude:.5f},{longitude:.5f}"
+
+    if not place_id:
+        parts = urlsplit(url)
+        normalized = parts._replace(path=_VIEWPORT_SEGMENT_RE.sub("", parts.path), query="", fragment="").geturl()
+        place_id = "url:" + hashlib.sha1(normalized.encode("utf-8")).hexdigest()
+
+    return PlaceIdentity(
+        place_id=place_id,
+        feature_id=feature_id,
+        name=name,
+        latitude=latitude,
+        longitude=longitude
+    )
+
+
+def canonical_place_id(url: str) -> str:
+    """
+    Get the canonical place ID for a Google Maps URL.
+
+    Args:
+        url: Google Maps URL
+
+    Returns:
+        Stable place ID
+    """
+    return canonicalize_maps_url(url).place_id
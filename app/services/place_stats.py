@@ -0,0 +1,183 @@
+"""
+Incrementally maintained per-place review statistics.
+
+One `place_stats` document per place holds the review count, rating
+histogram, rating sum and last review date, so counts and averages are a
+single indexed read instead of a count or aggregation over reviews:
+
+    {
+        "place_id": "...",
+        "total_reviews": 120,
+        "rated_reviews": 118,
+        "rating_sum": 512.0,
+        "rating_histogram": {"1": 4, "2": 3, "3": 10, "4": 31, "5": 70},
+        "last_review_date": datetime,
+        "updated_at": datetime
+    }
+
+save_reviews_to_db applies one bulk write of `$inc` upserts for the reviews
+it has just inserted (MongoDB bulk writes cannot span collections, so it
+follows the reviews insert instead of sharing it). Review deletions apply
+the opposite increments. rebuild_place_stats recomputes everything from the
+reviews collection to repair any drift.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+from pymongo import UpdateOne, ReplaceOne
+from pymongo.collection import Collection
+
+from app.config import settings
+from app.database import get_database, get_reviews_collection
+from app.services.review_repository import ReviewFilter, get_review_repository, mongodb_storage
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_place_stats_collection() -> Collection:
+    """Get place_stats collection."""
+    return get_database()[settings.mongodb_place_stats_collection]
+
+
+def _star(rating) -> Optional[str]:
+    """Histogram bucket of a rating ("1".."5"), or None if unrated."""
+    if rating is None:
+        return None
+    return str(min(max(int(round(float(rating))), 1), 5))
+
+
+def _increments(reviews: List[Dict[str, Any]], sign: int = 1) -> Dict[str, Dict[str, Any]]:
+    """Per-place $inc/$max documents for a set of reviews."""
+    per_place: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"inc": defaultdict(float), "last": None})
+
+    for review in reviews:
+        place_id = review.get("place_id")
+        if not place_id:
+            continue
+
+        stats = per_place[place_id]
+        stats["inc"]["total_reviews"] += sign
+
+        star = _star(review.get("rating"))
+        if star is not None:
+            stats["inc"]["rated_reviews"] += sign
+            stats["inc"]["rating_sum"] += sign * float(review["rating"])
+            stats["inc"][f"rating_histogram.{star}"] += sign
+
+        review_date = review.get("review_date")
+        if sign > 0 and review_date and (stats["last"] is None or review_date > stats["last"]):
+            stats["last"] = review_date
+
+    return per_place
+
+
+def apply_inserted_reviews(reviews: List[Dict[str, Any]]) -> int:
+    """
+    Add newly inserted reviews to their places' stats in one bulk write.
+
+    Args:
+        reviews: Review documents that were just inserted
+
+    Returns:
+        Number of places updated
+    """
+    now = datetime.utcnow()
+    operations = []
+
+    for place_id, stats in _increments(reviews).items():
+        inc = {field: (int(value) if field != "rating_sum" else value) for field, value in stats["inc"].items()}
+        update = {"$inc": inc, "$set": {"updated_at": now}}
+        if stats["last"] is not None:
+            update["$max"] = {"last_review_date": stats["last"]}
+        operations.append(UpdateOne({"place_id": place_id}, update, upsert=True))
+
+    if operations:
+        get_place_stats_collection().bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+def apply_deleted_review(review: Dict[str, Any]):
+    """
+    Remove a deleted review from its place's stats.
+
+    last_review_date is left as is; rebuild_place_stats corrects it.
+    """
+    for place_id, stats in _increments([review], sign=-1).items():
+        inc = {field: (int(value) if field != "rating_sum" else value) for field, value in stats["inc"].items()}
+        get_place_stats_collection().update_one(
+            {"place_id": place_id},
+            {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}}
+        )
+
+
+def get_review_count(place_id: str) -> int:
+    """Number of stored reviews of a place (O(1) read; counted in the repository with SQLite storage)."""
+    if not mongodb_storage():
+        return get_review_repository().count(ReviewFilter(place_id=place_id))
+    stats = get_place_stats_collection().find_one({"place_id": place_id}, {"_id": 0, "total_reviews": 1})
+    return stats.get("total_reviews", 0) if stats else 0
+
+
+def rebuild_place_stats(place_id: Optional[str] = None) -> int:
+    """
+    Recompute place stats from the reviews collection.
+
+    Args:
+        place_id: Rebuild only this place (default: every place)
+
+    Returns:
+        Number of places rebuilt
+    """
+    match = {"place_id": place_id} if place_id else {"place_id": {"$nin": [None, ""]}}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"place_id": "$place_id", "rating": "$rating"},
+            "count": {"$sum": 1},
+            "last_review_date": {"$max": "$review_date"}
+        }}
+    ]
+
+    now = datetime.utcnow()
+    rebuilt: Dict[str, Dict[str, Any]] = {}
+
+    for row in get_reviews_collection().aggregate(pipeline, allowDiskUse=True):
+        pid = row["_id"]["place_id"]
+        rating = row["_id"].get("rating")
+        stats = rebuilt.setdefault(pid, {
+            "place_id": pid,
+            "total_reviews": 0,
+            "rated_reviews": 0,
+            "rating_sum": 0.0,
+            "rating_histogram": {},
+            "last_review_date": None,
+            "updated_at": now
+        })
+
+        stats["total_reviews"] += row["count"]
+        star = _star(rating)
+        if star is not None:
+            stats["rated_reviews"] += row["count"]
+            stats["rating_sum"] += float(rating) * row["count"]
+            stats["rating_histogram"][star] = stats["rating_histogram"].get(star, 0) + row["count"]
+
+        last = row.get("last_review_date")
+        if last and (stats["last_review_date"] is None or last > stats["last_review_date"]):
+            stats["last_review_date"] = last
+
+    collection = get_place_stats_collection()
+    operations = [ReplaceOne({"place_id": pid}, stats, upsert=True) for pid, stats in rebuilt.items()]
+    if operations:
+        collection.bulk_write(operations, ordered=False)
+
+    # Places whose reviews are all gone (not rewritten above)
+    if place_id is None:
+        collection.delete_many({"updated_at": {"$lt": now}})
+    elif not rebuilt:
+        collection.delete_one({"place_id": place_id})
+
+    logger.info(f"Rebuilt stats of {len(rebuilt)} places")
+    return len(rebuilt)
@@ -0,0 +1,223 @@
+"""
+Redis hot cache of the most recent reviews.
+
+GET /api/reviews/recent/all used to sort the reviews collection by
+retrieval_date on every call. Instead, save_reviews_to_db adds every review
+it inserts to capped Redis sorted sets (score: retrieval_date), one for all
+reviews and one per client and per place that was read recently, and the
+endpoint reads the newest entries with ZREVRANGE.
+
+A sorted set only becomes authoritative once it has been warmed from
+MongoDB (its `:warm` marker key then exists): the first read of a cold
+scope falls back to MongoDB and fills the sorted set with the newest
+`recent_reviews_cache_size` reviews. Client and place sets are only warmed
+by reads and expire `recent_reviews_scope_ttl` seconds after the last one,
+so memory follows the scopes actually queried rather than every place;
+inserts skip cold client and place sets. rebuild_recent_reviews drops every
+sorted set and warms the global one again.
+
+Members are the JSON summaries returned by the API (the public review
+fields), so reads need no further lookup.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
+
+import orjson
+
+from app.config import settings
+from app.database import get_redis_client
+from app.services.review_repository import ReviewFilter, get_review_repository
+from app.services.review_serialization import REVIEW_FIELDS, review_to_dict
+
+
+logger = logging.getLogger(__name__)
+
+
+KEY_PREFIX = "recent:reviews:"
+WARM_SUFFIX = ":warm"
+
+
+def scope_key(client_id: Optional[str] = None, place_id: Optional[str] = None) -> str:
+    """Sorted set of a scope: one place, one client or every review."""
+    if place_id:
+        return f"{KEY_PREFIX}place:{place_id}"
+    if client_id:
+        return f"{KEY_PREFIX}client:{client_id}"
+    return f"{KEY_PREFIX}all"
+
+
+def _warm_key(key: str) -> str:
+    """Marker key present while the sorted set `key` is authoritative."""
+    return f"{key}{WARM_SUFFIX}"
+
+
+def _ttl(key: str) -> Optional[int]:
+    """Idle TTL of a sorted set; the global one never expires."""
+    return None if key == scope_key() else settings.recent_reviews_scope_ttl
+
+
+def _expire(pipe, key: str):
+    """Renew the TTL of a scoped sorted set; the set outlives its marker so a warm scope is never empty."""
+    ttl = _ttl(key)
+    if ttl:
+        pipe.expire(_warm_key(key), ttl)
+        pipe.expire(key, ttl + 60)
+
+
+def _scope_keys(review: Dict[str, Any]) -> List[str]:
+    keys = [scope_key()]
+    if review.get("client_id"):
+        keys.append(scope_key(client_id=review["client_id"]))
+    if review.get("place_id"):
+        keys.append(scope_key(place_id=review["place_id"]))
+    return keys
+
+
+def _entry(review: Dict[str, Any]) -> Tuple[bytes, float]:
+    """Sorted set member (JSON summary) and score of a review."""
+    summary = review_to_dict(review)
+    for field, value in summary.items():
+        # MongoDB keeps milliseconds: members built before and after a round trip must match
+        if isinstance(value, datetime):
+            summary[field] = value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+    retrieval_date = review.get("retrieval_date")
+    score = retrieval_date.replace(tzinfo=timezone.utc).timestamp() if isinstance(retrieval_date, datetime) else 0
+    return orjson.dumps(summary), score
+
+
+def _add(pipe, key: str, entries: Dict[bytes, float]):
+    pipe.zadd(key, entries)
+    pipe.zremrangebyrank(key, 0, -(settings.recent_reviews_cache_size + 1))
+
+
+def add_recent_reviews(reviews: List[Dict[str, Any]]):
+    """
+    Add newly inserted reviews to their sorted sets in one pipelined round trip.
+
+    Args:
+        reviews: Review documents that were just inserted
+    """
+    if not reviews:
+        return
+
+    per_key: Dict[str, Dict[bytes, float]] = defaultdict(dict)
+    for review in reviews:
+        member, score = _entry(review)
+        for key in _scope_keys(review):
+            per_key[key][member] = score
+
+    redis_conn = get_redis_client()
+
+    # Client and place sets only exist while warmed by a recent read
+    scoped = [key for key in per_key if _ttl(key)]
+    if scoped:
+        with redis_conn.pipeline(transaction=False) as pipe:
+            for key in scoped:
+                pipe.exists(_warm_key(key))
+            for key, warm in zip(scoped, pipe.execute()):
+                if not warm:
+                    del per_key[key]
+
+    with redis_conn.pipeline(transaction=False) as pipe:
+        for key, entries in per_key.items():
+            _add(pipe, key, entries)
+            if _ttl(key):
+                # A marker that expired since the check leaves the set with a TTL, not orphaned
+                pipe.expire(key, settings.recent_reviews_scope_ttl + 60)
+        pipe.execute()
+
+
+def remove_recent_review(review: Dict[str, Any]):
+    """
+    Remove a deleted review from its sorted sets.
+
+    The sets are then one review short of full, so they are marked cold and
+    warmed again from MongoDB on their next read.
+    """
+    member, _ = _entry(review)
+    with get_redis_client().pipeline(transaction=False) as pipe:
+        for key in _scope_keys(review):
+            pipe.zrem(key, member)
+            pipe.delete(_warm_key(key))
+        pipe.execute()
+
+
+def warm_scope(client_id: Optional[str] = None, place_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Fill the sorted set of a scope from the review storage and mark it authoritative.
+
+    The stored reviews are merged into the set rather than replacing it, so
+    reviews added by a concurrent save are kept; the merge, trim and marker
+    are applied in one MULTI transaction, so no reader sees the set marked
+    warm but unfilled or over its size.
+
+    Returns:
+        The newest reviews of the scope (summaries), newest first
+    """
+    filters = ReviewFilter(place_id=place_id) if place_id else ReviewFilter(client_id=client_id)
+    docs = list(get_review_repository().find(
+        filters, "retrieval_date", -1, REVIEW_FIELDS + ("client_id",), limit=settings.recent_reviews_cache_size
+    ))
+
+    key = scope_key(client_id, place_id)
+    with get_redis_client().pipeline(transaction=True) as pipe:
+        if docs:
+            _add(pipe, key, dict(_entry(doc) for doc in docs))
+        pipe.set(_warm_key(key), 1)
+        _expire(pipe, key)
+        pipe.execute()
+
+    return [review_to_dict(doc) for doc in docs]
+
+
+def get_recent_reviews(
+    limit: int,
+    client_id: Optional[str] = None,
+    place_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Newest reviews of a scope, from Redis (MongoDB only when the scope is cold).
+
+    Args:
+        limit: Number of reviews (at most `recent_reviews_cache_size`)
+        client_id: Only reviews of this client
+        place_id: Only reviews of this place
+
+    Returns:
+        Review summaries (public fields, datetimes as ISO strings), newest first
+    """
+    key = scope_key(client_id, place_id)
+    with get_redis_client().pipeline(transaction=False) as pipe:
+        pipe.exists(_warm_key(key))
+        pipe.zrevrange(key, 0, limit - 1)
+        _expire(pipe, key)
+        warm, members = pipe.execute()[:2]
+
+    if warm:
+        return [orjson.loads(member) for member in members]
+
+    logger.info(f"Recent reviews cache cold for {key}, reading MongoDB")
+    return warm_scope(client_id, place_id)[:limit]
+
+
+def rebuild_recent_reviews() -> int:
+    """
+    Drop every recent-review sorted set and warm the global one.
+
+    Client and place sets are warmed again by their next read.
+
+    Returns:
+        Number of sorted sets warmed
+    """
+    redis_conn = get_redis_client()
+    keys = list(redis_conn.scan_iter(match=f"{KEY_PREFIX}*", count=1000))
+    if keys:
+        redis_conn.delete(*keys)
+
+    warm_scope()
+
+    logger.info(f"Rebuilt the global recent-review sorted set, dropped {len(keys)} keys")
+    return 1
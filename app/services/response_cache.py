@@ -0,0 +1,188 @@
+"""
+Response cache for the read endpoints of the reviews API.
+
+Stored reviews only change when a scrape saves new reviews (or a review is
+deleted), so identical read requests between two changes return identical
+bodies. Cached responses are keyed on the endpoint, its normalized
+parameters and the reviews version, a Redis counter that
+save_reviews_to_db and delete_review bump: a new version makes every older
+entry unreachable, so nothing has to be purged.
+
+Bodies live in an in-process LRU and, when `response_cache_redis` is on,
+also in Redis (with `response_cache_ttl`) so several API processes share
+them. Every response carries an ETag; a request whose If-None-Match matches
+the cached entry gets a 304 without a body. A cache hit costs one Redis GET
+(the version) and never touches MongoDB. If Redis is unavailable responses
+are built uncached. In local execution mode, a single process without Redis,
+the version is an in-process counter and bodies only live in the LRU.
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Any, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+
+from app.config import settings
+from app.database import get_redis_client, redis_enabled
+from app.services.metrics import increment_counter
+
+
+logger = logging.getLogger(__name__)
+
+
+METRICS_GROUP = "response_cache"
+VERSION_KEY = "cache:reviews:version"
+REDIS_KEY_PREFIX = "cache:reviews:response:"
+
+
+class LRUCache:
+    """Thread-safe in-process LRU of cache key -> (etag, body)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Tuple[str, bytes]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local_cache = LRUCache(settings.response_cache_max_entries)
+_local_version = 0  # reviews version in local execution mode
+_version_lock = threading.Lock()
+
+
+# ============================================================================
+# VERSION
+# ============================================================================
+
+def get_reviews_version() -> int:
+    """Current reviews version."""
+    if not redis_enabled():
+        return _local_version
+
+    value = get_redis_client().get(VERSION_KEY)
+    return int(value) if value else 0
+
+
+def bump_reviews_version():
+    """Invalidate every cached response (call after reviews change)."""
+    global _local_version
+    if not redis_enabled():
+        with _version_lock:
+            _local_version += 1
+        return
+
+    try:
+        get_redis_client().incr(VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Could not bump reviews version: {e}")
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+def cache_key(namespace: str, params: Dict[str, Any], version: int) -> str:
+    """Key of a response: endpoint, parameters (order-independent) and version."""
+    normalized = json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+    digest = hashlib.sha1(normalized.encode()).hexdigest()
+    return f"{namespace}:{version}:{digest}"
+
+
+def _etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def _lookup(key: str) -> Optional[Tuple[str, bytes]]:
+    entry = _local_cache.get(key)
+    if entry is not None or not settings.response_cache_redis or not redis_enabled():
+        return entry
+
+    raw = get_redis_client().get(REDIS_KEY_PREFIX + key)
+    if raw is None:
+        return None
+
+    etag, body = raw.split(b"\n", 1)
+    entry = (etag.decode(), body)
+    _local_cache.set(key, entry)
+    return entry
+
+
+def _store(key: str, entry: Tuple[str, bytes]):
+    _local_cache.set(key, entry)
+    if settings.response_cache_redis and redis_enabled():
+        etag, body = entry
+        get_redis_client().set(REDIS_KEY_PREFIX + key, etag.encode() + b"\n" + body,
+                               ex=settings.response_cache_ttl)
+
+
+def _response(request: Request, etag: str, body: bytes) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        increment_counter(METRICS_GROUP, "not_modified")
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def cached_response(
+    request: Request,
+    namespace: str,
+    params: Dict[str, Any],
+    build: Callable[[], Dict[str, Any]]
+) -> Response:
+    """
+    Serve a JSON response from the cache, or build and cache it.
+
+    Args:
+        request: Incoming request (for If-None-Match)
+        namespace: Endpoint name
+        params: Endpoint parameters after validation (defaults included)
+        build: Builds the response content (queries MongoDB)
+
+    Returns:
+        200 response with ETag, or 304 if the client's copy is current
+    """
+    if not settings.response_cache_enabled:
+        return ORJSONResponse(build())
+
+    try:
+        key = cache_key(namespace, params, get_reviews_version())
+        entry = _lookup(key)
+    except Exception as e:
+        logger.warning(f"Response cache unavailable: {e}")
+        return ORJSONResponse(build())
+
+    if entry is not None:
+        increment_counter(METRICS_GROUP, "hits")
+        return _response(request, *entry)
+
+    increment_counter(METRICS_GROUP, "misses")
+    body = ORJSONResponse(build()).body
+    entry = (_etag(body), body)
+
+    try:
+        _store(key, entry)
+    except Exception as e:
+        logger.warning(f"Could not cache response {namespace}: {e}")
+
+    return _response(request, *entry)
@@ -0,0 +1,185 @@
+"""
+Event pipeline for new reviews.
+
+Every review inserted into MongoDB becomes one entry of a Redis Stream.
+Downstream work (webhooks, caches, aggregates) reads that stream through its
+own consumer group, so each consumer runs, fails and scales independently of
+the scrapers and of the others; scrapers only write reviews.
+
+Entries reach the stream in one of two ways (`review_events_source`):
+
+- "outbox" (default): save_reviews_to_db appends the reviews it inserted
+  right after the bulk insert, in one pipelined XADD batch. Works with a
+  standalone MongoDB; an event can be lost only if the process dies between
+  the insert and the XADD.
+- "change_stream": event_relay.py tails inserts on the reviews collection
+  with a MongoDB change stream (replica set required) and stores the resume
+  token after each batch, so a crashed relay resumes where it stopped.
+
+Consumers acknowledge entries only after handling them. Entries a crashed
+consumer left unacknowledged are claimed again after `events_claim_idle_ms`,
+which gives at-least-once delivery: handlers must be idempotent.
+"""
+import json
+import logging
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+
+from redis import Redis
+from redis.exceptions import ResponseError
+
+from app.config import settings
+from app.database import get_redis_client, get_reviews_collection
+
+
+logger = logging.getLogger(__name__)
+
+
+STREAM_KEY = "events:reviews"
+RESUME_TOKEN_KEY = "events:reviews:resume_token"
+
+# Consumer groups of the review stream
+WEBHOOKS_GROUP = "webhooks"
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _add_to_pipeline(pipe, reviews: List[Dict[str, Any]]):
+    for review in reviews:
+        data = {k: v for k, v in review.items() if k != '_id'}
+        pipe.xadd(
+            STREAM_KEY,
+            {
+                "id_review": data.get("id_review", ""),
+                "place_id": data.get("place_id") or "",
+                "review": json.dumps(data, default=_json_default)
+            },
+            maxlen=settings.events_stream_maxlen,
+            approximate=True
+        )
+
+
+def publish_new_reviews(reviews: List[Dict[str, Any]], redis_conn: Optional[Redis] = None) -> int:
+    """
+    Append inserted reviews to the review stream.
+
+    Args:
+        reviews: Review documents that were inserted
+        redis_conn: Redis connection (default: shared client)
+
+    Returns:
+        Number of events published
+    """
+    if not reviews:
+        return 0
+
+    redis_conn = redis_conn or get_redis_client()
+    with redis_conn.pipeline(transaction=False) as pipe:
+        _add_to_pipeline(pipe, reviews)
+        pipe.execute()
+    return len(reviews)
+
+
+def publish_from_save() -> bool:
+    """Whether save_reviews_to_db publishes events itself (outbox mode)."""
+    return settings.review_events_source == "outbox"
+
+
+def decode_entry(fields: Dict[bytes, bytes]) -> Dict[str, Any]:
+    """Review document of a stream entry."""
+    return json.loads(fields[b"review"])
+
+
+class ReviewEventConsumer:
+    """One consumer of a consumer group on the review stream."""
+
+    def __init__(self, group: str, consumer: str, redis_conn: Optional[Redis] = None):
+        self.group = group
+        self.consumer = consumer
+        self.redis = redis_conn or get_redis_client()
+        self._reclaim_cursor = "0-0"
+
+    def ensure_group(self):
+        """Create the consumer group (from the start of the stream) if needed."""
+        try:
+            self.redis.xgroup_create(STREAM_KEY, self.group, id="0", mkstream=True)
+            logger.info(f"Created consumer group '{self.group}' on {STREAM_KEY}")
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def read(self, count: int, block_ms: Optional[int] = None) -> List[Tuple[bytes, Dict[str, Any]]]:
+        """
+        Read a batch of entries: first those abandoned by crashed consumers,
+        then new ones.
+
+        Returns:
+            List of (entry_id, review) pairs
+        """
+        claimed = self.redis.xautoclaim(
+            STREAM_KEY, self.group, self.consumer,
+            min_idle_time=settings.events_claim_idle_ms,
+            start_id=self._reclaim_cursor,
+            count=count
+        )
+        self._reclaim_cursor = claimed[0]
+        entries = [(entry_id, fields) for entry_id, fields in claimed[1] if fields]
+
+        if not entries:
+            response = self.redis.xreadgroup(
+                self.group, self.consumer, {STREAM_KEY: ">"},
+                count=count, block=block_ms
+            )
+            for _, stream_entries in response or []:
+                entries.extend(stream_entries)
+
+        return [(entry_id, decode_entry(fields)) for entry_id, fields in entries]
+
+    def ack(self, entry_ids: List[bytes]):
+        """Acknowledge handled entries."""
+        if entry_ids:
+            self.redis.xack(STREAM_KEY, self.group, *entry_ids)
+
+    def lag(self) -> Dict[str, int]:
+        """Pending (unacknowledged) and not yet delivered entries of the group."""
+        for group in self.redis.xinfo_groups(STREAM_KEY):
+            if group["name"].decode() == self.group:
+                return {"pending": group["pending"], "lag": group.get("lag") or 0}
+        return {"pending": 0, "lag": 0}
+
+
+def relay_change_stream(stop=None):
+    """
+    Publish inserts on the reviews collection to the review stream using a
+    MongoDB change stream, resuming from the last stored token.
+
+    Args:
+        stop: Optional threading.Event that ends the relay
+    """
+    redis_conn = get_redis_client()
+    token = redis_conn.get(RESUME_TOKEN_KEY)
+    resume_after = json.loads(token) if token else None
+
+    pipeline = [{"$match": {"operationType": "insert"}}]
+    logger.info(f"Starting change stream relay (resume: {'yes' if resume_after else 'no'})")
+
+    with get_reviews_collection().watch(pipeline, resume_after=resume_after, max_await_time_ms=1000) as stream:
+        while stop is None or not stop.is_set():
+            batch = []
+            while len(batch) < settings.events_relay_batch_size:
+                change = stream.try_next()
+                if change is None:
+                    break
+                batch.append(change["fullDocument"])
+
+            if batch:
+                publish_new_reviews(batch, redis_conn)
+                logger.debug(f"Relayed {len(batch)} review inserts")
+
+            # Events are published before the token moves: a crash re-publishes, never loses
+            if stream.resume_token is not None:
+                redis_conn.set(RESUME_TOKEN_KEY, json.dumps(stream.resume_token, default=str))
@@ -0,0 +1,156 @@
+"""
+Streaming serializers for the review export endpoint.
+
+Each serializer takes a MongoDB cursor and yields the encoded export in
+chunks of `export_batch_size` reviews, so memory use stays constant
+regardless of how many reviews are exported: documents are encoded straight
+from the cursor (no Pydantic models) and each chunk is released once sent.
+
+Only the requested review fields are read and written (all public fields
+by default). Parquet export needs the optional `pyarrow` package; reviews
+are written as row groups of `export_parquet_row_group_size` rows.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterable, Iterator, Dict, Any, List, Tuple
+
+from app.config import settings
+from app.services.review_serialization import REVIEW_FIELDS, review_to_dict
+
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet"
+}
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _batches(cursor: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_ndjson(cursor: Iterable[Dict[str, Any]], fields: Tuple[str, ...] = REVIEW_FIELDS) -> Iterator[bytes]:
+    """One JSON object per line."""
+    for batch in _batches(cursor, settings.export_batch_size):
+        yield "".join(
+            json.dumps(review_to_dict(doc, fields),
+                       default=_json_default, ensure_ascii=False) + "\n"
+            for doc in batch
+        ).encode("utf-8")
+
+
+def stream_csv(cursor: Iterable[Dict[str, Any]], fields: Tuple[str, ...] = REVIEW_FIELDS) -> Iterator[bytes]:
+    """CSV with a header row; datetimes in ISO 8601, missing values empty."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+
+    for batch in _batches(cursor, settings.export_batch_size):
+        for doc in batch:
+            writer.writerow([
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in review_to_dict(doc, fields).values()
+            ])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header only (no reviews)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+# ============================================================================
+# PARQUET (optional pyarrow)
+# ============================================================================
+
+def parquet_available() -> bool:
+    """Whether pyarrow is installed."""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class _ChunkSink:
+    """Write-only file object that hands written bytes back to the stream."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_parquet(cursor: Iterable[Dict[str, Any]], fields: Tuple[str, ...] = REVIEW_FIELDS) -> Iterator[bytes]:
+    """Parquet file written one row group at a time."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    all_fields = pa.schema([
+        ("id_review", pa.string()),
+        ("place_id", pa.string()),
+        ("caption", pa.string()),
+        ("relative_date", pa.string()),
+        ("review_date", pa.timestamp("ms")),
+        ("retrieval_date", pa.timestamp("ms")),
+        ("rating", pa.float64()),
+        ("username", pa.string()),
+        ("n_review_user", pa.int64()),
+        ("n_photo_user", pa.int64()),
+        ("url_user", pa.string())
+    ])
+    schema = pa.schema([all_fields.field(field) for field in fields])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    for batch in _batches(cursor, settings.export_parquet_row_group_size):
+        columns = {field: [doc.get(field) for doc in batch] for field in schema.names}
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        yield sink.drain()
+
+    writer.close()
+    yield sink.drain()
+
+
+STREAMERS = {
+    "ndjson": stream_ndjson,
+    "csv": stream_csv,
+    "parquet": stream_parquet
+}
@@ -0,0 +1,637 @@
+"""
+Storage of review documents behind one repository interface.
+
+Review writes (with deduplication by id_review), lookups and paginated reads
+go through a ReviewRepository instead of the pymongo collection, so the
+reviews can live in MongoDB (`review_storage=mongodb`, the default) or in an
+embedded SQLite database (`review_storage=sqlite`, file
+`review_storage_sqlite_path`) on hosts that cannot run a mongod.
+
+Both backends create the same indexes (REVIEW_INDEXES, derived from the
+review query shapes in index_registry) and support keyset
+pagination: lists are ordered by the sort field and then by id_review, and a
+page can start after the last review of the previous one (an opaque cursor,
+see encode_cursor) instead of skipping all the reviews before it, so deep
+pages cost the same as the first one.
+
+Place stats and review rollups are aggregated from the MongoDB collection and
+are only maintained with the MongoDB backend: with SQLite, GET
+/api/reviews/stats answers 501, review counts of monitored places are read
+from the repository, and REVIEW_EVENTS_SOURCE=change_stream is rejected at
+startup (see config). The last scrape of each place (scrape_cache) is kept by the
+repository too, so scraping and reading reviews with SQLite need no mongod
+(startup skips the MongoDB indexes and /health does not require it). Places
+and the monitoring schedule stay in MongoDB: monitoring still needs one.
+"""
+import base64
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Set, Tuple
+
+import orjson
+from pymongo import ASCENDING, DESCENDING
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+
+from app.config import settings
+from app.database import get_reviews_collection, get_scrapes_collection
+from app.models import ReviewInDB
+from app.services import index_registry
+from app.services.review_serialization import REVIEW_FIELDS, projection
+
+
+logger = logging.getLogger(__name__)
+
+
+SORT_FIELDS = index_registry.REVIEW_SORT_FIELDS
+DATE_FIELDS = ("review_date", "retrieval_date")
+
+# Indexes of both backends: (fields as (name, direction) pairs, unique).
+# Each sort field has a keyset index (sort field, id_review, rating), alone and after place_id.
+REVIEW_INDEXES = tuple(index_registry.derived_indexes("reviews"))
+
+# Chunk size of id_review lookups (SQLite limits bound parameters)
+ID_CHUNK = 500
+
+
+@dataclass(frozen=True)
+class ReviewFilter:
+    """Filters of a review list."""
+    place_id: Optional[str] = None
+    client_id: Optional[str] = None
+    min_rating: Optional[float] = None
+    max_rating: Optional[float] = None
+
+
+# ============================================================================
+# KEYSET CURSORS
+# ============================================================================
+
+def encode_cursor(doc: Dict[str, Any], sort_by: str) -> str:
+    """Cursor of the page that follows `doc` in a list sorted by `sort_by`."""
+    return base64.urlsafe_b64encode(orjson.dumps([sort_by, doc.get(sort_by), doc["id_review"]])).decode()
+
+
+def decode_cursor(cursor: str, sort_by: str) -> Tuple[Any, str]:
+    """
+    Decode a cursor of encode_cursor.
+
+    Returns:
+        Tuple (sort value, id_review) of the last review of the previous page
+
+    Raises:
+        ValueError: If the cursor is malformed or was made for another sort field
+    """
+    try:
+        cursor_sort, value, review_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if sort_by in DATE_FIELDS and value is not None:
+            value = datetime.fromisoformat(value)
+    except Exception:
+        raise ValueError("malformed cursor")
+
+    if cursor_sort != sort_by or not isinstance(review_id, str):
+        raise ValueError(f"cursor is not for sort_by={sort_by}")
+    return value, review_id
+
+
+def _read_fields(fields: Tuple[str, ...], sort_by: str) -> Tuple[str, ...]:
+    """Requested fields plus those needed for the next cursor."""
+    return tuple(dict.fromkeys((*fields, sort_by, "id_review")))
+
+
+# ============================================================================
+# INTERFACE
+# ============================================================================
+
+class ReviewRepository(ABC):
+    """
+    Review storage. Documents are dicts with the fields of ReviewInDB.
+
+    The storage also keeps the last completed scrape of each place and sort
+    order (see scrape_cache), so cached results are served from the same backend.
+    """
+
+    @abstractmethod
+    def ensure_indexes(self) -> None:
+        """Create the storage and REVIEW_INDEXES if missing."""
+
+    @abstractmethod
+    def existing_ids(self, review_ids: Iterable[str]) -> Set[str]:
+        """Which of these id_review values are stored."""
+
+    @abstractmethod
+    def insert_new(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert reviews, skipping those already stored.
+
+        Args:
+            docs: Review documents with distinct id_review values
+
+        Returns:
+            The documents that were inserted
+        """
+
+    @abstractmethod
+    def get(self, review_id: str, fields: Tuple[str, ...] = REVIEW_FIELDS) -> Optional[Dict[str, Any]]:
+        """A review, or None."""
+
+    @abstractmethod
+    def get_many(self, review_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Stored reviews by id_review (missing ones are left out)."""
+
+    @abstractmethod
+    def delete(self, review_id: str) -> Optional[Dict[str, Any]]:
+        """Delete a review and return it (None if it did not exist)."""
+
+    @abstractmethod
+    def count(self, filters: ReviewFilter) -> int:
+        """Number of reviews matching the filters."""
+
+    @abstractmethod
+    def mark_notified(self, review_ids: List[str]) -> None:
+        """Record that these reviews were delivered to their webhook."""
+
+    @abstractmethod
+    def find(
+        self,
+        filters: ReviewFilter,
+        sort_by: str = "review_date",
+        direction: int = DESCENDING,
+        fields: Tuple[str, ...] = REVIEW_FIELDS,
+        limit: Optional[int] = None,
+        skip: int = 0,
+        after: Optional[Tuple[Any, str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Reviews matching the filters, ordered by (sort_by, id_review).
+
+        Args:
+            filters: Review filters
+            sort_by: One of SORT_FIELDS
+            direction: ASCENDING or DESCENDING (applies to both sort keys)
+            fields: Fields to read (sort_by and id_review are always read)
+            limit: Maximum number of reviews (None for all)
+            skip: Reviews to skip (offset pagination)
+            after: Start after this (sort value, id_review) (keyset pagination)
+
+        Returns:
+            Iterator of review documents (streamed when limit is None)
+        """
+
+    @abstractmethod
+    def record_scrape(self, place_id: str, sort_by: str, scrape: Dict[str, Any]) -> None:
+        """
+        Store the last completed scrape of a place and sort order (replacing the previous one).
+
+        Args:
+            place_id: Canonical place ID
+            sort_by: Sort option used
+            scrape: url, scraped_at, max_reviews, reviews_count and review_ids (in scrape order)
+        """
+
+    @abstractmethod
+    def find_scrape(self, place_id: str, sort_by: str, since: datetime) -> Optional[Dict[str, Any]]:
+        """The scrape stored by record_scrape if it completed at or after `since`, else None."""
+
+
+# ============================================================================
+# MONGODB
+# ============================================================================
+
+def _mongo_filter(filters: ReviewFilter) -> Dict[str, Any]:
+    query: Dict[str, Any] = {}
+    if filters.place_id is not None:
+        query["place_id"] = filters.place_id
+    if filters.client_id is not None:
+        query["client_id"] = filters.client_id
+    if filters.min_rating is not None or filters.max_rating is not None:
+        query["rating"] = {}
+        if filters.min_rating is not None:
+            query["rating"]["$gte"] = filters.min_rating
+        if filters.max_rating is not None:
+            query["rating"]["$lte"] = filters.max_rating
+    return query
+
+
+def _mongo_after(sort_by: str, direction: int, value: Any, review_id: str) -> Dict[str, Any]:
+    """Reviews after (value, review_id); null sort values come first in ascending order."""
+    id_op = "$lt" if direction == DESCENDING else "$gt"
+    ties = {sort_by: value, "id_review": {id_op: review_id}}
+
+    if direction == DESCENDING:
+        if value is None:
+            return ties
+        return {"$or": [{sort_by: {"$lt": value}}, {sort_by: None}, ties]}
+
+    if value is None:
+        return {"$or": [ties, {sort_by: {"$ne": None}}]}
+    return {"$or": [{sort_by: {"$gt": value}}, ties]}
+
+
+class MongoReviewRepository(ReviewRepository):
+    """Reviews in a MongoDB collection; scrapes in their own collection."""
+
+    def __init__(self, collection: Collection, scrapes: Optional[Collection] = None):
+        self.collection = collection
+        self.scrapes = scrapes
+
+    def ensure_indexes(self) -> None:
+        index_registry.sync_indexes(self.collection, "reviews")
+
+    def existing_ids(self, review_ids: Iterable[str]) -> Set[str]:
+        return {
+            doc["id_review"]
+            for doc in self.collection.find({"id_review": {"$in": list(review_ids)}}, {"_id": 0, "id_review": 1})
+        }
+
+    def insert_new(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        existing = self.existing_ids(doc["id_review"] for doc in docs)
+        new_docs = [doc for doc in docs if doc["id_review"] not in existing]
+        logger.debug(f"{len(existing)} reviews already exist, inserting {len(new_docs)}")
+
+        if not new_docs:
+            return []
+
+        try:
+            self.collection.insert_many(new_docs, ordered=False)
+            return new_docs
+        except BulkWriteError as e:
+            # Reviews inserted concurrently by another job fail on the unique index
+            failed = {error['index'] for error in e.details.get('writeErrors', [])}
+            logger.debug(f"{len(failed)} reviews were inserted concurrently, skipped")
+            return [doc for index, doc in enumerate(new_docs) if index not in failed]
+
+    def get(self, review_id: str, fields: Tuple[str, ...] = REVIEW_FIELDS) -> Optional[Dict[str, Any]]:
+        return self.collection.find_one({"id_review": review_id}, projection(fields))
+
+    def get_many(self, review_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        return {doc["id_review"]: doc for doc in self.collection.find({"id_review": {"$in": review_ids}}, {"_id": 0})}
+
+    def delete(self, review_id: str) -> Optional[Dict[str, Any]]:
+        return self.collection.find_one_and_delete({"id_review": review_id})
+
+    def count(self, filters: ReviewFilter) -> int:
+        return self.collection.count_documents(_mongo_filter(filters))
+
+    def mark_notified(self, review_ids: List[str]) -> None:
+        self.collection.update_many(
+            {"id_review": {"$in": review_ids}},
+            {"$set": {"notified_via_webhook": True, "webhook_sent_at": datetime.utcnow()}}
+        )
+
+    def find(
+        self,
+        filters: ReviewFilter,
+        sort_by: str = "review_date",
+        direction: int = DESCENDING,
+        fields: Tuple[str, ...] = REVIEW_FIELDS,
+        limit: Optional[int] = None,
+        skip: int = 0,
+        after: Optional[Tuple[Any, str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        query = _mongo_filter(filters)
+        if after is not None:
+            keyset = _mongo_after(sort_by, direction, *after)
+            query = {"$and": [query, keyset]} if query else keyset
+
+        cursor = (
+            self.collection.find(query, projection(_read_fields(fields, sort_by)))
+            .sort([(sort_by, direction), ("id_review", direction)])
+        )
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        else:
+            cursor = cursor.batch_size(settings.export_batch_size)
+        return cursor
+
+    def record_scrape(self, place_id: str, sort_by: str, scrape: Dict[str, Any]) -> None:
+        self.scrapes.update_one({"place_id": place_id, "sort_by": sort_by}, {"$set": scrape}, upsert=True)
+
+    def find_scrape(self, place_id: str, sort_by: str, since: datetime) -> Optional[Dict[str, Any]]:
+        return self.scrapes.find_one(
+            {"place_id": place_id, "sort_by": sort_by, "scraped_at": {"$gte": since}}, {"_id": 0}
+        )
+
+
+# ============================================================================
+# SQLITE
+# ============================================================================
+
+COLUMNS = tuple(ReviewInDB.model_fields)
+COLUMN_TYPES = {"rating": "REAL", "n_review_user": "INTEGER", "n_photo_user": "INTEGER"}
+NOT_NULL = ("id_review", *DATE_FIELDS)
+# Webhook delivery state: stored, but not part of the review documents read back
+STATE_COLUMNS = {"notified_via_webhook": "INTEGER", "webhook_sent_at": "TEXT"}
+
+
+def _columns(fields: Tuple[str, ...]) -> str:
+    return ", ".join(field for field in fields if field in COLUMNS)
+
+
+def _to_row(doc: Dict[str, Any]) -> Tuple[Any, ...]:
+    return tuple(
+        doc.get(column).isoformat(timespec="microseconds") if isinstance(doc.get(column), datetime) else doc.get(column)
+        for column in COLUMNS
+    )
+
+
+def _to_doc(row: sqlite3.Row) -> Dict[str, Any]:
+    doc = dict(row)
+    for field in DATE_FIELDS:
+        if doc.get(field) is not None:
+            doc[field] = datetime.fromisoformat(doc[field])
+    return doc
+
+
+def _sql_value(value: Any) -> Any:
+    return value.isoformat(timespec="microseconds") if isinstance(value, datetime) else value
+
+
+def _sql_where(filters: ReviewFilter) -> Tuple[List[str], List[Any]]:
+    clauses, params = [], []
+    for column in ("place_id", "client_id"):
+        value = getattr(filters, column)
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if filters.min_rating is not None:
+        clauses.append("rating >= ?")
+        params.append(filters.min_rating)
+    if filters.max_rating is not None:
+        clauses.append("rating <= ?")
+        params.append(filters.max_rating)
+    return clauses, params
+
+
+def _sql_after(sort_by: str, direction: int, value: Any, review_id: str) -> Tuple[str, List[Any]]:
+    """Same condition as _mongo_after (NULL sorts first in ascending order in both)."""
+    op = "<" if direction == DESCENDING else ">"
+    value = _sql_value(value)
+
+    if sort_by in NOT_NULL:
+        # Row values let SQLite seek the keyset index instead of scanning it
+        return f"({sort_by}, id_review) {op} (?, ?)", [value, review_id]
+
+    if direction == DESCENDING:
+        if value is None:
+            return f"({sort_by} IS NULL AND id_review < ?)", [review_id]
+        return f"({sort_by} < ? OR {sort_by} IS NULL OR ({sort_by} = ? AND id_review < ?))", [value, value, review_id]
+
+    if value is None:
+        return f"(({sort_by} IS NULL AND id_review > ?) OR {sort_by} IS NOT NULL)", [review_id]
+    return f"({sort_by} {op} ? OR ({sort_by} = ? AND id_review {op} ?))", [value, value, review_id]
+
+
+def _chunks(values: List[str], size: int = ID_CHUNK) -> Iterator[List[str]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class SQLiteReviewRepository(ReviewRepository):
+    """
+    Reviews in an embedded SQLite database (WAL mode, one connection per thread).
+
+    Dates are stored as ISO 8601 text, which sorts chronologically. Scrapes
+    are kept in `scrapes_table` of the same database.
+    """
+
+    def __init__(self, path: str, table: str = "reviews", scrapes_table: str = "scrapes"):
+        self.path = path
+        self.table = table
+        self.scrapes_table = scrapes_table
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit; writes open their own transaction (see _write)
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA cache_size=-16384")  # 16 MB page cache (index maintenance)
+            columns = ", ".join(
+                f"{column} {COLUMN_TYPES.get(column, 'TEXT')}{' NOT NULL' if column in NOT_NULL else ''}"
+                for column in COLUMNS
+            )
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({columns})")
+            present = {row["name"] for row in connection.execute(f"PRAGMA table_info({self.table})")}
+            for column, column_type in STATE_COLUMNS.items():
+                if column not in present:
+                    connection.execute(f"ALTER TABLE {self.table} ADD COLUMN {column} {column_type}")
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.scrapes_table} (place_id TEXT NOT NULL, sort_by TEXT NOT NULL, "
+                f"url TEXT, scraped_at TEXT NOT NULL, max_reviews INTEGER, reviews_count INTEGER, review_ids TEXT, "
+                f"PRIMARY KEY (place_id, sort_by))"
+            )
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; BEGIN IMMEDIATE takes the write lock up front."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def close(self):
+        """Close this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def ensure_indexes(self) -> None:
+        names = {f"{self.table}_{index_registry.index_name(keys)}" for keys, _ in REVIEW_INDEXES}
+        with self._write() as connection:
+            for keys, unique in REVIEW_INDEXES:
+                columns = ", ".join(f"{field} {'DESC' if direction == DESCENDING else 'ASC'}" for field, direction in keys)
+                connection.execute(
+                    f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS '
+                    f'"{self.table}_{index_registry.index_name(keys)}" ON {self.table} ({columns})'
+                )
+
+            if settings.index_drop_undeclared:
+                # Indexes of earlier versions that no query shape derives any more
+                stale = connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                    (self.table,)
+                ).fetchall()
+                for (name,) in stale:
+                    if name.startswith(f"{self.table}_") and name not in names:
+                        connection.execute(f'DROP INDEX "{name}"')
+                        logger.info(f"Dropped index {name}")
+
+    def existing_ids(self, review_ids: Iterable[str]) -> Set[str]:
+        connection = self._connection()
+        existing = set()
+        for chunk in _chunks(list(review_ids)):
+            rows = connection.execute(
+                f"SELECT id_review FROM {self.table} WHERE id_review IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            existing.update(row[0] for row in rows)
+        return existing
+
+    def insert_new(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        statement = (f"INSERT INTO {self.table} ({', '.join(COLUMNS)}) "
+                     f"VALUES ({', '.join('?' * len(COLUMNS))})")
+        # The write lock is held from the existence check on, so no other writer
+        # can insert the same reviews in between
+        with self._write() as connection:
+            existing = self.existing_ids(doc["id_review"] for doc in docs)
+            inserted = [doc for doc in docs if doc["id_review"] not in existing]
+            connection.executemany(statement, (_to_row(doc) for doc in inserted))
+        logger.debug(f"{len(existing)} reviews already exist, inserted {len(inserted)}")
+        return inserted
+
+    def get(self, review_id: str, fields: Tuple[str, ...] = REVIEW_FIELDS) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            f"SELECT {_columns(fields)} FROM {self.table} WHERE id_review = ?", (review_id,)
+        ).fetchone()
+        return _to_doc(row) if row is not None else None
+
+    def get_many(self, review_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        connection = self._connection()
+        docs = {}
+        for chunk in _chunks(review_ids):
+            rows = connection.execute(
+                f"SELECT {_columns(COLUMNS)} FROM {self.table} WHERE id_review IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            docs.update((row["id_review"], _to_doc(row)) for row in rows)
+        return docs
+
+    def delete(self, review_id: str) -> Optional[Dict[str, Any]]:
+        with self._write() as connection:
+            row = connection.execute(
+                f"DELETE FROM {self.table} WHERE id_review = ? RETURNING {_columns(COLUMNS)}", (review_id,)
+            ).fetchone()
+        return _to_doc(row) if row is not None else None
+
+    def count(self, filters: ReviewFilter) -> int:
+        clauses, params = _sql_where(filters)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._connection().execute(f"SELECT COUNT(*) FROM {self.table}{where}", params).fetchone()[0]
+
+    def mark_notified(self, review_ids: List[str]) -> None:
+        sent_at = _sql_value(datetime.utcnow())
+        with self._write() as connection:
+            for chunk in _chunks(review_ids):
+                connection.execute(
+                    f"UPDATE {self.table} SET notified_via_webhook = 1, webhook_sent_at = ? "
+                    f"WHERE id_review IN ({', '.join('?' * len(chunk))})",
+                    [sent_at, *chunk]
+                )
+
+    def _page(self, filters, sort_by, direction, fields, limit, skip, after) -> List[Dict[str, Any]]:
+        clauses, params = _sql_where(filters)
+        if after is not None:
+            clause, after_params = _sql_after(sort_by, direction, *after)
+            clauses.append(clause)
+            params.extend(after_params)
+
+        order = "DESC" if direction == DESCENDING else "ASC"
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connection().execute(
+            f"SELECT {_columns(_read_fields(fields, sort_by))} FROM {self.table}{where} "
+            f"ORDER BY {sort_by} {order}, id_review {order} LIMIT ? OFFSET ?",
+            [*params, limit, skip]
+        ).fetchall()
+        return [_to_doc(row) for row in rows]
+
+    def find(
+        self,
+        filters: ReviewFilter,
+        sort_by: str = "review_date",
+        direction: int = DESCENDING,
+        fields: Tuple[str, ...] = REVIEW_FIELDS,
+        limit: Optional[int] = None,
+        skip: int = 0,
+        after: Optional[Tuple[Any, str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of: {', '.join(SORT_FIELDS)}")
+
+        if limit is not None:
+            return iter(self._page(filters, sort_by, direction, fields, limit, skip, after))
+        return self._stream(filters, sort_by, direction, fields, skip, after)
+
+    def _stream(self, filters, sort_by, direction, fields, skip, after) -> Iterator[Dict[str, Any]]:
+        """All matching reviews in keyset pages of export_batch_size (no cursor held between pages)."""
+        size = settings.export_batch_size
+        while True:
+            page = self._page(filters, sort_by, direction, fields, size, skip, after)
+            yield from page
+            if len(page) < size:
+                return
+            skip, after = 0, (page[-1].get(sort_by), page[-1]["id_review"])
+
+    def record_scrape(self, place_id: str, sort_by: str, scrape: Dict[str, Any]) -> None:
+        with self._write() as connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO {self.scrapes_table} "
+                f"(place_id, sort_by, url, scraped_at, max_reviews, reviews_count, review_ids) "
+                f"VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (place_id, sort_by, scrape["url"], _sql_value(scrape["scraped_at"]), scrape["max_reviews"],
+                 scrape["reviews_count"], orjson.dumps(scrape["review_ids"]).decode())
+            )
+
+    def find_scrape(self, place_id: str, sort_by: str, since: datetime) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            f"SELECT * FROM {self.scrapes_table} WHERE place_id = ? AND sort_by = ? AND scraped_at >= ?",
+            (place_id, sort_by, _sql_value(since))
+        ).fetchone()
+        if row is None:
+            return None
+
+        scrape = dict(row)
+        scrape["scraped_at"] = datetime.fromisoformat(scrape["scraped_at"])
+        scrape["review_ids"] = orjson.loads(scrape["review_ids"])
+        return scrape
+
+
+# ============================================================================
+# CONFIGURED REPOSITORY
+# ============================================================================
+
+_repository: Optional[ReviewRepository] = None
+_repository_lock = threading.Lock()
+
+
+def mongodb_storage() -> bool:
+    """
+    Whether reviews are stored in MongoDB.
+
+    Place stats, review rollups (GET /api/reviews/stats) and the change stream
+    relay are built on the MongoDB collection and need it.
+    """
+    return settings.review_storage == "mongodb"
+
+
+def get_review_repository() -> ReviewRepository:
+    """Repository of the configured `review_storage` backend."""
+    global _repository
+    if mongodb_storage():
+        # Follows the shared client, which is recreated after close_connections()
+        return MongoReviewRepository(get_reviews_collection(), get_scrapes_collection())
+
+    with _repository_lock:
+        if _repository is None:
+            logger.info(f"Storing reviews in SQLite at {settings.review_storage_sqlite_path}")
+            _repository = SQLiteReviewRepository(settings.review_storage_sqlite_path)
+        return _repository
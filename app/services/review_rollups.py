@@ -0,0 +1,311 @@
+"""
+Precomputed review rollups for the stats endpoints.
+
+One `review_rollups` document per place, period ("day", "week", "month") and
+period start holds the review count, rated count, rating sum and rating
+histogram of the reviews published in that period:
+
+    {
+        "_id": {"place_id": "...", "period": "day", "period_start": datetime},
+        "place_id": "...",
+        "client_id": "...",
+        "period": "day",
+        "period_start": datetime,
+        "count": 12,
+        "rated": 12,
+        "rating_sum": 53.0,
+        "rating_histogram": {"1": 0, "2": 1, "3": 0, "4": 3, "5": 8}
+    }
+
+save_reviews_to_db runs an aggregation over the reviews it has just
+inserted that ends in a `$merge` adding them to the matching rollups, so
+rollups are updated incrementally inside MongoDB. Missing rollups are first
+created empty by an idempotent `$merge`: two saves creating the same rollup
+concurrently can fail with a duplicate key error, and only that step is safe
+to retry (a failed adding `$merge` may have applied part of its rollups). Stats queries read and sum
+rollups only: their cost depends on the number of places and periods asked
+for, not on the number of reviews. rebuild_review_rollups recomputes the
+rollups from the reviews collection with the same pipeline.
+
+Periods start at 00:00 UTC; weeks start on Monday.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+from pymongo.collection import Collection
+from pymongo.errors import DuplicateKeyError
+
+from app.config import settings
+from app.database import get_database, get_reviews_collection
+
+
+logger = logging.getLogger(__name__)
+
+
+PERIODS = ("day", "week", "month")
+STARS = ("1", "2", "3", "4", "5")
+SEED_ATTEMPTS = 3  # concurrent saves creating the same rollups race on the _id index
+
+
+def get_rollups_collection() -> Collection:
+    """Get review_rollups collection."""
+    return get_database()[settings.mongodb_review_rollups_collection]
+
+
+def period_start(date: datetime, period: str) -> datetime:
+    """Start of the period holding `date` (same result as $dateTrunc in the pipeline)."""
+    day = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+def _rollup_pipeline(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Aggregation that groups matching reviews into rollups (without the $merge stage)."""
+    is_rated = {"$isNumber": "$rating"}
+    star = {"$toString": {"$min": [5, {"$max": [1, {"$toInt": {"$round": ["$rating", 0]}}]}]}}
+
+    group = {
+        "_id": {"place_id": "$place_id", "period": "$bucket.period", "period_start": "$bucket.period_start"},
+        "client_id": {"$max": "$client_id"},
+        "count": {"$sum": 1},
+        "rated": {"$sum": {"$cond": [is_rated, 1, 0]}},
+        "rating_sum": {"$sum": {"$cond": [is_rated, "$rating", 0]}}
+    }
+    for s in STARS:
+        group[f"star_{s}"] = {"$sum": {"$cond": [{"$eq": ["$star", s]}, 1, 0]}}
+
+    return [
+        {"$match": {"place_id": {"$nin": [None, ""]}, "review_date": {"$type": "date"}, **match}},
+        {"$project": {
+            "place_id": 1,
+            "client_id": 1,
+            "rating": 1,
+            "star": {"$cond": [is_rated, star, None]},
+            "bucket": {"$map": {
+                "input": list(PERIODS),
+                "as": "period",
+                "in": {
+                    "period": "$$period",
+                    "period_start": {"$dateTrunc": {
+                        "date": "$review_date", "unit": "$$period", "startOfWeek": "monday"
+                    }}
+                }
+            }}
+        }},
+        {"$unwind": "$bucket"},
+        {"$group": group},
+        {"$project": {
+            "place_id": "$_id.place_id",
+            "client_id": 1,
+            "period": "$_id.period",
+            "period_start": "$_id.period_start",
+            "count": 1,
+            "rated": 1,
+            "rating_sum": 1,
+            "rating_histogram": {s: f"$star_{s}" for s in STARS}
+        }}
+    ]
+
+
+def _add_to_existing() -> List[Dict[str, Any]]:
+    """$merge whenMatched pipeline that adds the new rollup ($$new) to the stored one."""
+    update = {
+        "client_id": {"$ifNull": ["$$new.client_id", "$client_id"]},
+        "count": {"$add": ["$count", "$$new.count"]},
+        "rated": {"$add": ["$rated", "$$new.rated"]},
+        "rating_sum": {"$add": ["$rating_sum", "$$new.rating_sum"]}
+    }
+    for s in STARS:
+        update[f"rating_histogram.{s}"] = {
+            "$add": [{"$ifNull": [f"$rating_histogram.{s}", 0]}, f"$$new.rating_histogram.{s}"]
+        }
+    return [{"$set": update}]
+
+
+def _seed_rollups(match: Dict[str, Any]):
+    """
+    Create the missing rollups of matching reviews with zero counts.
+
+    Existing rollups are kept, so the $merge is idempotent and is retried when
+    a concurrent save inserted the same rollup first (DuplicateKeyError).
+    """
+    pipeline = _rollup_pipeline(match)
+    pipeline.append({"$project": {
+        "place_id": 1,
+        "client_id": 1,
+        "period": 1,
+        "period_start": 1,
+        "count": {"$literal": 0},
+        "rated": {"$literal": 0},
+        "rating_sum": {"$literal": 0},
+        "rating_histogram": {"$literal": {s: 0 for s in STARS}}
+    }})
+    pipeline.append({"$merge": {
+        "into": settings.mongodb_review_rollups_collection,
+        "on": "_id",
+        "whenMatched": "keepExisting",
+        "whenNotMatched": "insert"
+    }})
+
+    for attempt in range(1, SEED_ATTEMPTS + 1):
+        try:
+            get_reviews_collection().aggregate(pipeline)
+            return
+        except DuplicateKeyError:
+            if attempt == SEED_ATTEMPTS:
+                raise
+            logger.debug(f"Concurrent rollup insert, retrying ({attempt}/{SEED_ATTEMPTS})")
+
+
+def add_reviews_to_rollups(review_ids: List[str]):
+    """
+    Add newly inserted reviews to their rollups with one $merge aggregation.
+
+    Args:
+        review_ids: id_review of the reviews that were just inserted
+    """
+    if not review_ids:
+        return
+
+    match = {"id_review": {"$in": review_ids}}
+    _seed_rollups(match)
+
+    pipeline = _rollup_pipeline(match)
+    pipeline.append({"$merge": {
+        "into": settings.mongodb_review_rollups_collection,
+        "on": "_id",
+        "whenMatched": _add_to_existing(),
+        "whenNotMatched": "insert"
+    }})
+    get_reviews_collection().aggregate(pipeline)
+
+
+def remove_review_from_rollups(review: Dict[str, Any]):
+    """Remove a deleted review from its rollups."""
+    place_id = review.get("place_id")
+    review_date = review.get("review_date")
+    if not place_id or not isinstance(review_date, datetime):
+        return
+
+    inc = {"count": -1}
+    if isinstance(review.get("rating"), (int, float)):
+        star = str(min(max(int(round(review["rating"])), 1), 5))
+        inc.update({"rated": -1, "rating_sum": -review["rating"], f"rating_histogram.{star}": -1})
+
+    collection = get_rollups_collection()
+    for period in PERIODS:
+        key = {"place_id": place_id, "period": period, "period_start": period_start(review_date, period)}
+        collection.update_one({"_id": key}, {"$inc": inc})
+
+
+def rebuild_review_rollups(place_id: Optional[str] = None):
+    """
+    Recompute rollups from the reviews collection.
+
+    Args:
+        place_id: Rebuild only this place (default: every place)
+    """
+    match = {"place_id": place_id} if place_id else {}
+    get_rollups_collection().delete_many(match)
+
+    pipeline = _rollup_pipeline(match)
+    pipeline.append({"$merge": {
+        "into": settings.mongodb_review_rollups_collection,
+        "on": "_id",
+        "whenMatched": "replace",
+        "whenNotMatched": "insert"
+    }})
+    get_reviews_collection().aggregate(pipeline, allowDiskUse=True)
+    logger.info(f"Rebuilt review rollups ({'place ' + place_id if place_id else 'all places'})")
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def _summarize(count: int, rated: int, rating_sum: float, histogram: Dict[str, int]) -> Dict[str, Any]:
+    return {
+        "count": count,
+        "average_rating": round(rating_sum / rated, 2) if rated else None,
+        "rating_histogram": {s: histogram.get(s, 0) for s in STARS}
+    }
+
+
+def get_review_stats(
+    period: str = "month",
+    place_id: Optional[str] = None,
+    client_id: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Rating histogram and per-period counts and averages, summed from rollups.
+
+    Args:
+        period: Series granularity ("day", "week" or "month")
+        place_id: Only this place
+        client_id: Only places of this client
+        date_from: First period to include (by period start)
+        date_to: Last period to include (by period start)
+
+    Returns:
+        Dictionary with the totals over the range and the series per period
+    """
+    match: Dict[str, Any] = {"period": period}
+    if place_id is not None:
+        match["place_id"] = place_id
+    if client_id is not None:
+        match["client_id"] = client_id
+    if date_from is not None or date_to is not None:
+        match["period_start"] = {}
+        if date_from is not None:
+            match["period_start"]["$gte"] = period_start(date_from, period)
+        if date_to is not None:
+            match["period_start"]["$lte"] = date_to
+
+    group = {
+        "_id": "$period_start",
+        "count": {"$sum": "$count"},
+        "rated": {"$sum": "$rated"},
+        "rating_sum": {"$sum": "$rating_sum"}
+    }
+    for s in STARS:
+        group[f"star_{s}"] = {"$sum": f"$rating_histogram.{s}"}
+
+    rows = get_rollups_collection().aggregate([
+        {"$match": match},
+        {"$group": group},
+        {"$sort": {"_id": 1}}
+    ])
+
+    series = []
+    totals = {"count": 0, "rated": 0, "rating_sum": 0.0, "histogram": {s: 0 for s in STARS}}
+
+    for row in rows:
+        histogram = {s: row.get(f"star_{s}", 0) for s in STARS}
+        if not row["count"]:
+            continue  # Every review of the period was deleted
+
+        series.append({"period_start": row["_id"], **_summarize(row["count"], row["rated"], row["rating_sum"], histogram)})
+
+        totals["count"] += row["count"]
+        totals["rated"] += row["rated"]
+        totals["rating_sum"] += row["rating_sum"]
+        for s in STARS:
+            totals["histogram"][s] += histogram[s]
+
+    return {
+        "place_id": place_id,
+        "client_id": client_id,
+        "period": period,
+        "totals": _summarize(totals["count"], totals["rated"], totals["rating_sum"], totals["histogram"]),
+        "series": series
+    }
@@ -0,0 +1,96 @@
+"""
+Fast JSON serialization of review responses.
+
+Building a ReviewResponse per stored document and letting FastAPI validate
+and encode the response_model again costs two Pydantic passes per review
+plus the standard json encoder, which dominates CPU time on 500-review
+pages. Review documents read from MongoDB (or from a finished scraping job)
+are already well-formed, so the endpoints returning review lists copy the
+public fields of each document, coerce the few fields Pydantic would
+coerce, and return an ORJSONResponse, which FastAPI sends as is.
+
+The JSON output is the same as the response_model path: same fields in the
+same order, ratings as floats, datetimes in ISO 8601 (orjson formats naive
+datetimes like datetime.isoformat()). The endpoints keep their
+response_model for the OpenAPI schema.
+
+Clients can ask for a subset of the fields (`fields=id_review,rating`): the
+same subset is used as the MongoDB projection, so unrequested fields are
+neither read nor sent. In compact mode a list of reviews is sent as one
+array of values per review, in the order given by a `fields` array.
+"""
+from typing import Iterable, List, Dict, Any, Optional, Tuple
+
+from app.models import ReviewResponse
+
+
+REVIEW_FIELDS = tuple(ReviewResponse.model_fields)
+
+# Stored values that ReviewResponse would coerce
+COERCIONS = (("rating", float), ("n_review_user", int), ("n_photo_user", int))
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Parse a comma-separated list of review fields.
+
+    Args:
+        fields: e.g. "id_review,rating,review_date"; empty or None for all fields
+
+    Returns:
+        Requested fields in request order, without duplicates
+
+    Raises:
+        ValueError: If a field is not a review field
+    """
+    if not fields:
+        return REVIEW_FIELDS
+
+    requested = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in requested if field not in REVIEW_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+
+    return requested or REVIEW_FIELDS
+
+
+def projection(fields: Tuple[str, ...] = REVIEW_FIELDS) -> Dict[str, int]:
+    """MongoDB projection that reads only the given fields."""
+    return {"_id": 0, **{field: 1 for field in fields}}
+
+
+def review_to_dict(doc: Dict[str, Any], fields: Tuple[str, ...] = REVIEW_FIELDS) -> Dict[str, Any]:
+    """Public fields of a review document, typed as ReviewResponse would type them."""
+    review = {field: doc.get(field) for field in fields}
+    for field, cast in COERCIONS:
+        value = review.get(field)
+        if value is not None:
+            review[field] = cast(value)
+    return review
+
+
+def review_to_row(doc: Dict[str, Any], fields: Tuple[str, ...] = REVIEW_FIELDS) -> List[Any]:
+    """Compact form of review_to_dict: values only, in `fields` order."""
+    return list(review_to_dict(doc, fields).values())
+
+
+def reviews_to_dicts(docs: Iterable[Dict[str, Any]], fields: Tuple[str, ...] = REVIEW_FIELDS) -> List[Dict[str, Any]]:
+    """review_to_dict over a list of review documents."""
+    return [review_to_dict(doc, fields) for doc in docs]
+
+
+def reviews_payload(
+    docs: Iterable[Dict[str, Any]],
+    fields: Tuple[str, ...] = REVIEW_FIELDS,
+    compact: bool = False
+) -> Dict[str, Any]:
+    """
+    The `reviews` part of a review list response.
+
+    Returns:
+        {"reviews": [{...}, ...]}, or in compact mode
+        {"fields": [...], "reviews": [[...], ...]}
+    """
+    if compact:
+        return {"fields": list(fields), "reviews": [review_to_row(doc, fields) for doc in docs]}
+    return {"reviews": reviews_to_dicts(docs, fields)}
@@ -0,0 +1,150 @@
+"""
+Freshness-based scrape result cache.
+
+Every completed scrape is recorded in the review storage (one record per
+canonical place and sort order, see ReviewRepository.record_scrape) with the
+IDs of the reviews it returned. A new request that accepts
+results up to `max_age` seconds old is answered from those stored reviews
+through a synthesized finished RQ job, without launching a browser.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+
+from redis import Redis
+from rq import Queue
+from rq.job import Job, JobStatus as RQJobStatus
+from rq.results import Result
+
+from app.config import settings
+from app.services.metrics import increment_counter
+from app.services.place_identity import canonical_place_id
+from app.services.review_repository import get_review_repository
+
+
+logger = logging.getLogger(__name__)
+
+
+METRICS_GROUP = "scrape_cache"
+
+def record_scrape(url: str, sort_by: str, max_reviews: int, reviews: List[Dict]) -> None:
+    """
+    Record a completed scrape so later requests can be served from it.
+
+    Args:
+        url: Google Maps URL
+        sort_by: Sort option used
+        max_reviews: Requested review count
+        reviews: Reviews returned by the scraper (in scrape order)
+    """
+    try:
+        get_review_repository().record_scrape(canonical_place_id(url), sort_by, {
+            "url": url,
+            "scraped_at": datetime.utcnow(),
+            "max_reviews": max_reviews,
+            "reviews_count": len(reviews),
+            "review_ids": [r["id_review"] for r in reviews if r.get("id_review")]
+        })
+    except Exception as e:
+        logger.warning(f"Could not record scrape for {url}: {e}")
+
+
+def find_fresh_reviews(url: str, sort_by: str, max_reviews: int, max_age: int) -> Optional[List[Dict]]:
+    """
+    Get stored reviews of a scrape completed within `max_age` seconds.
+
+    A stored scrape only qualifies if it asked for at least `max_reviews`
+    reviews, or if it returned fewer than it asked for (the place had no more).
+
+    Returns:
+        Reviews in original scrape order, or None on a cache miss
+    """
+    repository = get_review_repository()
+    scrape = repository.find_scrape(
+        canonical_place_id(url), sort_by, datetime.utcnow() - timedelta(seconds=max_age)
+    )
+
+    if scrape is None:
+        return None
+
+    exhausted = scrape["reviews_count"] < scrape["max_reviews"]
+    if scrape["max_reviews"] < max_reviews and not exhausted:
+        return None
+
+    review_ids = scrape["review_ids"][:max_reviews]
+    by_id = repository.get_many(review_ids)
+
+    # Reviews deleted since the scrape make the cached result incomplete
+    if len(by_id) < len(review_ids):
+        return None
+
+    return [by_id[review_id] for review_id in review_ids]
+
+
+def create_cached_job(queue: Queue, url: str, max_reviews: int, sort_by: str, reviews: List[Dict]) -> Job:
+    """
+    Create an already-finished RQ job whose result holds the cached reviews.
+
+    The job is never enqueued; it only exists so /status and /result work the
+    same way for cached and scraped results.
+    """
+    from app.tasks.scraper_task import scrape_reviews_task
+
+    redis_conn: Redis = queue.connection
+    now = datetime.utcnow()
+    ttl = settings.job_result_ttl
+
+    job = Job.create(
+        scrape_reviews_task,
+        kwargs={"url": url, "max_reviews": max_reviews, "sort_by": sort_by},
+        connection=redis_conn,
+        serializer=queue.serializer,
+        result_ttl=ttl,
+        origin=queue.name,
+        status=RQJobStatus.FINISHED,
+        meta={"served_from_cache": True, "progress": f"Completed: {len(reviews)} reviews (cached)"}
+    )
+    job.enqueued_at = job.started_at = job.ended_at = now
+
+    result: Dict[str, Any] = {
+        "status": "success",
+        "reviews_count": len(reviews),
+        "reviews": reviews,
+        "started_at": now.isoformat(),
+        "finished_at": now.isoformat(),
+        "duration_seconds": 0.0,
+        "served_from_cache": True
+    }
+
+    with redis_conn.pipeline() as pipe:
+        job.save(pipeline=pipe)
+        Result.create(job, Result.Type.SUCCESSFUL, ttl, return_value=result, pipeline=pipe)
+        queue.finished_job_registry.add(job, ttl, pipeline=pipe)
+        job.cleanup(ttl, pipeline=pipe, remove_from_queue=False)
+        pipe.execute()
+
+    return job
+
+
+def serve_from_cache(queue: Queue, url: str, max_reviews: int, sort_by: str, max_age: int) -> Optional[Job]:
+    """
+    Answer a scraping request from a recent scrape if one is fresh enough.
+
+    Returns:
+        Finished job holding the cached result, or None on a cache miss
+    """
+    try:
+        reviews = find_fresh_reviews(url, sort_by, max_reviews, max_age)
+    except Exception as e:
+        logger.warning(f"Scrape cache lookup failed for {url}: {e}")
+        reviews = None
+
+    if reviews is None:
+        increment_counter(METRICS_GROUP, "misses")
+        return None
+
+    job = create_cached_job(queue, url, max_reviews, sort_by, reviews)
+    increment_counter(METRICS_GROUP, "hits")
+    logger.info(f"Served {len(reviews)} cached reviews for {url} as job {job.id}")
+    return job
+
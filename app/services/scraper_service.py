@@ -1,19 +1,29 @@
 """
 Scraper service that wraps the GoogleMapsScraper class.
-Provides high-level methods for scraping reviews and saving to MongoDB.
+Provides high-level methods for scraping reviews and saving them (see
+app.services.review_repository).
 """
 import logging
-from typing import List, Dict
+from typing import List, Dict, Callable, Optional
 import sys
 import os
 
 # Add parent directory to path to import googlemaps module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-from googlemaps import GoogleMapsScraper
 from app.config import settings
-from app.database import get_reviews_collection
+from app.database import redis_enabled
 from app.models import ReviewInDB
+from app.services.scrape_cache import record_scrape
+from app.services.place_identity import canonical_place_id
+from app.services.browser_pool import acquire_scraper
+from app.services.scraping_errors import InvalidPlaceError, SelectorNotFoundError
+from app.services.review_events import publish_new_reviews, publish_from_save
+from app.services.place_stats import apply_inserted_reviews
+from app.services.review_rollups import add_reviews_to_rollups
+from app.services.recent_reviews import add_recent_reviews
+from app.services.review_repository import get_review_repository, mongodb_storage
+from app.services.response_cache import bump_reviews_version
 
 
 logger = logging.getLogger(__name__)
@@ -31,7 +41,8 @@ SORT_MAP = {
 def scrape_reviews(
     url: str,
     max_reviews: int = 100,
-    sort_by: str = "newest"
+    sort_by: str = "newest",
+    on_scroll: Optional[Callable[[int, int], Optional[int]]] = None
 ) -> List[Dict]:
     """
     Scrape reviews from a Google Maps URL.
@@ -40,20 +51,25 @@ def scrape_reviews(
         url: Google Maps URL
         max_reviews: Maximum number of reviews to scrape
         sort_by: Sort option (newest, most_relevant, highest_rating, lowest_rating)
+        on_scroll: Optional callback (reviews_so_far, scrolls) called after each
+            scroll; may return a larger review target to extend the scrape
 
     Returns:
         List of review dictionaries
 
     Raises:
-        Exception: If scraping fails
+        InvalidPlaceError: If the URL does not lead to a place
+        SelectorNotFoundError: If the reviews panel could not be found
+        Exception: If scraping fails (the original exception is re-raised so
+            callers can tell timeouts and other failure types apart)
     """
     logger.info(f"Starting scraping for URL: {url}, max_reviews: {max_reviews}, sort_by: {sort_by}")
 
     reviews = []
 
     try:
-        # Create scraper instance with context manager
-        with GoogleMapsScraper(debug=not settings.headless_mode) as scraper:
+        # Get a scraper (warm browser reused across jobs when enabled)
+        with acquire_scraper() as scraper:
 
             # Sort reviews
             sort_index = SORT_MAP.get(sort_by, 0)
@@ -67,25 +83,87 @@ def scrape_reviews(
 
             # Get reviews with offset 0 and max_reviews limit
             logger.info(f"Fetching up to {max_reviews} reviews...")
-            reviews = scraper.get_reviews(offset=0, max_reviews=max_reviews)
+            reviews = scraper.get_reviews(offset=0, max_reviews=max_reviews, on_scroll=on_scroll)
 
             logger.info(f"Successfully scraped {len(reviews)} reviews")
 
-            # Save to MongoDB
+            # An empty result after a failed sort means the page never showed reviews
+            if not reviews and sort_result == -1:
+                if '/maps/place/' not in (scraper.page.url or ''):
+                    raise InvalidPlaceError(f"URL does not lead to a Google Maps place: {url}")
+                raise SelectorNotFoundError(f"Reviews panel not found for URL: {url}")
+
+            # Stamp the canonical place ID on every review
+            place_id = canonical_place_id(url)
+            for review in reviews:
+                review['place_id'] = place_id
+
+            # Save to the review storage
             if reviews:
                 saved_count = save_reviews_to_db(reviews)
-                logger.info(f"Saved {saved_count} reviews to MongoDB")
+                logger.info(f"Saved {saved_count} reviews")
+
+            # Remember this scrape for freshness-based reuse
+            record_scrape(url, sort_by, max_reviews, reviews)
 
     except Exception as e:
         logger.error(f"Error during scraping: {e}", exc_info=True)
-        raise Exception(f"Scraping failed: {str(e)}")
+        raise
 
     return reviews
 
 
+def get_new_reviews_for_place(
+    url: str,
+    client_id: Optional[str] = None,
+    branch_id: Optional[str] = None,
+    max_reviews: Optional[int] = None
+) -> List[Dict]:
+    """
+    Scrape the newest reviews of a monitored place and keep the unseen ones.
+
+    Reviews are not saved here; the caller saves them, which publishes the
+    new-review events. Like scrape_reviews, they are stamped with the
+    canonical place ID of the URL, so monitored and ad-hoc scrapes of a place
+    share its reviews, stats and scrape cache.
+
+    Args:
+        url: Google Maps URL of the place
+        client_id: Client owning the place
+        branch_id: Branch of the place
+        max_reviews: Newest reviews to inspect (default: default_reviews_count)
+
+    Returns:
+        Reviews not yet stored
+    """
+    max_reviews = max_reviews or settings.default_reviews_count
+
+    with acquire_scraper() as scraper:
+        scraper.sort_by(url, SORT_MAP["newest"])
+        reviews = scraper.get_reviews(offset=0, max_reviews=max_reviews)
+
+    place_id = canonical_place_id(url)
+    for review in reviews:
+        review['place_id'] = place_id
+        review['client_id'] = client_id
+        review['branch_id'] = branch_id
+
+    ids = [review['id_review'] for review in reviews if review.get('id_review')]
+    existing = get_review_repository().existing_ids(ids)
+
+    return [review for review in reviews if review.get('id_review') not in existing]
+
+
 def save_reviews_to_db(reviews: List[Dict]) -> int:
     """
-    Save reviews to MongoDB, avoiding duplicates.
+    Save reviews to the review storage, avoiding duplicates.
+
+    New reviews are inserted with one bulk write and, with MongoDB storage,
+    added to their places' stats (see app.services.place_stats) and rollups
+    (see app.services.review_rollups). Outside local execution mode they are
+    also added to the recent-review cache (see app.services.recent_reviews)
+    and, in outbox mode, published to the new-review event stream (see
+    app.services.review_events).
 
     Args:
         reviews: List of review dictionaries
@@ -96,30 +174,48 @@ def save_reviews_to_db(reviews: List[Dict]) -> int:
     if not reviews:
         return 0
 
-    collection = get_reviews_collection()
-    saved_count = 0
-
+    docs = {}
     for review in reviews:
         try:
             # Validate and create ReviewInDB model
             review_doc = ReviewInDB(**review)
+            docs.setdefault(review_doc.id_review, review_doc.dict())
+        except Exception as e:
+            review_id = review.get('id_review', 'unknown')
+            logger.error(f"Error saving review {review_id}: {e}")
+            logger.debug(f"Review data that failed: {review}")
+
+    # Reviews that already exist (by id_review) are skipped
+    inserted = get_review_repository().insert_new(list(docs.values()))
 
-            # Check if review already exists (by id_review)
-            existing = collection.find_one({"id_review": review_doc.id_review})
+    if not inserted:
+        return 0
 
-            if existing:
-                logger.debug(f"Review {review_doc.id_review} already exists, skipping")
-                continue
+    if mongodb_storage():
+        try:
+            apply_inserted_reviews(inserted)
+        except Exception as e:
+            logger.error(f"Could not update place stats for {len(inserted)} reviews: {e}")
 
-            # Insert new review
-            collection.insert_one(review_doc.dict())
-            saved_count += 1
-            logger.debug(f"Inserted review {review_doc.id_review}")
+        try:
+            add_reviews_to_rollups([doc['id_review'] for doc in inserted])
+        except Exception as e:
+            logger.error(f"Could not update review rollups for {len(inserted)} reviews: {e}")
 
+    # Local execution mode runs without Redis
+    if redis_enabled():
+        try:
+            add_recent_reviews(inserted)
         except Exception as e:
-            review_id = review.get('id_review', 'unknown')
-            logger.error(f"Error saving review {review_id}: {e}")
-            logger.debug(f"Review data that failed: {review}")
-            continue
+            logger.error(f"Could not add {len(inserted)} reviews to the recent reviews cache: {e}")
+
+        if publish_from_save():
+            try:
+                publish_new_reviews(inserted)
+            except Exception as e:
+                logger.error(f"Could not publish {len(inserted)} new-review events: {e}")
+
+    # Cached API responses are stale now (after stats and rollups are updated)
+    bump_reviews_version()
 
-    return saved_count
+    return len(inserted)
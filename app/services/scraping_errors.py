@@ -0,0 +1,83 @@
+"""
+Scraping error types and failure classification.
+
+Failures are grouped into classes with different recovery strategies: a
+navigation timeout is usually transient, a crashed browser needs a fresh one,
+and an invalid place will never succeed no matter how often it is retried.
+"""
+from enum import Enum
+
+from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeout
+from pymongo.errors import PyMongoError
+from rq.timeouts import JobTimeoutException
+
+
+class ScrapingError(Exception):
+    """Base class for errors detected by the scraper service."""
+
+
+class SelectorNotFoundError(ScrapingError):
+    """The reviews panel or its controls were not found on the page."""
+
+
+class InvalidPlaceError(ScrapingError):
+    """The URL does not lead to a Google Maps place with reviews."""
+
+
+class FailureClass(str, Enum):
+    """Failure classes used by the retry policy."""
+    TIMEOUT = "timeout"
+    SELECTOR_NOT_FOUND = "selector_not_found"
+    BROWSER_CRASH = "browser_crash"
+    DATABASE = "database"
+    INVALID_PLACE = "invalid_place"
+    UNKNOWN = "unknown"
+
+
+# Fragments of Playwright error messages raised when the browser went away
+BROWSER_CRASH_MESSAGES = (
+    "target closed",
+    "has been closed",
+    "browser closed",
+    "crashed",
+    "connection closed",
+)
+
+
+def classify_failure(exc: BaseException) -> FailureClass:
+    """
+    Classify a scraping exception.
+
+    Args:
+        exc: Exception raised while scraping
+
+    Returns:
+        FailureClass of the exception
+    """
+    if isinstance(exc, InvalidPlaceError):
+        return FailureClass.INVALID_PLACE
+    if isinstance(exc, SelectorNotFoundError):
+        return FailureClass.SELECTOR_NOT_FOUND
+    if isinstance(exc, (JobTimeoutException, PlaywrightTimeout)):
+        return FailureClass.TIMEOUT
+    if isinstance(exc, PyMongoError):
+        return FailureClass.DATABASE
+    if isinstance(exc, PlaywrightError):
+        message = str(exc).lower()
+        if any(fragment in message for fragment in BROWSER_CRASH_MESSAGES):
+            return FailureClass.BROWSER_CRASH
+        if "timeout" in message:
+            return FailureClass.TIMEOUT
+    return FailureClass.UNKNOWN
+
+
+def browser_is_reusable(exc: BaseException) -> bool:
+    """
+    Whether the browser used when `exc` was raised can serve another job.
+
+    A crashed browser is useless, and a job timeout interrupts Playwright in
+    the middle of a call, leaving its connection in an unknown state.
+    """
+    if isinstance(exc, JobTimeoutException):
+        return False
+    return classify_failure(exc) != FailureClass.BROWSER_CRASH
@@ -0,0 +1,341 @@
+"""
+Webhook delivery service.
+
+Webhooks are one consumer of the new-review event stream (see
+app.services.review_events): the dispatcher (webhook_dispatcher.py) reads
+review events through the "webhooks" consumer group, groups them into one
+`new_reviews` event per place with a webhook, and delivers them with a
+WebhookDeliveryService:
+
+- one shared httpx.AsyncClient, so connections to each receiver are kept
+  alive and reused across deliveries;
+- at most `webhook_concurrency` requests in flight;
+- events of several places bound for the same webhook URL within one batch
+  are sent in a single request;
+- failed deliveries are re-scheduled with exponential backoff in a Redis
+  sorted set instead of blocking the dispatcher, and moved to a failed list
+  after `webhook_max_retries` retries.
+
+Stream entries are acknowledged once delivered or re-scheduled, so a crashed
+dispatcher re-delivers (at-least-once). A batch holding a single event keeps
+the documented `new_reviews` payload; several events are wrapped in a
+`new_reviews_batch` payload (see docs/WEBHOOKS.md).
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+import httpx
+
+from app.config import settings
+from app.database import get_redis_client, get_places_collection
+from app.services.metrics import increment_counter
+from app.services.review_events import ReviewEventConsumer, WEBHOOKS_GROUP
+from app.services.review_repository import get_review_repository
+
+
+logger = logging.getLogger(__name__)
+
+
+METRICS_GROUP = "webhooks"
+RETRY_KEY = "webhooks:retry"
+FAILED_KEY = "webhooks:failed"
+FAILED_MAX_ENTRIES = 1000
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def build_event(
+    place_id: str,
+    client_id: Optional[str],
+    branch_id: Optional[str],
+    webhook_url: str,
+    place_name: Optional[str],
+    place_url: str,
+    new_reviews: List[Dict]
+) -> Dict[str, Any]:
+    """Build the `new_reviews` event of one place (the documented webhook payload)."""
+    reviews = [{k: v for k, v in review.items() if k != '_id'} for review in new_reviews]
+    return {
+        "webhook_url": webhook_url,
+        "attempt": 0,
+        "payload": {
+            "event": "new_reviews",
+            "client_id": client_id,
+            "branch_id": branch_id,
+            "place_id": place_id,
+            "place_name": place_name,
+            "place_url": place_url,
+            "new_reviews_count": len(reviews),
+            "timestamp": datetime.utcnow().isoformat(),
+            "reviews": reviews
+        }
+    }
+
+
+def build_request_body(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Request body for the events bound to one webhook URL."""
+    if len(events) == 1:
+        return events[0]["payload"]
+
+    return {
+        "event": "new_reviews_batch",
+        "timestamp": datetime.utcnow().isoformat(),
+        "events_count": len(events),
+        "new_reviews_count": sum(e["payload"]["new_reviews_count"] for e in events),
+        "events": [e["payload"] for e in events]
+    }
+
+
+def retry_delay(attempt: int) -> float:
+    """Exponential backoff with jitter (seconds) before retry number `attempt`."""
+    delay = settings.webhook_retry_delay * (2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class WebhookDeliveryService:
+    """Concurrent webhook delivery over a shared keep-alive HTTP client."""
+
+    def __init__(
+        self,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        batching: Optional[bool] = None
+    ):
+        self.concurrency = concurrency or settings.webhook_concurrency
+        self.timeout = timeout or settings.webhook_timeout
+        self.batching = settings.webhook_batching_enabled if batching is None else batching
+        self.client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def __aenter__(self) -> "WebhookDeliveryService":
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency
+            ),
+            headers={"User-Agent": f"{settings.app_name}/{settings.app_version}"}
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb):
+        await self.client.aclose()
+        self.client = None
+
+    def group(self, events: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Group events into requests: one per webhook URL when batching, else one per event."""
+        if not self.batching:
+            return [[event] for event in events]
+
+        by_url: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for event in events:
+            by_url[event["webhook_url"]].append(event)
+        return list(by_url.values())
+
+    async def post(self, url: str, body: Dict[str, Any]) -> bool:
+        """POST one request; True on a 2xx response."""
+        async with self._semaphore:
+            try:
+                response = await self.client.post(
+                    url,
+                    content=json.dumps(body, default=_json_default),
+                    headers={"Content-Type": "application/json"}
+                )
+            except httpx.HTTPError as e:
+                logger.warning(f"Webhook to {url} failed: {e}")
+                return False
+
+        if response.is_success:
+            return True
+
+        logger.warning(f"Webhook to {url} returned {response.status_code}")
+        return False
+
+    async def deliver(self, events: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Deliver events concurrently.
+
+        Args:
+            events: Events built by build_event
+
+        Returns:
+            Groups of events whose request failed
+        """
+        groups = self.group(events)
+        results = await asyncio.gather(*(
+            self.post(group[0]["webhook_url"], build_request_body(group))
+            for group in groups
+        ))
+
+        increment_counter(METRICS_GROUP, "requests", len(groups))
+        return [group for group, ok in zip(groups, results) if not ok]
+
+
+# ============================================================================
+# DISPATCHER
+# ============================================================================
+
+def events_for_reviews(reviews: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Build one `new_reviews` event per place that has a webhook.
+
+    Reviews carry the canonical place ID of their URL; monitoring records it on
+    the place document as `canonical_place_id`.
+
+    Args:
+        reviews: New review documents (from the review stream)
+
+    Returns:
+        Events built by build_event; reviews of places without webhook are dropped
+    """
+    by_place: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for review in reviews:
+        if review.get("place_id"):
+            by_place[review["place_id"]].append(review)
+
+    if not by_place:
+        return []
+
+    places = get_places_collection().find(
+        {"canonical_place_id": {"$in": list(by_place)}, "webhook_url": {"$nin": [None, ""]}},
+        {"_id": 0, "place_id": 1, "canonical_place_id": 1, "client_id": 1, "branch_id": 1,
+         "webhook_url": 1, "name": 1, "url": 1}
+    )
+
+    return [
+        build_event(
+            place_id=place["place_id"],
+            client_id=place.get("client_id"),
+            branch_id=place.get("branch_id"),
+            webhook_url=place["webhook_url"],
+            place_name=place.get("name"),
+            place_url=place.get("url"),
+            new_reviews=by_place[place["canonical_place_id"]]
+        )
+        for place in places
+    ]
+
+
+def _pop_due_retries(redis_conn, limit: int) -> List[Dict[str, Any]]:
+    """Take up to `limit` events whose retry is due."""
+    events = []
+    for raw in redis_conn.zrangebyscore(RETRY_KEY, 0, time.time(), start=0, num=limit):
+        # zrem guards against another dispatcher taking the same retry
+        if redis_conn.zrem(RETRY_KEY, raw):
+            events.append(json.loads(raw))
+    return events
+
+
+def _mark_notified(events: List[Dict[str, Any]]):
+    """Flag the delivered reviews as notified."""
+    review_ids = [
+        review["id_review"]
+        for event in events
+        for review in event["payload"]["reviews"]
+        if review.get("id_review")
+    ]
+    if review_ids:
+        get_review_repository().mark_notified(review_ids)
+
+
+def _reschedule(redis_conn, events: List[Dict[str, Any]]):
+    """Schedule failed events for retry, or move them to the failed list."""
+    with redis_conn.pipeline() as pipe:
+        for event in events:
+            event["attempt"] += 1
+            if event["attempt"] > settings.webhook_max_retries:
+                increment_counter(METRICS_GROUP, "failed")
+                logger.error(f"Webhook to {event['webhook_url']} for place "
+                             f"{event['payload']['place_id']} failed after {event['attempt']} attempts")
+                pipe.lpush(FAILED_KEY, json.dumps(event, default=_json_default))
+                pipe.ltrim(FAILED_KEY, 0, FAILED_MAX_ENTRIES - 1)
+            else:
+                increment_counter(METRICS_GROUP, "retried")
+                due_at = time.time() + retry_delay(event["attempt"])
+                pipe.zadd(RETRY_KEY, {json.dumps(event, default=_json_default): due_at})
+        pipe.execute()
+
+
+def _take_batch(consumer: ReviewEventConsumer):
+    """Due retries plus a batch of new review events (and their stream entry IDs)."""
+    limit = settings.webhook_batch_max_events
+    events = _pop_due_retries(consumer.redis, limit)
+
+    entries = consumer.read(limit)
+    entry_ids = [entry_id for entry_id, _ in entries]
+    events.extend(events_for_reviews([review for _, review in entries]))
+
+    return events, entry_ids
+
+
+async def dispatch_once(service: WebhookDeliveryService, consumer: ReviewEventConsumer) -> int:
+    """
+    Deliver one batch of events.
+
+    Returns:
+        Number of stream entries and retries handled
+    """
+    events, entry_ids = await asyncio.to_thread(_take_batch, consumer)
+
+    if events:
+        failed_groups = await service.deliver(events)
+        failed = [event for group in failed_groups for event in group]
+        failed_ids = {id(event) for event in failed}
+        delivered = [event for event in events if id(event) not in failed_ids]
+
+        increment_counter(METRICS_GROUP, "delivered", len(delivered))
+
+        if delivered:
+            try:
+                await asyncio.to_thread(_mark_notified, delivered)
+            except Exception as e:
+                logger.error(f"Could not mark delivered reviews as notified: {e}")
+        if failed:
+            await asyncio.to_thread(_reschedule, consumer.redis, failed)
+
+    # Delivered or safely re-scheduled: the stream entries are done
+    await asyncio.to_thread(consumer.ack, entry_ids)
+
+    return len(entry_ids) + len(events)
+
+
+async def run_dispatcher(stop: Optional[asyncio.Event] = None, consumer_name: str = "dispatcher"):
+    """
+    Deliver webhook events from the review stream until `stop` is set.
+
+    Waits up to `webhook_batch_window` seconds for new events between batches
+    so events of several places can accumulate into one request per URL.
+    """
+    stop = stop or asyncio.Event()
+    consumer = ReviewEventConsumer(WEBHOOKS_GROUP, consumer_name, get_redis_client())
+    consumer.ensure_group()
+
+    async with WebhookDeliveryService() as service:
+        logger.info(f"Webhook dispatcher '{consumer_name}' started (concurrency {service.concurrency}, "
+                    f"batching {'on' if service.batching else 'off'})")
+
+        while not stop.is_set():
+            try:
+                handled = await dispatch_once(service, consumer)
+            except Exception as e:
+                logger.error(f"Webhook dispatch failed: {e}", exc_info=True)
+                handled = 0
+
+            # Short batch: pause so the next one can accumulate
+            if handled < settings.webhook_batch_max_events:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=settings.webhook_batch_window)
+                except asyncio.TimeoutError:
+                    pass
+
+    logger.info("Webhook dispatcher stopped")
@@ -1,15 +1,22 @@
 """
 Task for monitoring places and detecting new reviews.
-Sends webhook notifications when new reviews are found.
+New reviews are only saved here; saving publishes them to the new-review
+event stream, from which webhooks and other consumers pick them up.
+
+Each place is checked on its own adaptive interval (see
+app.services.adaptive_polling); a monitoring cycle only checks places whose
+`next_check_at` has passed.
 """
 import logging
 from datetime import datetime
 from typing import Dict, Any
 import asyncio
 
-from app.database import get_places_collection, get_reviews_collection
+from app.database import get_places_collection
 from app.services.scraper_service import get_new_reviews_for_place, save_reviews_to_db
-from app.services.webhook_service import notify_new_reviews
+from app.services.adaptive_polling import compute_place_schedule, polling_savings_report
+from app.services.place_identity import canonical_place_id
+from app.services.place_stats import get_review_count
 from app.config import settings
 
 
@@ -30,7 +37,6 @@ async def monitor_place_async(place_data: Dict) -> Dict[str, Any]:
     client_id = place_data.get('client_id')
     branch_id = place_data.get('branch_id')
     url = place_data.get('url')
-    webhook_url = place_data.get('webhook_url')
     place_name = place_data.get('name')
 
     logger.info(f"Monitoring place {place_id} ({place_name}) for client {client_id}, branch {branch_id}")
@@ -41,57 +47,51 @@ async def monitor_place_async(place_data: Dict) -> Dict[str, Any]:
         "branch_id": branch_id,
         "status": "success",
         "new_reviews_count": 0,
-        "webhook_sent": False,
         "error": None,
         "checked_at": datetime.utcnow().isoformat()
     }
 
     try:
+        # Reviews carry the canonical place ID of the URL, as in ad-hoc scrapes;
+        # webhooks find the place through it
+        review_place_id = canonical_place_id(url)
+        if place_data.get('canonical_place_id') != review_place_id:
+            get_places_collection().update_one(
+                {"place_id": place_id},
+                {"$set": {"canonical_place_id": review_place_id}}
+            )
+
         # Get new reviews
         new_reviews = get_new_reviews_for_place(
             url=url,
-            place_id=place_id,
             client_id=client_id,
             branch_id=branch_id
         )
 
         result["new_reviews_count"] = len(new_reviews)
 
-        # If new reviews found, save and notify
+        # If new reviews found, save them (this publishes the new-review events)
         if new_reviews:
             logger.info(f"Found {len(new_reviews)} new reviews for place {place_id}")
 
             # Save to MongoDB
             saved_count = save_reviews_to_db(new_reviews)
             logger.info(f"Saved {saved_count} new reviews to MongoDB")
-
-            # Send webhook notification
-            webhook_success = await notify_new_reviews(
-                place_id=place_id,
-                client_id=client_id,
-                branch_id=branch_id,
-                webhook_url=webhook_url,
-                place_name=place_name,
-                place_url=url,
-                new_reviews=new_reviews
-            )
-
-            result["webhook_sent"] = webhook_success
-
-            if not webhook_success:
-                logger.warning(f"Failed to send webhook for place {place_id}")
-                result["error"] = "Webhook delivery failed"
         else:
             logger.info(f"No new reviews found for place {place_id}")
 
-        # Update place's last_check timestamp
+        # Update place's last_check timestamp and schedule its next check
+        schedule = compute_place_schedule(review_place_id, observed_since=place_data.get('created_at'))
+        result["next_check_at"] = schedule["next_check_at"].isoformat()
+
         places_collection = get_places_collection()
         places_collection.update_one(
             {"place_id": place_id},
             {
                 "$set": {
                     "last_check": datetime.utcnow(),
-                    "last_review_count": get_total_review_count(place_id)
+                    "last_review_count": get_review_count(review_place_id),
+                    **schedule
                 }
             }
         )
@@ -132,20 +132,28 @@ def monitor_place(place_data: Dict) -> Dict[str, Any]:
 
 async def monitor_all_places_async() -> Dict[str, Any]:
     """
-    Monitor all enabled places for new reviews (async version).
+    Monitor all enabled places that are due for a check (async version).
 
     Returns:
         Dictionary with overall monitoring results
     """
-    logger.info("Starting monitoring cycle for all enabled places")
+    logger.info("Starting monitoring cycle for due places")
 
     places_collection = get_places_collection()
-
-    # Get all places with monitoring enabled
-    places = list(places_collection.find({"monitoring_enabled": True}))
+    now = datetime.utcnow()
+
+    # Get places with monitoring enabled whose next check is due
+    # (places never checked have no next_check_at yet)
+    places = list(places_collection.find({
+        "monitoring_enabled": True,
+        "$or": [
+            {"next_check_at": {"$lte": now}},
+            {"next_check_at": None}
+        ]
+    }))
 
     if not places:
-        logger.info("No places with monitoring enabled")
+        logger.info("No places due for a check")
         return {
             "status": "success",
             "total_places": 0,
@@ -173,6 +181,12 @@ async def monitor_all_places_async() -> Dict[str, Any]:
         else:
             failed += 1
 
+    # Scrapes per day of the adaptive schedules vs a fixed interval
+    polling = polling_savings_report(places_collection.find(
+        {"monitoring_enabled": True},
+        {"_id": 0, "review_rate_per_day": 1, "poll_interval_minutes": 1}
+    ))
+
     summary = {
         "status": "success",
         "total_places": len(places),
@@ -180,10 +194,14 @@ async def monitor_all_places_async() -> Dict[str, Any]:
         "failed": failed,
         "total_new_reviews": total_new_reviews,
         "checked_at": datetime.utcnow().isoformat(),
+        "polling": polling,
         "results": results
     }
 
     logger.info(f"Monitoring cycle completed: {successful} successful, {failed} failed, {total_new_reviews} new reviews")
+    logger.info(f"Adaptive polling: {polling['adaptive_scrapes_per_day']} scrapes/day vs "
+                f"{polling['fixed_scrapes_per_day']} at the same detection latency "
+                f"({polling['scrapes_saved_per_day']} saved)")
 
     return summary
 
@@ -208,22 +226,3 @@ def monitor_all_places() -> Dict[str, Any]:
             "status": "error",
             "error": str(e)
         }
-
-
-def get_total_review_count(place_id: str) -> int:
-    """
-    Get total number of reviews for a place.
-
-    Args:
-        place_id: Place ID
-
-    Returns:
-        Total review count
-    """
-    try:
-        reviews_collection = get_reviews_collection()
-        count = reviews_collection.count_documents({"place_id": place_id})
-        return count
-    except Exception as e:
-        logger.error(f"Error counting reviews for place {place_id}: {e}")
-        return 0
@@ -0,0 +1,46 @@
+"""
+Rebuild task for the recent reviews hot cache.
+
+The Redis sorted sets behind GET /api/reviews/recent/all are maintained by
+save_reviews_to_db (see app.services.recent_reviews); this task drops them
+and re-warms the global one from MongoDB, e.g. after reviews were changed
+outside the API or Redis was flushed. Client and place sets are warmed again
+by their next read.
+
+Usage:
+    python -m app.tasks.recent_reviews_task
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Any
+
+from app.services.recent_reviews import rebuild_recent_reviews
+from app.services.response_cache import bump_reviews_version
+
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_recent_reviews_task() -> Dict[str, Any]:
+    """
+    RQ task that rebuilds the recent reviews cache.
+
+    Returns:
+        Dictionary with the number of sorted sets rebuilt and the duration
+    """
+    started_at = datetime.utcnow()
+    scopes = rebuild_recent_reviews()
+    bump_reviews_version()
+    duration = (datetime.utcnow() - started_at).total_seconds()
+
+    logger.info(f"Recent reviews cache rebuilt ({scopes} scopes) in {duration:.2f}s")
+    return {
+        "status": "success",
+        "scopes": scopes,
+        "duration_seconds": duration
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    print(rebuild_recent_reviews_task())
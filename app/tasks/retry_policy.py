@@ -0,0 +1,194 @@
+"""
+Retry policy for scraping jobs.
+
+Each failure class has its own retry limit and backoff. A retryable failure
+makes RQ re-schedule the same job (same job_id, so clients keep polling the
+same status URL) after an exponential backoff with jitter. Jobs that fail
+permanently or exhaust their retries are recorded in a dead-letter registry.
+
+Scheduled retries need a worker running with the RQ scheduler
+(worker.work(with_scheduler=True)).
+"""
+import json
+import logging
+import random
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+from redis import Redis
+from rq.job import Job
+
+from app.services.metrics import increment_counter
+from app.services.scraping_errors import FailureClass
+
+
+logger = logging.getLogger(__name__)
+
+
+METRICS_GROUP = "retries"
+DEAD_LETTER_KEY = "scraping:dead_letter"
+DEAD_LETTER_INDEX_KEY = "scraping:dead_letter:index"
+DEAD_LETTER_MAX_ENTRIES = 1000
+
+
+@dataclass(frozen=True)
+class RetryRule:
+    """Retry limit and backoff bounds (seconds) of a failure class."""
+    max_retries: int
+    base_delay: int
+    max_delay: int
+
+
+RETRY_RULES: Dict[FailureClass, RetryRule] = {
+    FailureClass.TIMEOUT: RetryRule(max_retries=3, base_delay=30, max_delay=600),
+    FailureClass.SELECTOR_NOT_FOUND: RetryRule(max_retries=2, base_delay=60, max_delay=900),
+    FailureClass.BROWSER_CRASH: RetryRule(max_retries=3, base_delay=10, max_delay=300),
+    FailureClass.DATABASE: RetryRule(max_retries=5, base_delay=15, max_delay=600),
+    FailureClass.INVALID_PLACE: RetryRule(max_retries=0, base_delay=0, max_delay=0),
+    FailureClass.UNKNOWN: RetryRule(max_retries=1, base_delay=60, max_delay=600),
+}
+
+
+def backoff_delay(rule: RetryRule, attempt: int) -> int:
+    """
+    Exponential backoff with jitter for a retry.
+
+    Args:
+        rule: Retry rule of the failure class
+        attempt: Number of retries already made (0 for the first retry)
+
+    Returns:
+        Delay in seconds, between half and all of the capped exponential delay
+    """
+    delay = min(rule.max_delay, rule.base_delay * (2 ** attempt))
+    return max(1, int(delay / 2 + random.uniform(0, delay / 2)))
+
+
+def schedule_retry(job: Job, failure_class: FailureClass) -> Optional[int]:
+    """
+    Arrange for RQ to retry the current job if the policy allows it.
+
+    RQ reads `retries_left` and `retry_intervals` from the job instance when
+    the task raises, and then schedules the same job again.
+
+    Args:
+        job: Job being executed
+        failure_class: Class of the failure
+
+    Returns:
+        Delay in seconds before the retry, or None if the job will not be retried
+    """
+    rule = RETRY_RULES[failure_class]
+    attempt = job.meta.get('attempt', 0)
+
+    increment_counter(METRICS_GROUP, f"{failure_class.value}_failures")
+
+    if attempt >= rule.max_retries:
+        job.retries_left = 0
+        return None
+
+    delay = backoff_delay(rule, attempt)
+    job.retries_left = 1
+    job.retry_intervals = [delay]
+    job.meta['attempt'] = attempt + 1
+    job.meta['last_failure_class'] = failure_class.value
+
+    increment_counter(METRICS_GROUP, f"{failure_class.value}_retried")
+    logger.info(
+        f"[Job {job.id}] {failure_class.value} failure, retry {attempt + 1}/{rule.max_retries} in {delay}s"
+    )
+    return delay
+
+
+def record_recovery(job: Job) -> None:
+    """Count a job that succeeded after one or more retries."""
+    failure_class = job.meta.get('last_failure_class')
+    if job.meta.get('attempt') and failure_class:
+        increment_counter(METRICS_GROUP, f"{failure_class}_recovered")
+
+
+def add_dead_letter(
+    job: Job,
+    failure_class: FailureClass,
+    error: str,
+    request: Dict[str, Any]
+) -> None:
+    """
+    Record a job that failed permanently or ran out of retries.
+
+    Args:
+        job: Failed job
+        failure_class: Class of the last failure
+        error: Error message of the last failure
+        request: Task arguments (url, max_reviews, sort_by) needed to replay the job
+    """
+    entry = {
+        "job_id": job.id,
+        **request,
+        "failure_class": failure_class.value,
+        "error": error,
+        "attempts": job.meta.get('attempt', 0) + 1,
+        "failed_at": datetime.utcnow().isoformat()
+    }
+
+    try:
+        redis_conn: Redis = job.connection
+        with redis_conn.pipeline() as pipe:
+            pipe.hset(DEAD_LETTER_KEY, job.id, json.dumps(entry))
+            pipe.zadd(DEAD_LETTER_INDEX_KEY, {job.id: datetime.utcnow().timestamp()})
+            pipe.execute()
+        _trim_dead_letters(redis_conn)
+    except Exception as e:
+        logger.error(f"[Job {job.id}] Could not record dead letter: {e}")
+
+    increment_counter(METRICS_GROUP, f"{failure_class.value}_dead_lettered")
+    logger.warning(f"[Job {job.id}] Moved to dead-letter registry ({failure_class.value}): {error}")
+
+
+def _trim_dead_letters(redis_conn: Redis) -> None:
+    """Keep only the most recent DEAD_LETTER_MAX_ENTRIES entries."""
+    excess = redis_conn.zcard(DEAD_LETTER_INDEX_KEY) - DEAD_LETTER_MAX_ENTRIES
+    if excess <= 0:
+        return
+
+    old_ids = redis_conn.zrange(DEAD_LETTER_INDEX_KEY, 0, excess - 1)
+    with redis_conn.pipeline() as pipe:
+        pipe.hdel(DEAD_LETTER_KEY, *old_ids)
+        pipe.zrem(DEAD_LETTER_INDEX_KEY, *old_ids)
+        pipe.execute()
+
+
+def list_dead_letters(redis_conn: Redis, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Get the most recent dead-letter entries.
+
+    Args:
+        redis_conn: Redis connection
+        limit: Maximum number of entries
+
+    Returns:
+        Entries, newest first
+    """
+    job_ids = redis_conn.zrevrange(DEAD_LETTER_INDEX_KEY, 0, limit - 1)
+    if not job_ids:
+        return []
+
+    raw_entries = redis_conn.hmget(DEAD_LETTER_KEY, job_ids)
+    return [json.loads(raw) for raw in raw_entries if raw is not None]
+
+
+def summarize_retry_metrics(counters: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """
+    Group retry counters by failure class.
+
+    Returns:
+        Dictionary failure_class -> {failures, retried, recovered, dead_lettered}
+    """
+    summary = {}
+    for failure_class in FailureClass:
+        summary[failure_class.value] = {
+            outcome: counters.get(f"{failure_class.value}_{outcome}", 0)
+            for outcome in ("failures", "retried", "recovered", "dead_lettered")
+        }
+    return summary
@@ -3,17 +3,75 @@ RQ (Redis Queue) tasks for asynchronous scraping operations.
 These tasks are executed by worker processes.
 """
 import logging
+import time
 from typing import Optional, Dict, Any
 from datetime import datetime
 from rq import get_current_job
+from rq.job import Job
+from rq.timeouts import JobTimeoutException
 
 from app.services.scraper_service import scrape_reviews
+from app.services.job_coalescing import release_inflight
+from app.services.admission import record_job_duration
+from app.services.scraping_errors import classify_failure
+from app.tasks.watchdog import ProgressWatchdog
+from app.tasks.retry_policy import schedule_retry, record_recovery, add_dead_letter
 from app.config import settings
 
 
 logger = logging.getLogger(__name__)
 
 
+class JobProgress:
+    """
+    Progress reporting of a running job, batched to spare Redis round trips.
+
+    Progress updates during scrolling only change the job meta in memory. At
+    most every `job_meta_flush_interval` seconds, the meta write and the read of
+    the in-flight review target (raised by identical requests, see
+    app.services.job_coalescing) go to Redis together in one pipeline.
+    """
+
+    def __init__(self, job: Job, coalesce_key: Optional[str]):
+        self.job = job
+        self.coalesce_key = coalesce_key
+        self.interval = settings.job_meta_flush_interval
+        self.target: Optional[int] = None
+        self.flushed_at = float("-inf")
+        self.dirty = False
+
+    def update(self, **fields):
+        """Change job meta fields (written on the next flush)."""
+        self.job.meta.update(fields)
+        self.dirty = True
+
+    def flush(self) -> Optional[int]:
+        """Write pending meta and read the in-flight target now."""
+        self.flushed_at = time.monotonic()
+        try:
+            with self.job.connection.pipeline(transaction=False) as pipe:
+                if self.dirty:
+                    # Same write as job.save_meta(), inside the pipeline
+                    pipe.hset(self.job.key, 'meta', self.job.serializer.dumps(self.job.meta))
+                if self.coalesce_key:
+                    pipe.hget(self.coalesce_key, "max_reviews")
+                results = pipe.execute()
+        except Exception as e:
+            logger.debug(f"[Job {self.job.id}] Could not flush progress: {e}")
+            return self.target
+
+        self.dirty = False
+        if self.coalesce_key and results[-1] is not None:
+            self.target = int(results[-1])
+        return self.target
+
+    def tick(self) -> Optional[int]:
+        """Flush if the interval has elapsed; returns the latest known target."""
+        if time.monotonic() - self.flushed_at >= self.interval:
+            return self.flush()
+        return self.target
+
+
 def scrape_reviews_task(
     url: str,
     max_reviews: int = 100,
@@ -22,7 +80,13 @@ def scrape_reviews_task(
     """
     RQ task for scraping reviews asynchronously.
 
-    This function will be executed by an RQ worker process.
+    This function will be executed by an RQ worker process. It must be
+    enqueued with job_timeout=settings.scraping_max_runtime; a ProgressWatchdog
+    aborts it earlier if it stops producing reviews.
+
+    Transient failures (see app.tasks.retry_policy) are re-raised so RQ
+    retries the same job after a backoff; permanent failures and exhausted
+    retries are moved to the dead-letter registry and returned as an error.
 
     Args:
         url: Google Maps URL
@@ -43,20 +107,40 @@ def scrape_reviews_task(
     job = get_current_job()
     started_at = datetime.utcnow()
 
-    logger.info(f"[Job {job.id}] Starting scrape_reviews_task for URL: {url}")
+    attempt = job.meta.get('attempt', 0)
+    retrying = False
+
+    logger.info(f"[Job {job.id}] Starting scrape_reviews_task for URL: {url}"
+                + (f" (retry {attempt})" if attempt else ""))
+
+    # Identical requests may attach to this job and raise its review target
+    coalesce_key = job.meta.get('coalesce_key')
+    progress = JobProgress(job, coalesce_key)
+
+    # Aborts the job when it stops producing reviews
+    watchdog = ProgressWatchdog(job.id)
+    watchdog.start()
+
+    def on_scroll(reviews_so_far: int, scrolls: int) -> Optional[int]:
+        watchdog.beat(reviews_so_far)
+        progress.update(progress=f'Extracting reviews... {reviews_so_far}/{max(max_reviews, progress.target or 0)}')
+        return progress.tick()
 
     try:
         # Update job meta with progress
-        job.meta['status'] = 'processing'
-        job.meta['progress'] = 'Initializing scraper...'
-        job.meta['started_at'] = started_at.isoformat()
-        job.save_meta()
+        progress.update(
+            status='processing',
+            progress='Initializing scraper...',
+            started_at=started_at.isoformat()
+        )
+        max_reviews = max(max_reviews, progress.flush() or 0)
 
         # Execute scraping
         reviews = scrape_reviews(
             url=url,
             max_reviews=max_reviews,
-            sort_by=sort_by
+            sort_by=sort_by,
+            on_scroll=on_scroll
         )
 
         finished_at = datetime.utcnow()
@@ -64,9 +148,12 @@ def scrape_reviews_task(
 
         logger.info(f"[Job {job.id}] Scraping completed successfully. "
                    f"Found {len(reviews)} reviews in {duration:.2f}s")
+        watchdog.record_outcome(aborted=False)
+        record_recovery(job)
 
         # Update job meta with success
         job.meta['status'] = 'completed'
+        job.meta.pop('error', None)
         job.meta['progress'] = f'Completed: {len(reviews)} reviews'
         job.meta['finished_at'] = finished_at.isoformat()
         job.save_meta()
@@ -85,11 +172,36 @@ def scrape_reviews_task(
         duration = (finished_at - started_at).total_seconds()
 
         error_msg = str(e)
+        stalled = isinstance(e, JobTimeoutException) and watchdog.stalled
+        if stalled:
+            error_msg = (f"Scraping stalled: no new reviews for {settings.scraping_stall_timeout}s "
+                         f"({watchdog.progress} reviews collected)")
+        watchdog.record_outcome(aborted=stalled)
+
         logger.error(f"[Job {job.id}] Scraping failed: {error_msg}", exc_info=True)
 
+        failure_class = classify_failure(e)
+        job.meta['failure_class'] = failure_class.value
+        job.meta['error'] = error_msg
+
+        # Transient failure: let RQ schedule the same job again
+        if settings.retry_enabled:
+            delay = schedule_retry(job, failure_class)
+            if delay is not None:
+                retrying = True
+                job.meta['status'] = 'retrying'
+                job.meta['progress'] = f'Retrying in {delay}s after {failure_class.value} failure'
+                job.save_meta()
+                raise
+
+        add_dead_letter(job, failure_class, error_msg, {
+            "url": url,
+            "max_reviews": max_reviews,
+            "sort_by": sort_by
+        })
+
         # Update job meta with error
         job.meta['status'] = 'failed'
-        job.meta['error'] = error_msg
         job.meta['finished_at'] = finished_at.isoformat()
         job.save_meta()
 
@@ -103,6 +215,14 @@ def scrape_reviews_task(
             "duration_seconds": duration
         }
 
+    finally:
+        # Admission control estimates start times from recent job durations
+        record_job_duration(job.connection, (datetime.utcnow() - started_at).total_seconds())
+
+        # A retrying job keeps its in-flight key so identical requests still attach to it
+        if coalesce_key and not retrying:
+            release_inflight(job.connection, coalesce_key, job.id)
+
 
 def on_success_callback(job, connection, result, *args, **kwargs):
     """
@@ -0,0 +1,55 @@
+"""
+Repair task for the per-place review statistics.
+
+place_stats documents and review rollups are maintained incrementally (see
+app.services.place_stats and app.services.review_rollups); this task
+rebuilds both from the reviews collection, e.g. after reviews were changed
+outside the API.
+
+Usage:
+    python -m app.tasks.stats_task [place_id]
+"""
+import logging
+import sys
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+from app.services.place_stats import rebuild_place_stats
+from app.services.review_repository import mongodb_storage
+from app.services.review_rollups import rebuild_review_rollups
+
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_place_stats_task(place_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    RQ task that rebuilds place stats and review rollups.
+
+    Args:
+        place_id: Rebuild only this place (default: every place)
+
+    Returns:
+        Dictionary with the number of places rebuilt and the duration
+    """
+    if not mongodb_storage():
+        # Built from the MongoDB reviews collection, which is empty with SQLite storage
+        logger.warning("Place stats and review rollups are not kept with REVIEW_STORAGE=sqlite, nothing to rebuild")
+        return {"status": "skipped", "places": 0, "duration_seconds": 0.0}
+
+    started_at = datetime.utcnow()
+    places = rebuild_place_stats(place_id)
+    rebuild_review_rollups(place_id)
+    duration = (datetime.utcnow() - started_at).total_seconds()
+
+    logger.info(f"Place stats rebuilt for {places} places in {duration:.2f}s")
+    return {
+        "status": "success",
+        "places": places,
+        "duration_seconds": duration
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    print(rebuild_place_stats_task(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -0,0 +1,106 @@
+"""
+Progress-aware watchdog for scraping jobs.
+
+RQ enforces `job_timeout` with a SIGALRM in the work horse. Scraping jobs are
+enqueued with the hard ceiling (`scraping_max_runtime`) and this watchdog
+re-arms that same alarm on every progress heartbeat, so that:
+
+- a job that produces no new reviews for `scraping_stall_timeout` seconds is
+  aborted (a stuck page no longer burns the whole timeout), and
+- a job that keeps producing reviews may run past the base
+  `scraping_timeout`, up to `scraping_max_runtime`.
+
+When the alarm fires RQ raises JobTimeoutException inside the task; the task
+uses `stalled` to tell a stall from the hard ceiling.
+"""
+import logging
+import math
+import signal
+import threading
+import time
+
+from app.config import settings
+from app.services.metrics import increment_counter
+
+
+logger = logging.getLogger(__name__)
+
+
+METRICS_GROUP = "watchdog"
+
+
+class ProgressWatchdog:
+    """Re-arms the job's death-penalty alarm on every progress heartbeat."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.stall_timeout = settings.scraping_stall_timeout
+        self.base_timeout = settings.scraping_timeout
+        self.max_runtime = settings.scraping_max_runtime
+        self.started_at = time.monotonic()
+        self.last_progress_at = self.started_at
+        self.progress = 0
+        self.active = False
+
+    def _can_use_alarm(self) -> bool:
+        """The alarm is only usable in the main thread with RQ's handler installed."""
+        if not hasattr(signal, "SIGALRM"):
+            return False
+        if threading.current_thread() is not threading.main_thread():
+            return False
+        return signal.getsignal(signal.SIGALRM) not in (signal.SIG_DFL, signal.SIG_IGN, None)
+
+    def _arm(self):
+        now = time.monotonic()
+        deadline = min(self.started_at + self.max_runtime, self.last_progress_at + self.stall_timeout)
+        signal.alarm(max(1, math.ceil(deadline - now)))
+
+    def start(self):
+        """Start watching; the first stall window covers browser start-up and sorting."""
+        self.active = self._can_use_alarm()
+        if self.active:
+            self._arm()
+        else:
+            logger.debug(f"[Job {self.job_id}] Watchdog inactive (no death-penalty alarm in this thread)")
+
+    def beat(self, progress: int):
+        """
+        Record a progress heartbeat.
+
+        Args:
+            progress: Reviews collected so far; only an increase counts as progress
+        """
+        if progress <= self.progress:
+            return
+
+        self.progress = progress
+        self.last_progress_at = time.monotonic()
+
+        if self.active:
+            self._arm()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def stalled(self) -> bool:
+        """True if the job went a full stall window without progress."""
+        return time.monotonic() - self.last_progress_at >= self.stall_timeout - 1
+
+    def record_outcome(self, aborted: bool):
+        """Report how the watchdog affected this job."""
+        increment_counter(METRICS_GROUP, "jobs")
+
+        if aborted:
+            increment_counter(METRICS_GROUP, "stall_aborts")
+            logger.warning(
+                f"[Job {self.job_id}] Aborted after {self.stall_timeout}s without progress "
+                f"({self.progress} reviews collected)"
+            )
+        elif self.elapsed > self.base_timeout:
+            increment_counter(METRICS_GROUP, "extended_past_base")
+            logger.info(
+                f"[Job {self.job_id}] Ran {self.elapsed:.0f}s, past the base timeout of "
+                f"{self.base_timeout}s, while still producing reviews"
+            )
@@ -0,0 +1,208 @@
+"""
+Redis footprint of scraping jobs: payload bytes and progress round trips.
+
+Bytes per job: enqueues a scraping job (not executed), stores a result of
+`--reviews` synthetic reviews and a progress meta for it, with RQ's default
+pickle serializer and with CompactSerializer, and sums the bytes stored in
+the job hash and its result stream.
+
+Progress round trips: replays a scrape of `--scrolls` scrolls taking
+`--scroll-seconds` each (on a simulated clock) and counts the Redis round
+trips spent on job meta and in-flight target reads:
+
+- per scroll: the in-flight target read on every scroll and one meta write
+  per phase (the original scrape_reviews_task);
+- batched: JobProgress, meta and target together at most every
+  `job_meta_flush_interval` seconds, with the live progress message.
+
+Uses the Redis server of REDIS_URL; keys are removed afterwards.
+
+Usage:
+    python benchmarks/job_payload.py [--reviews 500] [--scrolls 300] [--scroll-seconds 0.2]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redis.client import Pipeline
+from rq import Queue
+from rq.job import Job
+from rq.results import Result
+from rq.serializers import DefaultSerializer
+
+from app.database import get_redis_client
+from app.services.job_serializer import CompactSerializer
+from app.tasks import scraper_task
+from app.tasks.scraper_task import JobProgress, scrape_reviews_task
+
+
+QUEUE_NAME = "benchmark_job_payload"
+COALESCE_KEY = "benchmark:inflight"
+
+WORDS = ("excelente servicio comida atención rápido precio lugar muy buena mala lenta "
+         "volveremos recomiendo personal amable limpio ruido mesa plato postre café "
+         "familia cena reserva terraza espera caro barato calidad sabor").split()
+
+
+def make_result(count: int):
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    reviews = [
+        {
+            "id_review": f"ChZDSUhNMG9nS0VJQ0FnSUNBbGVXQk5nEAE{i:06d}",
+            "place_id": "0x8d9b3c5f0e2a1b7d:0x4c2e9a8f7b6d5e31",
+            "caption": " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 60))),
+            "relative_date": "hace 2 semanas",
+            "review_date": now - timedelta(days=14, minutes=i),
+            "retrieval_date": now,
+            "rating": float(1 + i % 5),
+            "username": f"Usuario {rng.randint(1, 10 ** 6)}",
+            "n_review_user": i % 40,
+            "n_photo_user": i % 7,
+            "url_user": f"https://www.google.com/maps/contrib/{rng.randint(10 ** 20, 10 ** 21)}?hl=es"
+        }
+        for i in range(count)
+    ]
+    return {
+        "status": "success",
+        "reviews_count": count,
+        "reviews": reviews,
+        "started_at": now.isoformat(),
+        "finished_at": now.isoformat(),
+        "duration_seconds": 42.0
+    }
+
+
+def stored_bytes(redis_conn, job: Job) -> int:
+    total = sum(len(value) for value in redis_conn.hgetall(job.key).values())
+    for _, fields in redis_conn.xrange(Result.get_key(job.id)):
+        total += sum(len(value) for value in fields.values())
+    return total
+
+
+def job_bytes(redis_conn, serializer, result) -> int:
+    queue = Queue(QUEUE_NAME, connection=redis_conn, serializer=serializer)
+    job = queue.enqueue(
+        scrape_reviews_task,
+        url="https://www.google.com/maps/place/Restaurante/@40.71,-74.00,15z",
+        max_reviews=result["reviews_count"],
+        sort_by="newest",
+        meta={"coalesce_key": COALESCE_KEY}
+    )
+    job.meta.update(status="completed", progress=f"Completed: {result['reviews_count']} reviews",
+                    started_at=result["started_at"], finished_at=result["finished_at"])
+    job.save_meta()
+    Result.create(job, Result.Type.SUCCESSFUL, ttl=60, return_value=result)
+
+    size = stored_bytes(redis_conn, job)
+    job.delete(remove_from_queue=True)
+    redis_conn.delete(Result.get_key(job.id))
+    return size
+
+
+class RoundTrips:
+    """Counts commands sent outside pipelines plus pipeline executions."""
+
+    def __init__(self, redis_conn):
+        self.count = 0
+        original_command = redis_conn.execute_command
+        original_execute = Pipeline.execute
+
+        def execute_command(*args, **kwargs):
+            self.count += 1
+            return original_command(*args, **kwargs)
+
+        def execute(pipe, *args, **kwargs):
+            self.count += 1
+            return original_execute(pipe, *args, **kwargs)
+
+        redis_conn.execute_command = execute_command
+        Pipeline.execute = execute
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def progress_round_trips(redis_conn, scrolls: int, scroll_seconds: float):
+    queue = Queue(QUEUE_NAME, connection=redis_conn, serializer=CompactSerializer)
+    job = queue.enqueue(scrape_reviews_task, url="x", meta={"coalesce_key": COALESCE_KEY})
+    redis_conn.hset(COALESCE_KEY, "max_reviews", scrolls * 10)
+    counter = RoundTrips(redis_conn)
+
+    # Per scroll: phase meta writes plus one target read per scroll
+    counter.count = 0
+    job.meta.update(status="processing", progress="Initializing scraper...")
+    job.save_meta()
+    for _ in range(scrolls):
+        redis_conn.hget(COALESCE_KEY, "max_reviews")
+    job.meta.update(status="completed", progress="Completed")
+    job.save_meta()
+    per_scroll = counter.count
+
+    # Batched: JobProgress on a simulated clock
+    clock = SimulatedClock()
+    real_time = scraper_task.time
+    scraper_task.time = clock
+    try:
+        counter.count = 0
+        progress = JobProgress(job, COALESCE_KEY)
+        progress.update(status="processing", progress="Initializing scraper...")
+        progress.flush()
+        for scroll in range(scrolls):
+            clock.now += scroll_seconds
+            progress.update(progress=f"Extracting reviews... {scroll * 10}/{progress.target}")
+            progress.tick()
+        job.meta.update(status="completed", progress="Completed")
+        job.save_meta()
+        batched = counter.count
+    finally:
+        scraper_task.time = real_time
+
+    job.delete(remove_from_queue=True)
+    redis_conn.delete(COALESCE_KEY)
+    return per_scroll, batched
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--reviews", type=int, default=500)
+    parser.add_argument("--scrolls", type=int, default=300)
+    parser.add_argument("--scroll-seconds", type=float, default=0.2)
+    args = parser.parse_args()
+
+    redis_conn = get_redis_client()
+    result = make_result(args.reviews)
+
+    print(f"Job with a result of {args.reviews} reviews\n")
+    print(f"{'serializer':<12} {'bytes':>10} {'ratio':>7} {'dumps ms':>9} {'loads ms':>9}")
+    baseline = None
+    for name, serializer in (("pickle", DefaultSerializer), ("compact", CompactSerializer)):
+        size = job_bytes(redis_conn, serializer, result)
+        baseline = baseline or size
+        start = time.perf_counter()
+        payload = serializer.dumps(result)
+        dumps_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        serializer.loads(payload)
+        loads_ms = (time.perf_counter() - start) * 1000
+        print(f"{name:<12} {size:>10} {size / baseline:>7.2f} {dumps_ms:>9.2f} {loads_ms:>9.2f}")
+
+    per_scroll, batched = progress_round_trips(redis_conn, args.scrolls, args.scroll_seconds)
+    print(f"\nProgress of a {args.scrolls}-scroll scrape ({args.scrolls * args.scroll_seconds:.0f}s)\n")
+    print(f"{'mode':<12} {'round trips':>12}")
+    print(f"{'per scroll':<12} {per_scroll:>12}")
+    print(f"{'batched':<12} {batched:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Serialization cost of a review list page: response_model path vs fast path.
+
+- response_model: what list_reviews did before, a ReviewResponse per
+  document wrapped in PaginatedReviewsResponse, then validated and encoded
+  again by FastAPI (serialize_response + JSONResponse);
+- fast path: review_serialization.reviews_to_dicts + ORJSONResponse.
+
+Both run on the same synthetic MongoDB documents and their bodies are
+compared byte for byte before timing. A second table shows, for a page of
+the largest size, the documents read from MongoDB (BSON bytes of the
+projected documents) and the response bytes for several `fields`
+selections, as objects and in compact mode.
+
+Usage:
+    python benchmarks/review_serialization.py [--sizes 100 500] [--repeat 200]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import bson
+from bson import ObjectId
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models import ReviewResponse, PaginatedReviewsResponse
+from app.services.review_repository import encode_cursor
+from app.services.review_serialization import parse_fields, projection, reviews_payload, reviews_to_dicts
+
+
+FIELD_SELECTIONS = [
+    None,
+    "id_review,place_id,review_date,retrieval_date,rating,username",
+    "id_review,rating,review_date",
+    "id_review"
+]
+
+
+RESPONSE_FIELD = create_model_field("Response", PaginatedReviewsResponse, mode="serialization")
+
+
+def make_docs(count: int):
+    now = datetime(2025, 11, 2, 15, 30, 0, 123000)
+    return [
+        {
+            "_id": ObjectId(),
+            "id_review": f"ChZDSUhNMG9nS0VJQ0FnSUNad3VhZkRREAE-{i}",
+            "place_id": "0x8f3a2b:0x1a2b3c",
+            "client_id": "cliente",
+            "branch_id": "sucursal",
+            "caption": "Excelente servicio, la comida llegó caliente y el personal fue muy amable. " * 2,
+            "relative_date": "hace 2 días",
+            "review_date": now - timedelta(days=i),
+            "retrieval_date": now,
+            "rating": i % 5 + 1,  # stored as int by older versions
+            "username": "Juan Pérez",
+            "n_review_user": 15,
+            "n_photo_user": 3 if i % 2 else None,
+            "url_user": "https://www.google.com/maps/contrib/123456789"
+        }
+        for i in range(count)
+    ]
+
+
+async def response_model_path(docs) -> bytes:
+    page = PaginatedReviewsResponse(
+        total=10000, page=1, page_size=len(docs), total_pages=10000 // len(docs),
+        next_cursor=encode_cursor(docs[-1], "review_date"),
+        reviews=[ReviewResponse(**doc) for doc in docs]
+    )
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=page)
+    return JSONResponse(content).body
+
+
+async def fast_path(docs) -> bytes:
+    return ORJSONResponse({
+        "total": 10000, "page": 1, "page_size": len(docs), "total_pages": 10000 // len(docs),
+        "next_cursor": encode_cursor(docs[-1], "review_date"),
+        "reviews": reviews_to_dicts(docs)
+    }).body
+
+
+async def measure(function, docs, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await function(docs)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+async def run(args):
+    print(f"{'page size':>9} {'response_model ms':>18} {'fast path ms':>13} {'speedup':>8} {'bytes':>8}")
+    for size in args.sizes:
+        docs = make_docs(size)
+        body = await fast_path(docs)
+        assert await response_model_path(docs) == body, "outputs differ"
+
+        slow = await measure(response_model_path, docs, args.repeat)
+        fast = await measure(fast_path, docs, args.repeat)
+        print(f"{size:>9} {slow:>18.2f} {fast:>13.2f} {slow / fast:>7.1f}x {len(body):>8}")
+
+    docs = make_docs(max(args.sizes))
+    print(f"\n{len(docs)} reviews per page")
+    print(f"{'fields':<64} {'BSON read':>10} {'JSON':>9} {'compact':>9}")
+    for selection in FIELD_SELECTIONS:
+        fields = parse_fields(selection)
+        keep = projection(fields)
+        read = [{k: v for k, v in doc.items() if k in keep} for doc in docs]
+        bson_bytes = sum(len(bson.encode(doc)) for doc in read)
+        objects = len(ORJSONResponse(reviews_payload(read, fields)).body)
+        compact = len(ORJSONResponse(reviews_payload(read, fields, compact=True)).body)
+        name = "all" if selection is None else selection
+        print(f"{name:<64} {bson_bytes:>10} {objects:>9} {compact:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500])
+    parser.add_argument("--repeat", type=int, default=200)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Review storage backends: bulk ingest and query latency, MongoDB vs SQLite.
+
+Loads `--reviews` synthetic reviews spread over `--places` places into each
+backend through its ReviewRepository (insert_new in batches of `--batch`,
+as save_reviews_to_db does), then ingests the same reviews again (all
+duplicates, the dedup path of a repeated scrape), and times the reads the
+reviews API makes, `--repeat` times each:
+
+- count of one place's reviews (list_reviews total);
+- first page of a place (page_size `--page-size`, newest first);
+- a page `--depth` of the way through a place, by offset (skip) and by
+  keyset (after the previous page's last review);
+- one review by id_review, and 100 by id_review (scrape reuse);
+- a whole place streamed in export batches.
+
+MongoDB uses the server of MONGODB_URL (collection benchmark_reviews in
+MONGODB_DB, dropped afterwards) and is skipped if it is unreachable; SQLite
+uses a temporary file.
+
+Usage:
+    python benchmarks/review_storage.py [--reviews 100000] [--places 20] [--backends sqlite mongodb]
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.services.review_repository import (
+    MongoReviewRepository,
+    ReviewFilter,
+    SQLiteReviewRepository
+)
+
+
+WORDS = ("excelente servicio comida atención rápido precio lugar muy buena mala lenta "
+         "volveremos recomiendo personal amable limpio ruido mesa plato postre café").split()
+
+
+def make_reviews(count: int, places: int):
+    rng = random.Random(0)
+    now = datetime(2025, 11, 2, 15, 30)
+    return [
+        {
+            "id_review": f"ChZDSUhNMG9nS0VJQ0FnSUNBbGVXQk5nEAE{i:08d}",
+            "place_id": f"0x8d9b3c5f0e2a1b7d:0x{i % places:016x}",
+            "client_id": f"cliente-{i % places % 5}",
+            "branch_id": None,
+            "caption": " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 40))),
+            "relative_date": "hace 2 semanas",
+            "review_date": now - timedelta(minutes=rng.randint(0, 10 ** 6)),
+            "retrieval_date": now - timedelta(days=rng.randint(0, 30)),
+            "rating": float(rng.randint(1, 5)),
+            "username": f"Usuario {rng.randint(1, 10 ** 6)}",
+            "n_review_user": rng.randint(0, 40),
+            "n_photo_user": rng.randint(0, 7),
+            "url_user": f"https://www.google.com/maps/contrib/{rng.randint(10 ** 20, 10 ** 21)}"
+        }
+        for i in range(count)
+    ]
+
+
+def timed(repeat: int, fn):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[min(int(round(0.95 * (len(samples) - 1))), len(samples) - 1)]
+
+
+def ingest(repo, reviews, batch: int) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(reviews), batch):
+        # Copies: MongoDB adds _id to inserted documents
+        repo.insert_new([dict(review) for review in reviews[offset:offset + batch]])
+    return len(reviews) / (time.perf_counter() - start)
+
+
+def run_backend(name, repo, reviews, args):
+    repo.ensure_indexes()
+    insert_rate = ingest(repo, reviews, args.batch)
+    dedup_rate = ingest(repo, reviews, args.batch)
+
+    place = ReviewFilter(place_id=reviews[0]["place_id"])
+    in_place = repo.count(place)
+    offset = int(in_place * args.depth) // args.page_size * args.page_size
+    anchor = next(iter(repo.find(place, "review_date", -1, ("id_review",), limit=1, skip=offset - 1)))
+    after = (anchor["review_date"], anchor["id_review"])
+    rng = random.Random(1)
+    ids = [review["id_review"] for review in rng.sample(reviews, 100)]
+
+    def page(**kwargs):
+        return list(repo.find(place, "review_date", -1, limit=args.page_size, **kwargs))
+
+    assert [doc["id_review"] for doc in page(skip=offset)] == [doc["id_review"] for doc in page(after=after)]
+
+    rows = [
+        ("count (place)", timed(args.repeat, lambda: repo.count(place))),
+        ("first page", timed(args.repeat, lambda: page())),
+        (f"page at {args.depth:.0%}, offset", timed(args.repeat, lambda: page(skip=offset))),
+        (f"page at {args.depth:.0%}, keyset", timed(args.repeat, lambda: page(after=after))),
+        ("get by id", timed(args.repeat, lambda: repo.get(rng.choice(ids)))),
+        ("get 100 by id", timed(args.repeat, lambda: repo.get_many(ids))),
+        (f"export place ({in_place})", timed(max(args.repeat // 10, 3), lambda: sum(1 for _ in repo.find(place)))),
+    ]
+
+    print(f"\n{name}: ingest {insert_rate:,.0f} reviews/s, re-ingest (duplicates) {dedup_rate:,.0f} reviews/s\n")
+    print(f"{'query':<26} {'p50 ms':>9} {'p95 ms':>9}")
+    for label, (p50, p95) in rows:
+        print(f"{label:<26} {p50:>9.3f} {p95:>9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--reviews", type=int, default=100000)
+    parser.add_argument("--places", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--depth", type=float, default=0.9)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "mongodb"], choices=["sqlite", "mongodb"])
+    args = parser.parse_args()
+
+    reviews = make_reviews(args.reviews, args.places)
+    print(f"{args.reviews} reviews over {args.places} places, batches of {args.batch}")
+
+    if "sqlite" in args.backends:
+        directory = tempfile.mkdtemp()
+        repo = SQLiteReviewRepository(os.path.join(directory, "reviews.sqlite3"))
+        try:
+            run_backend("sqlite", repo, reviews, args)
+        finally:
+            repo.close()
+            shutil.rmtree(directory)
+
+    if "mongodb" in args.backends:
+        client = MongoClient(settings.mongodb_url, serverSelectionTimeoutMS=2000)
+        try:
+            client.admin.command("ping")
+        except Exception as e:
+            print(f"\nmongodb: skipped ({e})")
+            return
+        collection = client[settings.mongodb_db]["benchmark_reviews"]
+        collection.drop()
+        try:
+            run_backend("mongodb", MongoReviewRepository(collection), reviews, args)
+        finally:
+            collection.drop()
+            client.close()
+
+
+if __name__ == "__main__":
+    main()
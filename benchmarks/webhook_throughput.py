@@ -0,0 +1,127 @@
+"""
+Webhook delivery throughput against a local receiver.
+
+Starts a local ASGI receiver (uvicorn) that answers every POST after a fixed
+latency, then delivers the same set of `new_reviews` events three ways:
+
+- sequential: a new client per event, one POST per place (the original design);
+- pooled: WebhookDeliveryService with a shared keep-alive client and bounded
+  concurrency, one request per place;
+- pooled + batched: same, with places bound for the same URL in one request.
+
+Usage:
+    python benchmarks/webhook_throughput.py [--events 500] [--urls 20] [--latency 0.02]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.webhook_service import WebhookDeliveryService, build_event, build_request_body
+
+
+PORT = 8765
+received = {"requests": 0, "events": 0}
+
+
+def make_receiver(latency: float):
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        body = b""
+        more = True
+        while more:
+            message = await receive()
+            body += message.get("body", b"")
+            more = message.get("more_body", False)
+
+        await asyncio.sleep(latency)
+        received["requests"] += 1
+        received["events"] += body.count(b'"event": "new_reviews"')
+
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"status": "success"}'})
+
+    return app
+
+
+def start_receiver(latency: float) -> uvicorn.Server:
+    config = uvicorn.Config(make_receiver(latency), host="127.0.0.1", port=PORT,
+                            log_level="warning", backlog=4096)
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def make_events(count: int, urls: int):
+    review = {
+        "id_review": "r", "caption": "Excelente servicio", "rating": 5.0,
+        "username": "Juan", "review_date": "2025-11-02T15:30:00"
+    }
+    return [
+        build_event(
+            place_id=f"place-{i}", client_id="cliente", branch_id=f"sucursal-{i}",
+            webhook_url=f"http://127.0.0.1:{PORT}/hook/{i % urls}",
+            place_name=f"Lugar {i}", place_url="https://www.google.com/maps/place/x",
+            new_reviews=[dict(review, id_review=f"r-{i}-{j}") for j in range(3)]
+        )
+        for i in range(count)
+    ]
+
+
+async def sequential(events) -> int:
+    for event in events:
+        async with httpx.AsyncClient(timeout=10) as client:
+            await client.post(event["webhook_url"], json=build_request_body([event]))
+    return len(events)
+
+
+async def pooled(events, batching: bool) -> int:
+    async with WebhookDeliveryService(batching=batching) as service:
+        failed = await service.deliver(events)
+    return len(events) - sum(len(group) for group in failed)
+
+
+async def measure(name: str, coroutine):
+    received["requests"] = received["events"] = 0
+    start = time.perf_counter()
+    delivered = await coroutine
+    elapsed = time.perf_counter() - start
+    print(f"{name:<20} {delivered:>8} {received['requests']:>9} {elapsed:>9.2f} {delivered / elapsed:>12.1f}")
+
+
+async def run(args):
+    events = make_events(args.events, args.urls)
+    print(f"{args.events} events over {args.urls} webhook URLs, receiver latency {args.latency * 1000:.0f}ms\n")
+    print(f"{'mode':<20} {'events':>8} {'requests':>9} {'seconds':>9} {'events/sec':>12}")
+    await measure("sequential", sequential(events))
+    await measure("pooled", pooled(events, batching=False))
+    await measure("pooled + batched", pooled(events, batching=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--urls", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    server = start_receiver(args.latency)
+    try:
+        asyncio.run(run(args))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 """
-Entrypoint script that starts either the API or the Worker
-based on the SERVICE_TYPE environment variable.
+Entrypoint script that starts either the API, a single Worker, the
+worker Supervisor (several workers sized to the host), the webhook
+dispatcher, the review event relay or a standalone API (API and scraper
+in one process, no Redis needed) based on the SERVICE_TYPE environment
+variable.
 """
 import os
 import sys
@@ -14,6 +17,30 @@ def main():
     if service_type == 'worker':
         print("Starting Worker...", flush=True)
         sys.exit(subprocess.call(['python', 'worker.py']))
+    elif service_type == 'supervisor':
+        print("Starting Worker Supervisor...", flush=True)
+        # exec so the supervisor receives SIGTERM directly and can drain workers
+        os.execvp('python', ['python', 'supervisor.py'])
+    elif service_type == 'webhooks':
+        print("Starting Webhook Dispatcher...", flush=True)
+        os.execvp('python', ['python', 'webhook_dispatcher.py'])
+    elif service_type == 'event_relay':
+        print("Starting Review Event Relay...", flush=True)
+        os.execvp('python', ['python', 'event_relay.py'])
+    elif service_type == 'standalone':
+        print(f"Starting standalone API (local execution mode) on port {port}...", flush=True)
+        # Redis-backed caches off unless explicitly enabled
+        os.environ.setdefault('EXECUTION_MODE', 'local')
+        os.environ.setdefault('RECENT_REVIEWS_CACHE_ENABLED', 'false')
+        os.environ.setdefault('RESPONSE_CACHE_ENABLED', 'false')
+        # A single process: jobs live in its memory
+        os.execvp('uvicorn', [
+            'uvicorn',
+            'app.main:app',
+            '--host', '0.0.0.0',
+            '--port', port,
+            '--workers', '1'
+        ])
     else:
         print(f"Starting API on port {port}...", flush=True)
         sys.exit(subprocess.call([
@@ -0,0 +1,55 @@
+"""
+Review event relay.
+Publishes inserts on the reviews collection to the new-review event stream
+by tailing a MongoDB change stream (see app/services/review_events.py).
+Only needed with REVIEW_EVENTS_SOURCE=change_stream, which requires MongoDB
+to run as a replica set.
+
+Usage:
+    python event_relay.py
+"""
+import logging
+import signal
+import threading
+import time
+
+from app.config import settings
+from app.services.review_events import relay_change_stream
+
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, settings.log_level.upper()),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('event_relay.log'),
+        logging.StreamHandler()
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Run the change stream relay, restarting it after errors."""
+    if settings.review_events_source != "change_stream":
+        logger.error("REVIEW_EVENTS_SOURCE is not 'change_stream'; reviews are published on save, "
+                     "the relay is not needed")
+        return
+
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda signum, frame: stop.set())
+
+    while not stop.is_set():
+        try:
+            relay_change_stream(stop)
+        except Exception as e:
+            logger.error(f"Change stream relay failed: {e}", exc_info=True)
+            time.sleep(5)
+
+    logger.info("Change stream relay stopped")
+
+
+if __name__ == "__main__":
+    main()
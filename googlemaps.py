@@ -70,9 +70,6 @@ class GoogleMapsScraper:
         return self
 
     def __exit__(self, exc_type, exc_value, tb):
-        if exc_type is not None:
-            traceback.print_exception(exc_type, exc_value, tb)
-
         if self.page:
             self.page.close()
         if self.context:
@@ -90,7 +87,9 @@ class GoogleMapsScraper:
             except:
                 pass
 
-        return True
+        # No suprimir excepciones: quien llama debe poder distinguir errores
+        # (p. ej. el timeout del watchdog de RQ) de un scraping sin reseñas
+        return False
 
     def sort_by(self, url, ind):
 
@@ -242,7 +241,11 @@ class GoogleMapsScraper:
 
 
 
-    def get_reviews(self, offset, max_reviews=100):
+    def get_reviews(self, offset, max_reviews=100, on_scroll=None):
+        # on_scroll: callback opcional invocado tras cada scroll con (reseñas, scrolls).
+        # Si devuelve un entero mayor que max_reviews, el objetivo se amplía
+        # (permite extender un trabajo en ejecución).
+
         # Wait for page to load
         try:
             # Wait for reviews section to be present
@@ -345,6 +348,14 @@ class GoogleMapsScraper:
                 # Reset counter when we find new reviews
                 consecutive_empty_scrolls = 0
 
+            # Notify caller and allow it to raise the review target
+            if on_scroll is not None:
+                new_target = on_scroll(len(parsed_reviews), scrolls)
+                if new_target and new_target > max_reviews:
+                    self.logger.info(f'Review target raised from {max_reviews} to {new_target}')
+                    max_reviews = new_target
+                    max_scrolls = min(MAX_SCROLLS, (max_reviews // 10) + 5)
+
             # If we have enough reviews, stop scrolling
             if len(parsed_reviews) >= max_reviews:
                 self.logger.info(f'Reached target of {max_reviews} reviews, stopping')
@@ -0,0 +1,80 @@
+"""
+Index report.
+Explains a representative query of every declared query shape and reads
+index usage ($indexStats) of every collection (see
+app/services/index_registry.py), flagging collection scans, in-memory sorts
+and indexes that are not derived from any shape or were never used.
+
+Reviews are skipped with REVIEW_STORAGE=sqlite. Explains run against stored
+documents, so the report is most useful on a populated database; usage
+counters reset when mongod restarts.
+
+--sync creates missing derived indexes. --drop-undeclared also drops the
+auto-named indexes no shape derives; run it only once no replica of an older
+version still queries them (indexes with custom names are kept).
+
+Usage:
+    python index_report.py [--sync] [--drop-undeclared] [--json]
+"""
+import argparse
+import json
+import logging
+
+from app.config import settings
+from app.database import get_database
+from app.services.index_registry import index_report, sync_all
+
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, settings.log_level.upper()),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def print_report(report):
+    """Print the report as tables."""
+    print(f"{'shape':<38} {'index':<52} {'flags':<14} {'docs':>8} {'keys':>8}")
+    for shape in report["shapes"]:
+        flags = " ".join(flag for flag, on in (("COLLSCAN", shape["collection_scan"]),
+                                               ("SORT", shape["in_memory_sort"])) if on)
+        print(f"{shape['shape']:<38} {shape['index'] or '-':<52} {flags or 'ok':<14} "
+              f"{shape['docs_examined']!s:>8} {shape['keys_examined']!s:>8}")
+
+    for collection, indexes in report["indexes"].items():
+        print(f"\n{collection}")
+        for index in indexes:
+            served = ", ".join(index["serves"]) or ("-" if index["name"] == "_id_" else "not declared")
+            print(f"  {index['name']:<52} {index['ops']:>10} ops  {served}")
+
+    print(f"\n{len(report['warnings'])} warnings")
+    for warning in report["warnings"]:
+        print(f"  - {warning}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explain every query shape and report index usage")
+    parser.add_argument("--sync", action="store_true", help="create missing derived indexes first")
+    parser.add_argument("--drop-undeclared", action="store_true",
+                        help="create missing derived indexes and drop auto-named ones no query shape derives")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    skip = ("reviews",) if settings.review_storage == "sqlite" else ()
+    db = get_database()
+
+    if args.sync or args.drop_undeclared:
+        for collection, changes in sync_all(db, skip=skip, drop_undeclared=args.drop_undeclared).items():
+            logger.info(f"{collection}: created {changes['created'] or 'none'}, dropped {changes['dropped'] or 'none'}")
+
+    report = index_report(db, skip=skip)
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Supervisor that runs several RQ worker processes on one host.
+
+The number of workers is derived from the memory available to the container
+(cgroup limit or host memory), the CPU count and the per-browser memory budget.
+Crashed workers are restarted, workers whose process tree (worker, work horse
+and Chromium) grows past `worker_max_rss_mb` are recycled after their current
+job, and SIGTERM drains all workers gracefully.
+
+Usage:
+    python supervisor.py
+"""
+import logging
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import psutil
+
+from app.config import settings
+
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, settings.log_level.upper()),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('supervisor.log'),
+        logging.StreamHandler()
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'worker.py')
+MB = 1024 * 1024
+
+# Workers that die sooner than this after starting are restarted with backoff
+MIN_HEALTHY_UPTIME = 30
+MAX_RESTART_BACKOFF = 60
+
+# Paths of the container memory limit (cgroup v2 and v1)
+CGROUP_MEMORY_LIMIT_FILES = [
+    '/sys/fs/cgroup/memory.max',
+    '/sys/fs/cgroup/memory/memory.limit_in_bytes'
+]
+
+
+def container_memory_limit() -> Optional[int]:
+    """
+    Get the memory limit of the container in bytes.
+
+    Returns:
+        Limit in bytes, or None if there is no cgroup limit
+    """
+    for path in CGROUP_MEMORY_LIMIT_FILES:
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+
+        if value.isdigit() and int(value) < psutil.virtual_memory().total:
+            return int(value)
+
+    return None
+
+
+def available_memory_mb() -> int:
+    """Memory available for workers in MB, honouring container limits."""
+    available = psutil.virtual_memory().available
+    limit = container_memory_limit()
+
+    if limit is not None:
+        used = psutil.Process().memory_info().rss
+        available = min(available, limit - used)
+
+    return int(available / MB)
+
+
+def compute_worker_count() -> int:
+    """
+    Number of workers to run on this host.
+
+    Returns:
+        min(CPU count, memory slots, configured maximum), at least 1
+    """
+    memory_mb = available_memory_mb() - settings.supervisor_reserved_memory_mb
+    memory_slots = memory_mb // settings.worker_browser_memory_mb
+    cpu_slots = os.cpu_count() or 1
+
+    count = min(memory_slots, cpu_slots)
+    if settings.supervisor_max_workers > 0:
+        count = min(count, settings.supervisor_max_workers)
+
+    logger.info(
+        f"Sizing workers: {memory_mb}MB usable / {settings.worker_browser_memory_mb}MB per browser "
+        f"= {memory_slots} slots, {cpu_slots} CPUs -> {max(count, 1)} workers"
+    )
+    return max(count, 1)
+
+
+def process_tree_rss_mb(pid: int) -> float:
+    """Resident memory of a process and all its children in MB."""
+    try:
+        process = psutil.Process(pid)
+        processes = [process] + process.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return 0.0
+
+    total = 0
+    for proc in processes:
+        try:
+            total += proc.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total / MB
+
+
+class WorkerSlot:
+    """A supervised worker process and its restart bookkeeping."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process: Optional[subprocess.Popen] = None
+        self.started_at = 0.0
+        self.restart_at = 0.0
+        self.failures = 0
+        self.recycling = False
+        self.stop_requested_at = 0.0
+
+    def start(self):
+        env = dict(os.environ, WORKER_INDEX=str(self.index))
+        self.process = subprocess.Popen([sys.executable, WORKER_SCRIPT], env=env)
+        self.started_at = time.time()
+        self.recycling = False
+        self.stop_requested_at = 0.0
+        logger.info(f"Started worker {self.index} (pid {self.process.pid})")
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def request_stop(self):
+        """Ask the worker for a warm shutdown (finish the current job, then exit)."""
+        if self.is_running() and not self.stop_requested_at:
+            self.process.send_signal(signal.SIGTERM)
+            self.stop_requested_at = time.time()
+
+    def kill(self):
+        """Kill the worker and its children (work horse, Chromium)."""
+        if not self.is_running():
+            return
+
+        logger.warning(f"Killing worker {self.index} (pid {self.process.pid})")
+        try:
+            children = psutil.Process(self.process.pid).children(recursive=True)
+        except psutil.NoSuchProcess:
+            children = []
+
+        self.process.kill()
+        for child in children:
+            try:
+                child.kill()
+            except psutil.NoSuchProcess:
+                pass
+
+
+class Supervisor:
+    """Keeps N worker processes alive until asked to stop."""
+
+    def __init__(self, worker_count: int):
+        self.slots: List[WorkerSlot] = [WorkerSlot(i) for i in range(worker_count)]
+        self.stopping = False
+        self.restarts: Dict[str, int] = {"crashed": 0, "memory": 0}
+
+    def handle_stop_signal(self, signum, frame):
+        logger.info(f"Received signal {signum}, draining workers...")
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.handle_stop_signal)
+        signal.signal(signal.SIGINT, self.handle_stop_signal)
+
+        for slot in self.slots:
+            slot.start()
+
+        while not self.stopping:
+            for slot in self.slots:
+                self.check_slot(slot)
+            time.sleep(settings.supervisor_check_interval)
+
+        self.drain()
+
+    def check_slot(self, slot: WorkerSlot):
+        now = time.time()
+
+        if not slot.is_running():
+            if slot.restart_at == 0.0:
+                exit_code = slot.process.returncode if slot.process else None
+                uptime = now - slot.started_at
+
+                if slot.recycling:
+                    slot.failures = 0
+                    self.restarts["memory"] += 1
+                    logger.info(f"Worker {slot.index} recycled after exceeding memory limit")
+                else:
+                    slot.failures = slot.failures + 1 if uptime < MIN_HEALTHY_UPTIME else 1
+                    self.restarts["crashed"] += 1
+                    logger.warning(f"Worker {slot.index} exited with code {exit_code} after {uptime:.0f}s")
+
+                backoff = 0 if slot.recycling else min(2 ** (slot.failures - 1), MAX_RESTART_BACKOFF)
+                slot.restart_at = now + backoff
+
+            if now >= slot.restart_at:
+                slot.restart_at = 0.0
+                slot.start()
+            return
+
+        # Recycle workers whose browser has bloated
+        rss_mb = process_tree_rss_mb(slot.process.pid)
+        if rss_mb > settings.worker_max_rss_mb and not slot.recycling:
+            logger.warning(
+                f"Worker {slot.index} uses {rss_mb:.0f}MB (limit {settings.worker_max_rss_mb}MB), "
+                f"recycling after its current job"
+            )
+            slot.recycling = True
+            slot.request_stop()
+
+        # A recycled worker that does not finish its job in time is killed
+        if slot.stop_requested_at and now - slot.stop_requested_at > settings.supervisor_drain_timeout:
+            slot.kill()
+
+    def drain(self):
+        """Warm-stop all workers, killing those that exceed the drain timeout."""
+        for slot in self.slots:
+            slot.request_stop()
+
+        deadline = time.time() + settings.supervisor_drain_timeout
+        while time.time() < deadline and any(slot.is_running() for slot in self.slots):
+            time.sleep(1)
+
+        for slot in self.slots:
+            slot.kill()
+
+        logger.info(f"All workers stopped (restarts: {self.restarts})")
+
+
+def main():
+    """Start the supervisor with as many workers as the host can hold."""
+    logger.info("Starting worker supervisor...")
+
+    worker_count = compute_worker_count()
+    Supervisor(worker_count).run()
+
+
+if __name__ == "__main__":
+    main()
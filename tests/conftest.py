@@ -0,0 +1,47 @@
+"""
+Fixtures shared by the unit tests.
+
+Redis and MongoDB are replaced by fakeredis and mongomock through the
+connection singletons of app.database, so the tests need neither server.
+"""
+import fakeredis
+import mongomock
+import pytest
+
+from app import database
+
+
+@pytest.fixture
+def redis_conn(monkeypatch):
+    """In-memory Redis (with Lua scripting) used by every get_redis_client() call."""
+    conn = fakeredis.FakeRedis()
+    monkeypatch.setattr(database, "_redis_client", conn)
+    yield conn
+    conn.flushall()
+
+
+@pytest.fixture
+def mongo_db(monkeypatch):
+    """In-memory MongoDB used by every get_database() call."""
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(database, "_mongodb_client", client)
+    yield database.get_database()
+
+
+@pytest.fixture
+def sqlite_storage(monkeypatch, tmp_path):
+    """Reviews in a fresh SQLite file, with any use of MongoDB failing the test."""
+    from app.config import settings
+    from app.services import review_repository
+
+    def no_mongodb():
+        raise AssertionError("MongoDB used with SQLite review storage")
+
+    monkeypatch.setattr(settings, "review_storage", "sqlite")
+    monkeypatch.setattr(settings, "review_storage_sqlite_path", str(tmp_path / "reviews.sqlite3"))
+    monkeypatch.setattr(review_repository, "_repository", None)
+    monkeypatch.setattr(database, "get_mongodb_client", no_mongodb)
+    repository = review_repository.get_review_repository()
+    repository.ensure_indexes()
+    yield repository
+    repository.close()
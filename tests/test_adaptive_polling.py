@@ -0,0 +1,38 @@
+"""
+Tests of the review rate estimate behind adaptive polling.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.services.adaptive_polling import estimate_review_rate, interval_for_rate, prior_rate_per_hour
+
+
+NOW = datetime(2024, 1, 1)
+
+
+def test_no_history_uses_default_interval():
+    rate = estimate_review_rate([], NOW)
+
+    assert rate == pytest.approx(prior_rate_per_hour())
+    assert interval_for_rate(rate) == settings.default_check_interval
+
+
+def test_steady_rate_is_not_biased_by_the_prior():
+    hours = settings.polling_lookback_days * 24
+    dates = [NOW - timedelta(hours=h) for h in range(hours)]
+
+    rate = estimate_review_rate(dates, NOW)
+
+    assert rate == pytest.approx(1.0, rel=0.05)
+    assert interval_for_rate(rate) == pytest.approx(42, abs=2)  # -ln(0.5) h at one review per hour
+
+
+def test_observed_place_without_reviews_slows_down():
+    since = NOW - timedelta(days=settings.polling_lookback_days)
+
+    rate = estimate_review_rate([], NOW, observed_since=since)
+
+    assert rate < prior_rate_per_hour() / 10
+    assert interval_for_rate(rate) == settings.polling_max_interval
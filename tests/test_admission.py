@@ -0,0 +1,89 @@
+"""Admission control of single jobs and batches (app.services.admission)."""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.queues import QueueTier, get_queue
+from app.services import admission, batch_jobs
+
+
+CLIENT = "ip:203.0.113.7"
+
+
+def place_urls(count, start=0):
+    return [
+        f"https://www.google.com/maps/place/Cafe+{i}/data=!4m6!3m5!1s0x{i + 1:x}:0x{i + 1:x}"
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def backfill(redis_conn, monkeypatch):
+    monkeypatch.setattr(settings, "admission_enabled", True)
+    monkeypatch.setattr(settings, "job_coalescing_enabled", True)
+    return get_queue(QueueTier.BACKFILL, connection=redis_conn)
+
+
+def test_batch_larger_than_single_quota_is_admitted(backfill):
+    assert settings.admission_client_max_inflight < 21
+
+    record = batch_jobs.submit_batch(backfill, place_urls(21), 10, "newest", client_id=CLIENT)
+
+    assert len({entry["job_id"] for entry in record["jobs"]}) == 21
+    assert backfill.count == 21
+    quota = admission.get_client_quota(backfill.connection, CLIENT)
+    assert quota["batch_inflight_jobs"] == 21
+    assert quota["inflight_jobs"] == 0  # singles keep their own quota
+
+
+def test_batch_quota_rejection_reports_requested_jobs(backfill, monkeypatch):
+    monkeypatch.setattr(settings, "admission_client_max_batch_inflight", 25)
+    batch_jobs.submit_batch(backfill, place_urls(20), 10, "newest", client_id=CLIENT)
+
+    with pytest.raises(admission.AdmissionRejected) as rejected:
+        batch_jobs.submit_batch(backfill, place_urls(10, start=20), 10, "newest", client_id=CLIENT)
+
+    assert "requested 10 new batch jobs" in rejected.value.reason
+    assert "20 of 25" in rejected.value.reason
+    assert backfill.count == 20  # nothing of the rejected batch was enqueued
+
+
+def test_batch_queue_depth_rejection_reports_requested_jobs(backfill, monkeypatch):
+    monkeypatch.setattr(settings, "admission_batch_max_queue_depth", 30)
+    batch_jobs.submit_batch(backfill, place_urls(25), 10, "newest", client_id=CLIENT)
+
+    with pytest.raises(admission.AdmissionRejected) as rejected:
+        batch_jobs.submit_batch(backfill, place_urls(10, start=25), 10, "newest", client_id="ip:198.51.100.1")
+
+    assert "10 new jobs requested, 25 of 30 already waiting" in rejected.value.reason
+
+
+def test_single_quota_rejection(redis_conn, monkeypatch):
+    monkeypatch.setattr(settings, "admission_enabled", True)
+    monkeypatch.setattr(settings, "admission_client_max_inflight", 1)
+    queue = get_queue(QueueTier.INTERACTIVE, connection=redis_conn)
+
+    with admission.admit(queue, [queue], CLIENT):
+        job = queue.enqueue("app.tasks.scraper_task.scrape_reviews_task", url="u", max_reviews=1, sort_by="newest")
+        admission.track_client_job(redis_conn, CLIENT, job.id)
+
+    with pytest.raises(admission.AdmissionRejected) as rejected:
+        with admission.admit(queue, [queue], CLIENT):
+            pass
+    assert "requested 1 new jobs with 1 of 1" in rejected.value.reason
+
+
+def test_batch_allowance_must_fit_batch_max_urls():
+    with pytest.raises(ValueError):
+        type(settings)(batch_max_urls=500, admission_client_max_batch_inflight=100)
+    type(settings)(batch_max_urls=500, admission_client_max_batch_inflight=0)  # unlimited
+
+
+def test_batch_endpoint_accepts_21_urls(backfill):
+    response = TestClient(app).post(
+        "/api/scraping/batch", json={"urls": place_urls(21), "max_reviews": 10, "sort_by": "newest"}
+    )
+
+    assert response.status_code == 202, response.text
+    assert response.json()["total_jobs"] == 21
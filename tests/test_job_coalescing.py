@@ -0,0 +1,92 @@
+"""In-flight request coalescing (app.services.job_coalescing)."""
+import threading
+import time
+
+import pytest
+
+from app.queues import QueueTier, get_queue
+from app.services import job_coalescing
+
+
+URL = "https://www.google.com/maps/place/Cafe/data=!4m6!3m5!1s0x85d1f96b83b19901:0xc83c8fcab37f08ab"
+
+
+@pytest.fixture
+def queue(redis_conn):
+    return get_queue(QueueTier.INTERACTIVE, connection=redis_conn)
+
+
+def slow_enqueue(queue, delay):
+    """Enqueue callback that spends `delay` seconds (e.g. in admission) before the job exists."""
+    def enqueue(job_id, coalesce_key):
+        time.sleep(delay)
+        return queue.enqueue("app.tasks.scraper_task.scrape_reviews_task", url=URL, max_reviews=10,
+                             sort_by="newest", job_id=job_id, meta={"coalesce_key": coalesce_key})
+    return enqueue
+
+
+def test_concurrent_requests_share_a_job_being_enqueued(queue):
+    results = []
+
+    def request(max_reviews):
+        results.append(job_coalescing.enqueue_or_attach(
+            queue.connection, URL, max_reviews, "newest", slow_enqueue(queue, 0.3)
+        ))
+
+    threads = [threading.Thread(target=request, args=(n,)) for n in (10, 20, 30)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)  # later requests arrive while the first job is not enqueued yet
+    for thread in threads:
+        thread.join()
+
+    assert len({job.id for job, _ in results}) == 1
+    assert sorted(coalesced for _, coalesced in results) == [False, True, True]
+    assert queue.count == 1
+    key = job_coalescing.build_coalesce_key(URL, "newest")
+    assert job_coalescing.get_inflight_target(queue.connection, key) == 30
+
+
+def test_claim_without_job_is_stale_after_grace(queue, monkeypatch):
+    key = job_coalescing.build_coalesce_key(URL, "newest")
+    queue.connection.hset(key, mapping={"job_id": "lost", "max_reviews": 10, "claimed_at": time.time() - 60})
+
+    job, coalesced = job_coalescing.enqueue_or_attach(queue.connection, URL, 10, "newest", slow_enqueue(queue, 0))
+
+    assert not coalesced and job.id != "lost"
+    assert queue.count == 1
+
+
+def test_failed_enqueue_lets_waiting_request_claim(queue):
+    def rejected(job_id, coalesce_key):
+        time.sleep(0.2)
+        raise RuntimeError("rejected")
+
+    errors = []
+
+    def first():
+        try:
+            job_coalescing.enqueue_or_attach(queue.connection, URL, 10, "newest", rejected)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=first)
+    thread.start()
+    time.sleep(0.05)
+    job, coalesced = job_coalescing.enqueue_or_attach(queue.connection, URL, 10, "newest", slow_enqueue(queue, 0))
+    thread.join()
+
+    assert errors and not coalesced
+    assert queue.count == 1
+
+
+def test_claim_many_defers_pending_claims(queue):
+    key = job_coalescing.build_coalesce_key(URL, "newest")
+    queue.connection.hset(key, mapping={"job_id": "pending", "max_reviews": 10, "claimed_at": time.time()})
+    other = job_coalescing.build_coalesce_key(URL, "most_relevant")
+
+    claimed, attached, stale = job_coalescing.claim_many(queue.connection, {key: 10, other: 10})
+
+    assert list(claimed) == [other] and not attached and stale == [key]
+    assert queue.connection.hget(key, "job_id") == b"pending"  # not cleared
+    assert queue.connection.hget(other, "claimed_at") is not None
@@ -0,0 +1,72 @@
+"""
+Round trips of the compact RQ job serializer, including jobs enqueued under
+RQ's default pickle serializer before the compact one became the default.
+"""
+import operator
+import pickle
+from datetime import datetime
+
+import pytest
+from rq import Queue, SimpleWorker
+from rq.job import Job
+from rq.serializers import DefaultSerializer
+
+from app.config import settings
+from app.services.job_serializer import CompactSerializer, PICKLE_PREFIX, ZLIB_PREFIX
+
+
+NOW = datetime(2024, 1, 1, 12, 30)
+
+
+def reviews(count):
+    return [{"id_review": f"r{i}", "caption": "Excelente servicio " * 5, "rating": 5.0} for i in range(count)]
+
+
+def test_small_payload_is_plain_json():
+    meta = {"status": "processing", "progress": "Scraped 10 reviews", "target": 50}
+
+    data = CompactSerializer.dumps(meta)
+
+    assert data.startswith(b"{") and len(data) < settings.job_serializer_compress_min_bytes
+    assert CompactSerializer.loads(data) == meta
+
+
+def test_large_payload_is_compressed():
+    result = {"status": "success", "reviews_count": 100, "reviews": reviews(100)}
+
+    data = CompactSerializer.dumps(result)
+
+    assert data.startswith(ZLIB_PREFIX)
+    assert len(data) < len(pickle.dumps(result))
+    assert CompactSerializer.loads(data) == result
+
+
+def test_datetimes_become_iso_strings():
+    assert CompactSerializer.loads(CompactSerializer.dumps({"at": NOW})) == {"at": NOW.isoformat()}
+
+
+@pytest.mark.parametrize("payload", [
+    {"status": "processing", "at": NOW},
+    ((), {"url": "https://www.google.com/maps/place/Cafe+A", "max_reviews": 100, "reviews": reviews(100)}),
+])
+def test_pickled_payloads_are_read(payload):
+    data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+
+    assert data.startswith(PICKLE_PREFIX)
+    assert CompactSerializer.loads(data) == payload
+
+
+def test_job_enqueued_with_pickle_runs_under_compact(redis_conn):
+    old = Queue("scraping_tasks", connection=redis_conn, serializer=DefaultSerializer)
+    job = old.enqueue(operator.add, 2, 3, meta={"status": "queued", "enqueued": NOW})
+
+    queue = Queue("scraping_tasks", connection=redis_conn, serializer=CompactSerializer)
+    fetched = Job.fetch(job.id, connection=redis_conn, serializer=CompactSerializer)
+    assert fetched.args == (2, 3)
+    assert fetched.meta == {"status": "queued", "enqueued": NOW}
+
+    SimpleWorker([queue], connection=redis_conn, serializer=CompactSerializer).work(burst=True)
+
+    finished = Job.fetch(job.id, connection=redis_conn, serializer=CompactSerializer)
+    assert finished.get_status() == "finished"
+    assert finished.return_value() == 5
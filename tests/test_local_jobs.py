@@ -0,0 +1,194 @@
+"""
+Pruebas del modo de ejecución local (EXECUTION_MODE=local).
+
+Ejecutan el registro de jobs en hilos con `scrape_reviews` sustituido, sin
+Redis, MongoDB ni navegador, y el guardado de reseñas con REVIEW_STORAGE=sqlite
+sin ningún servidor.
+
+Uso:
+    python -m pytest tests/test_local_jobs.py
+"""
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from app import database
+from app.config import settings
+from app.services import local_jobs, response_cache, scrape_cache
+from app.services.admission import AdmissionRejected
+from app.services.metrics import increment_counter, get_counters
+from app.services.scraper_service import save_reviews_to_db
+
+
+URL_A = "https://www.google.com/maps/place/Cafe+A/data=!4m6!3m5!1s0x85d1f96b83b19901:0xc83c8fcab37f08ab"
+URL_B = "https://www.google.com/maps/place/Cafe+B/data=!4m6!3m5!1s0x85d1f92b275f933b:0xbf641e762a5ca480"
+
+
+class FakeScraper:
+    """Sustituto de scrape_reviews que se bloquea hasta que se libera."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, url, max_reviews, sort_by, on_scroll=None):
+        self.calls.append(url)
+        self.release.wait(timeout=10)
+        # The target is re-read on every scroll, like the real scraper does
+        target = on_scroll(max_reviews, 1) if on_scroll else max_reviews
+        return [{"id_review": f"{url}-{i}"} for i in range(target)]
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    fake = FakeScraper()
+    monkeypatch.setattr(local_jobs, "scrape_reviews", fake)
+    monkeypatch.setattr(local_jobs, "discard_warm_scraper", lambda: None)
+    monkeypatch.setattr(settings, "job_coalescing_enabled", True)
+    yield fake
+    fake.release.set()
+
+
+@pytest.fixture
+def registry():
+    registry = local_jobs.LocalJobRegistry(workers=2)
+    yield registry
+    registry.shutdown()
+
+
+def wait_for(job, status, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while job.status != status and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job.status
+
+
+def test_submit_runs_job(scraper, registry):
+    job, coalesced, estimate = registry.submit(URL_A, 3, "newest")
+    assert not coalesced
+    assert "estimated_wait_seconds" in estimate
+
+    scraper.release.set()
+    assert wait_for(job, "finished") == "finished"
+    assert job.result["reviews_count"] == 3
+    assert job.meta["status"] == "completed"
+
+
+def test_submit_coalesces_identical_requests(scraper, registry):
+    first, _, _ = registry.submit(URL_A, 3, "newest")
+    second, coalesced, estimate = registry.submit(URL_A, 5, "newest")
+
+    assert coalesced and estimate == {}
+    assert second.id == first.id
+    assert first.target == 5
+
+    other, coalesced, _ = registry.submit(URL_A, 3, "most_relevant")
+    assert not coalesced and other.id != first.id
+
+    scraper.release.set()
+    assert wait_for(first, "finished") == "finished"
+    assert first.result["reviews_count"] == 5
+
+
+def test_submit_batch_shares_jobs(scraper, registry):
+    record = registry.submit_batch([URL_A, URL_B, URL_A], 2, "newest")
+
+    ids = [entry["job_id"] for entry in record["jobs"]]
+    assert ids[0] == ids[2] and ids[0] != ids[1]
+    assert [entry["coalesced"] for entry in record["jobs"]] == [False, False, True]
+
+    scraper.release.set()
+    for job_id in set(ids):
+        wait_for(registry.get(job_id), "finished")
+
+    status = registry.get_batch_status(record["batch_id"])
+    assert status["done"]
+    assert status["total_urls"] == 3 and status["total_jobs"] == 2
+    assert status["counts"]["finished"] == 2
+
+
+def test_admission_rejects_past_max_queued(scraper, registry, monkeypatch):
+    monkeypatch.setattr(settings, "local_max_queued", 1)
+    # Both workers busy, then one job waiting
+    for url in (URL_A, URL_B):
+        job, _, _ = registry.submit(url, 1, "newest")
+        assert wait_for(job, "started") == "started"
+    waiting, _, estimate = registry.submit("https://www.google.com/maps/place/Cafe+C", 1, "newest")
+    assert waiting.status == "queued" and estimate["queue_position"] == 1
+
+    with pytest.raises(AdmissionRejected):
+        registry.submit("https://www.google.com/maps/place/Cafe+D", 1, "newest")
+
+    # Batches have their own allowance
+    monkeypatch.setattr(settings, "admission_batch_max_queue_depth", 3)
+    registry.submit_batch(["https://www.google.com/maps/place/Cafe+D"], 1, "newest")
+    with pytest.raises(AdmissionRejected):
+        registry.submit_batch([f"https://www.google.com/maps/place/Cafe+{c}" for c in "EF"], 1, "newest")
+
+    # Attaching to an in-flight job needs no slot
+    _, coalesced, _ = registry.submit("https://www.google.com/maps/place/Cafe+C", 1, "newest")
+    assert coalesced
+
+
+def test_reaper_fails_hung_job(scraper, registry, monkeypatch):
+    monkeypatch.setattr(settings, "scraping_stall_timeout", 2)
+    job, _, _ = registry.submit(URL_A, 3, "newest")
+    assert wait_for(job, "started") == "started"
+
+    time.sleep(1.1)  # one stall window without progress
+    registry._reap()
+
+    assert job.status == "failed"
+    assert job.meta["error"].startswith("Scraping stalled")
+    assert registry.workers_status()["overrun_jobs"] == 1
+
+    # Identical requests start a new job while the blocked thread is still busy
+    retry, coalesced, _ = registry.submit(URL_A, 3, "newest")
+    assert not coalesced and retry.id != job.id
+
+    # The late result of the blocked call is discarded
+    scraper.release.set()
+    assert wait_for(retry, "finished") == "finished"
+    deadline = time.monotonic() + 5
+    while registry.workers_status()["overrun_jobs"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.workers_status()["overrun_jobs"] == 0
+    assert job.status == "failed" and job.result is None
+
+
+@pytest.fixture
+def standalone(monkeypatch, sqlite_storage):
+    """Modo local con SQLite; registra los intentos de usar Redis (los errores se silencian en el código)."""
+    redis_calls = []
+
+    def no_redis():
+        redis_calls.append(1)
+        raise ConnectionError("Redis used in local execution mode")
+
+    monkeypatch.setattr(settings, "execution_mode", "local")
+    monkeypatch.setattr(database, "get_redis_client", no_redis)
+    for module in ("metrics", "response_cache", "recent_reviews", "review_events"):
+        monkeypatch.setattr(f"app.services.{module}.get_redis_client", no_redis)
+    return redis_calls
+
+
+def test_save_path_needs_no_servers(standalone):
+    now = datetime.utcnow()
+    reviews = [
+        {"id_review": f"r{i}", "caption": "ok", "rating": 4.0, "review_date": now, "retrieval_date": now,
+         "place_id": "place"}
+        for i in range(3)
+    ]
+    version = response_cache.get_reviews_version()
+
+    assert save_reviews_to_db(reviews) == 3
+    assert save_reviews_to_db(reviews) == 0
+    scrape_cache.record_scrape(URL_A, "newest", 3, reviews)
+    increment_counter("watchdog", "jobs")
+
+    assert response_cache.get_reviews_version() == version + 1
+    assert len(scrape_cache.find_fresh_reviews(URL_A, "newest", 3, max_age=60)) == 3
+    assert get_counters("watchdog") == {}
+    assert standalone == []
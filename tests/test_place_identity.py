@@ -0,0 +1,60 @@
+"""
+Tests of canonical place identity and its use by monitoring.
+"""
+from contextlib import contextmanager
+
+from app.services import scraper_service, webhook_service
+from app.services.place_identity import canonical_place_id, canonicalize_maps_url
+
+
+PLACE_URL = "https://www.google.com/maps/place/Cafe+A/data=!4m6!3m5!1s0x85d1f96b83b19901:0xc83c8fcab37f08ab!8m2!3d19.4!4d-99.1"
+
+# Search context first, then the place itself: the last segment identifies the place
+MULTI_SEGMENT_URL = (
+    "https://www.google.com/maps/place/Cafe+A/@19.41,-99.17,15z/data="
+    "!4m10!1m2!2m1!1scafe!3m6!1s0x85d1ff35f5bd1563:0x6c366f0e2de02ff7!8m2!3d19.43!4d-99.13"
+    "!3m5!1s0x85d1f96b83b19901:0xc83c8fcab37f08ab!8m2!3d19.4!4d-99.1"
+)
+
+
+def test_multi_segment_url_uses_the_last_feature_id():
+    identity = canonicalize_maps_url(MULTI_SEGMENT_URL)
+
+    assert identity.place_id == "0x85d1f96b83b19901:0xc83c8fcab37f08ab"
+    assert (identity.latitude, identity.longitude) == (19.4, -99.1)
+    assert identity.place_id == canonical_place_id(PLACE_URL)
+
+
+class FakeScraper:
+    def sort_by(self, url, option):
+        return 0
+
+    def get_reviews(self, offset, max_reviews):
+        return [{"id_review": f"r{i}", "caption": "ok"} for i in range(2)]
+
+
+def test_monitored_reviews_carry_the_canonical_place_id(monkeypatch, mongo_db):
+    @contextmanager
+    def acquire_scraper():
+        yield FakeScraper()
+
+    monkeypatch.setattr(scraper_service, "acquire_scraper", acquire_scraper)
+
+    reviews = scraper_service.get_new_reviews_for_place(MULTI_SEGMENT_URL, client_id="client", branch_id="branch")
+
+    assert {review["place_id"] for review in reviews} == {canonical_place_id(PLACE_URL)}
+
+
+def test_webhook_events_find_the_place_by_canonical_id(mongo_db):
+    mongo_db.places.insert_one({
+        "place_id": "550e8400-e29b-41d4-a716-446655440000",
+        "canonical_place_id": canonical_place_id(PLACE_URL),
+        "webhook_url": "https://example.com/hook",
+        "url": PLACE_URL
+    })
+
+    events = webhook_service.events_for_reviews([{"id_review": "r1", "place_id": canonical_place_id(PLACE_URL)}])
+
+    assert len(events) == 1
+    assert events[0]["payload"]["place_id"] == "550e8400-e29b-41d4-a716-446655440000"
+    assert events[0]["payload"]["new_reviews_count"] == 1
@@ -0,0 +1,48 @@
+"""
+Tests of the recent-review hot cache.
+"""
+from datetime import datetime, timedelta
+
+import orjson
+
+from app.config import settings
+from app.services import recent_reviews
+
+
+NOW = datetime(2024, 1, 1)
+
+
+def review(index):
+    date = NOW + timedelta(minutes=index)
+    return {"id_review": f"r{index}", "caption": "ok", "rating": 5.0, "review_date": date, "retrieval_date": date}
+
+
+class FakeRepository:
+    """Stored reviews; a save lands while the cache is being warmed."""
+
+    def __init__(self, stored, during_read):
+        self.stored = stored
+        self.during_read = during_read
+
+    def find(self, filters, sort_by, direction, fields, limit):
+        docs = sorted(self.stored, key=lambda doc: doc["retrieval_date"], reverse=True)[:limit]
+        self.during_read()
+        return iter(docs)
+
+
+def cached_ids(redis_conn):
+    return [orjson.loads(member)["id_review"] for member in redis_conn.zrevrange(recent_reviews.scope_key(), 0, -1)]
+
+
+def test_warm_keeps_concurrent_adds_and_trims(redis_conn, monkeypatch):
+    monkeypatch.setattr(settings, "recent_reviews_cache_size", 3)
+    concurrent = review(10)
+    repository = FakeRepository([review(i) for i in range(5)], lambda: recent_reviews.add_recent_reviews([concurrent]))
+    monkeypatch.setattr(recent_reviews, "get_review_repository", lambda: repository)
+
+    warmed = recent_reviews.warm_scope()
+
+    assert [doc["id_review"] for doc in warmed] == ["r4", "r3", "r2"]
+    assert cached_ids(redis_conn) == ["r10", "r4", "r3"]
+    assert redis_conn.exists(recent_reviews._warm_key(recent_reviews.scope_key()))
+    assert [doc["id_review"] for doc in recent_reviews.get_recent_reviews(2)] == ["r10", "r4"]
@@ -0,0 +1,83 @@
+"""
+Tests of the review repository: the scrape cache of both backends and what
+SQLite storage still needs from MongoDB.
+"""
+from datetime import datetime
+
+import pytest
+
+from app import database
+from app.config import settings
+from app.services import health_prober, scrape_cache
+from app.services.review_repository import ReviewRepository, get_review_repository
+
+
+URL = "https://www.google.com/maps/place/Cafe+A/data=!4m6!3m5!1s0x85d1f96b83b19901:0xc83c8fcab37f08ab"
+
+
+def make_reviews(count):
+    now = datetime.utcnow()
+    return [
+        {"id_review": f"r{i}", "caption": f"review {i}", "rating": 5.0, "review_date": now, "retrieval_date": now}
+        for i in range(count)
+    ]
+
+
+def scrape_round_trip(repository):
+    reviews = make_reviews(3)
+    repository.insert_new([dict(review) for review in reviews])
+    scrape_cache.record_scrape(URL, "newest", 5, reviews)
+
+    # Fewer reviews than asked for: the place had no more, any size qualifies
+    cached = scrape_cache.find_fresh_reviews(URL, "newest", 10, max_age=60)
+    assert [review["id_review"] for review in cached] == ["r0", "r1", "r2"]
+    assert scrape_cache.find_fresh_reviews(URL, "most_relevant", 3, max_age=60) is None
+
+    # A newer scrape replaces the previous one
+    scrape_cache.record_scrape(URL, "newest", 2, reviews[:2])
+    assert scrape_cache.find_fresh_reviews(URL, "newest", 3, max_age=60) is None
+    assert [review["id_review"] for review in scrape_cache.find_fresh_reviews(URL, "newest", 2, max_age=60)] == ["r0", "r1"]
+
+
+def test_scrape_cache_with_sqlite_needs_no_mongodb(sqlite_storage):
+    scrape_round_trip(sqlite_storage)
+
+
+def test_scrape_cache_with_mongodb(mongo_db):
+    scrape_round_trip(get_review_repository())
+    assert mongo_db[settings.mongodb_scrapes_collection].count_documents({}) == 1
+
+
+def test_expired_scrape_is_a_miss(sqlite_storage):
+    sqlite_storage.record_scrape("place", "newest", {
+        "url": URL, "scraped_at": datetime(2020, 1, 1), "max_reviews": 1, "reviews_count": 0, "review_ids": []
+    })
+    assert sqlite_storage.find_scrape("place", "newest", datetime(2021, 1, 1)) is None
+    assert sqlite_storage.find_scrape("place", "newest", datetime(2019, 1, 1))["review_ids"] == []
+
+
+def test_initialize_database_with_sqlite_skips_mongodb(sqlite_storage, monkeypatch):
+    monkeypatch.setattr(settings, "enable_monitoring_on_startup", False)
+    calls = []
+    monkeypatch.setattr("app.services.index_registry.sync_all", lambda *args, **kwargs: calls.append(args))
+
+    database.initialize_database()
+
+    assert calls == []
+
+
+@pytest.mark.parametrize("storage, mode, required", [
+    ("mongodb", "queue", ("mongodb", "redis")),
+    ("sqlite", "queue", ("redis",)),
+    ("mongodb", "local", ("mongodb",)),
+    ("sqlite", "local", ()),
+])
+def test_health_requires_only_used_services(monkeypatch, storage, mode, required):
+    monkeypatch.setattr(settings, "review_storage", storage)
+    monkeypatch.setattr(settings, "execution_mode", mode)
+    assert health_prober._required_services() == required
+
+
+def test_repository_interface_is_abstract():
+    with pytest.raises(TypeError):
+        ReviewRepository()
@@ -0,0 +1,52 @@
+"""
+Webhook dispatcher.
+Consumes the new-review event stream (consumer group "webhooks") and
+delivers webhook notifications (see app/services/webhook_service.py), so
+slow or failing receivers never hold up scraping. Several dispatchers can
+run side by side; each one gets its own consumer name.
+
+Usage:
+    python webhook_dispatcher.py
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+from app.config import settings
+from app.services.webhook_service import run_dispatcher
+
+
+# Configure logging
+logging.basicConfig(
+    level=getattr(logging, settings.log_level.upper()),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler('webhooks.log'),
+        logging.StreamHandler()
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def serve():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    consumer_name = f"dispatcher-{socket.gethostname()}-{os.getpid()}"
+    await run_dispatcher(stop, consumer_name=consumer_name)
+
+
+def main():
+    """Start the webhook dispatcher."""
+    logger.info("Starting webhook dispatcher...")
+    logger.info(f"Redis URL: {settings.redis_url}")
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,19 @@
 """
 RQ Worker launcher for processing scraping tasks.
 Run this file to start a worker that processes background jobs.
+The worker listens on every priority tier (interactive, monitoring, backfill)
+and drains higher tiers first. It also runs the RQ scheduler, which
+re-enqueues failed jobs after their retry backoff.
 
 Usage:
     python worker.py
 """
 import logging
 from redis import Redis
-from rq import Worker, Queue
 
 from app.config import settings
+from app.queues import get_all_queues, get_worker_class
+from app.services.job_serializer import get_job_serializer
 
 
 # Configure logging
@@ -29,7 +33,6 @@ def main():
     """Start RQ worker to process scraping tasks."""
     logger.info("Starting RQ Worker...")
     logger.info(f"Redis URL: {settings.redis_url}")
-    logger.info(f"Queue: {settings.redis_queue_name}")
 
     # Connect to Redis
     redis_conn = Redis.from_url(settings.redis_url)
@@ -42,26 +45,31 @@ def main():
         logger.error(f"Failed to connect to Redis: {e}")
         return
 
-    # Create queue
-    queue = Queue(settings.redis_queue_name, connection=redis_conn)
+    # Create queues, highest priority first
+    queues = get_all_queues(redis_conn)
+    logger.info(f"Queues: {', '.join(q.name for q in queues)}")
 
-    # Create and start worker with unique name (hostname + timestamp)
+    # Create and start worker with unique name (hostname + pid + timestamp)
     # This prevents conflicts with old workers that didn't shut down cleanly
+    # and between workers started together by supervisor.py
+    import os
     import socket
     import time
-    worker_name = f"worker-{socket.gethostname()}-{int(time.time())}"
+    worker_name = f"worker-{socket.gethostname()}-{os.getpid()}-{int(time.time())}"
 
-    worker = Worker(
-        [queue],
+    worker_class = get_worker_class()
+    worker = worker_class(
+        queues,
         connection=redis_conn,
-        name=worker_name
+        name=worker_name,
+        serializer=get_job_serializer()
     )
 
-    logger.info(f"Worker '{worker.name}' started and listening for jobs...")
+    logger.info(f"Worker '{worker.name}' ({worker_class.__name__}) started and listening for jobs...")
     logger.info("Press Ctrl+C to stop")
 
     try:
-        worker.work(with_scheduler=False)
+        worker.work(with_scheduler=True)
     except KeyboardInterrupt:
         logger.info("Worker stopped by user")
     except Exception as e: